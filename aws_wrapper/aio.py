@@ -0,0 +1,1010 @@
+import asyncio
+import contextlib
+import datetime
+import functools
+import heapq
+import json
+import time
+import types
+
+from botocore.credentials import CredentialProvider
+from botocore.exceptions import ClientError
+from aws_wrapper.cloudformation import TEMPLATE_BODY_LIMIT, CloudFormation
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.compute import Compute
+from aws_wrapper.credentials import default_cache
+from aws_wrapper.dashboard import canonical_json
+from aws_wrapper.database import BATCH_GET_SIZE, BATCH_MAX_ATTEMPTS, BATCH_WRITE_SIZE, Database
+from aws_wrapper.iam import IAM
+from aws_wrapper.iam_policy_optimizer import optimize_policy_document
+from aws_wrapper.log_shipper import split_log_batches
+from aws_wrapper.queue import Queue
+from aws_wrapper.storage import Storage
+from aws_wrapper.template import load_template
+
+DEFAULT_MAX_POOL_CONNECTIONS = 100
+
+
+@functools.lru_cache(maxsize=None)
+def _aiobotocore():
+    try:
+        import aiobotocore.config
+        import aiobotocore.credentials
+        import aiobotocore.session
+    except ImportError:
+        raise ImportError("aiobotocore is required for the async wrappers (pip install aiobotocore).") from None
+    return types.SimpleNamespace(
+        get_session=aiobotocore.session.get_session,
+        AioConfig=aiobotocore.config.AioConfig,
+        AioCredentialResolver=aiobotocore.credentials.AioCredentialResolver,
+        AioDeferredRefreshableCredentials=aiobotocore.credentials.AioDeferredRefreshableCredentials,
+    )
+
+
+class _AsyncCacheProvider(CredentialProvider):
+    """
+    Async counterpart of the credential provider RoleSessionCache registers on
+    boto3 sessions. The credentials it hands aiobotocore refresh from the cache,
+    in a worker thread, only when they near expiry.
+    """
+
+    METHOD = "assume-role-cache"
+
+    def __init__(self, cache, role_arn, session_policy):
+        super().__init__()
+        self._cache = cache
+        self._role_arn = role_arn
+        self._session_policy = session_policy
+
+    async def _metadata(self):
+        return await asyncio.to_thread(self._cache.credential_metadata, self._role_arn, self._session_policy)
+
+    async def load(self):
+        return _aiobotocore().AioDeferredRefreshableCredentials(refresh_using=self._metadata, method=self.METHOD)
+
+
+class AsyncClientPool:
+    """
+    aiobotocore clients shared by any number of async wrappers.
+
+    One client is created per service, region and role and kept open until
+    close(), so every wrapper using the pool shares its HTTP connection pools.
+    Endpoints follow the usual botocore configuration, including AWS_ENDPOINT_URL.
+    """
+
+    def __init__(self, max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS):
+        """
+        :param max_pool_connections: Connections kept open per client.
+        """
+        self.max_pool_connections = max_pool_connections
+        self._sessions = {}
+        self._clients = {}
+        self._lock = asyncio.Lock()
+        self._stack = contextlib.AsyncExitStack()
+
+    async def client(self, service_name, region, role_arn=None, session_policy=None, credential_cache=None):
+        """
+        Returns the shared client for a service, creating it on first use.
+        """
+        if isinstance(session_policy, dict):
+            session_policy = json.dumps(session_policy, sort_keys=True, separators=(",", ":"))
+        key = (service_name, region, role_arn, session_policy)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        async with self._lock:
+            if key not in self._clients:
+                aiobotocore = _aiobotocore()
+                session = self._sessions.get((role_arn, session_policy))
+                if session is None:
+                    session = self._sessions[(role_arn, session_policy)] = aiobotocore.get_session()
+                    if role_arn is not None:
+                        provider = _AsyncCacheProvider(credential_cache or default_cache(), role_arn, session_policy)
+                        session.register_component("credential_provider", aiobotocore.AioCredentialResolver([provider]))
+                config = aiobotocore.AioConfig(max_pool_connections=self.max_pool_connections)
+                self._clients[key] = await self._stack.enter_async_context(
+                    session.create_client(service_name, region_name=region, config=config)
+                )
+            return self._clients[key]
+
+    async def close(self):
+        """
+        Closes every client and its connections.
+        """
+        self._clients.clear()
+        await self._stack.aclose()
+        self._stack = contextlib.AsyncExitStack()
+
+
+def _in_thread(name):
+    """
+    Async method that runs the synchronous wrapper's method of the same name in
+    a worker thread. Used for operations that already coordinate many calls
+    with their own thread pools, waiters or caches.
+    """
+    async def method(self, *args, **kwargs):
+        return await asyncio.to_thread(getattr(self.sync, name), *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = f"Runs the synchronous {name}() in a worker thread."
+    return method
+
+
+def _iter_in_thread(name):
+    """
+    Async generator over the synchronous wrapper's generator of the same name,
+    advanced one item at a time in a worker thread.
+    """
+    async def method(self, *args, **kwargs):
+        iterator = getattr(self.sync, name)(*args, **kwargs)
+        done = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+    method.__name__ = name
+    method.__doc__ = f"Yields from the synchronous {name}(), advanced in a worker thread."
+    return method
+
+
+async def _merge(iterators, key):
+    """
+    k-way merge of already-sorted async iterators.
+    """
+    async def advance(index):
+        try:
+            item = await iterators[index].__anext__()
+        except StopAsyncIteration:
+            return None
+        return key(item), index, item
+
+    heap = [entry for entry in [await advance(index) for index in range(len(iterators))] if entry is not None]
+    heapq.heapify(heap)
+    while heap:
+        _, index, item = heap[0]
+        yield item
+        following = await advance(index)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, following)
+
+
+class AsyncAWSManager:
+    """
+    Base of the async wrappers: same constructor arguments as AWSManager plus a
+    client pool. Clients are opened by open() (or ``async with``); methods have
+    the same names and return values as the synchronous wrappers, awaited.
+    """
+
+    sync_class = None
+
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, client_pool=None):
+        """
+        :param region: AWS region.
+        :param role_arn: Role to assume for every call (optional; default credentials otherwise).
+        :param session_policy: Session policy that further limits the assumed role (optional).
+        :param credential_cache: RoleSessionCache to take role credentials from
+            (defaults to the process-wide cache).
+        :param client_pool: AsyncClientPool to share clients with other wrappers
+            (optional; a private pool is created and closed with this wrapper otherwise).
+        """
+        self.region = region
+        self.role_arn = role_arn
+        self.session_policy = session_policy
+        self.credential_cache = credential_cache
+        self.client_pool = client_pool or AsyncClientPool()
+        self._owns_pool = client_pool is None
+        self._sync = None
+
+    async def create_client(self, service_name):
+        return await self.client_pool.client(
+            service_name, self.region, self.role_arn, self.session_policy, self.credential_cache
+        )
+
+    @property
+    def sync(self):
+        """
+        Synchronous wrapper with the same region and credentials, used for the
+        operations that run in worker threads.
+        """
+        if self._sync is None:
+            self._sync = self.sync_class(self.region, self.role_arn, self.session_policy, self.credential_cache)
+        return self._sync
+
+    async def open(self):
+        return self
+
+    async def close(self):
+        if self._owns_pool:
+            await self.client_pool.close()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncStorage(AsyncAWSManager):
+    sync_class = Storage
+
+    async def open(self):
+        self.s3 = await self.create_client("s3")
+        return self
+
+    async def create_bucket(self, bucket_name):
+        await self.s3.create_bucket(Bucket=bucket_name)
+        return f"Bucket '{bucket_name}' created successfully."
+
+    async def upload_file(self, bucket_name, key, content):
+        await self.s3.put_object(Bucket=bucket_name, Key=key, Body=content)
+        return f"File '{key}' uploaded to bucket '{bucket_name}'."
+
+    async def download_file(self, bucket_name, key):
+        response = await self.s3.get_object(Bucket=bucket_name, Key=key)
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def object_exists(self, bucket_name, key):
+        try:
+            await self.s3.head_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def list_buckets(self):
+        return (await self.s3.list_buckets())["Buckets"]
+
+    async def list_objects(self, bucket_name):
+        return (await self.s3.list_objects_v2(Bucket=bucket_name)).get("Contents", [])
+
+    async def delete_object(self, bucket_name, key):
+        await self.s3.delete_object(Bucket=bucket_name, Key=key)
+        return f"Object '{key}' deleted from bucket '{bucket_name}'."
+
+
+class AsyncQueue(AsyncAWSManager):
+    sync_class = Queue
+
+    async def open(self):
+        self.sqs = await self.create_client("sqs")
+        return self
+
+    # Queue Operations
+    async def create_queue(self, queue_name):
+        response = await self.sqs.create_queue(QueueName=queue_name)
+        return response["QueueUrl"]
+
+    async def create_queue_with_attributes(self, queue_name, attributes):
+        response = await self.sqs.create_queue(QueueName=queue_name, Attributes=attributes)
+        return response["QueueUrl"]
+
+    async def delete_queue(self, queue_url):
+        await self.sqs.delete_queue(QueueUrl=queue_url)
+        return f"Queue at '{queue_url}' deleted successfully."
+
+    # Message Handling
+    async def send_message(self, queue_url, message_body):
+        response = await self.sqs.send_message(QueueUrl=queue_url, MessageBody=message_body)
+        return response["MessageId"]
+
+    async def send_message_batch(self, queue_url, messages):
+        response = await self.sqs.send_message_batch(QueueUrl=queue_url, Entries=messages)
+        return f"{len(response['Successful'])} messages sent successfully."
+
+    async def receive_messages(self, queue_url, max_number=10):
+        response = await self.sqs.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=max_number,
+            WaitTimeSeconds=10,
+        )
+        return response.get("Messages", [])
+
+    async def delete_message(self, queue_url, receipt_handle):
+        await self.sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=receipt_handle)
+        return f"Message deleted from queue at '{queue_url}'."
+
+    async def delete_messages_batch(self, queue_url, receipt_handles):
+        entries = [{"Id": str(i), "ReceiptHandle": receipt_handle} for i, receipt_handle in enumerate(receipt_handles)]
+        response = await self.sqs.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+        return f"{len(response['Successful'])} messages deleted successfully."
+
+    # Queue Attributes
+    async def get_queue_attributes(self, queue_url):
+        response = await self.sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["All"])
+        return response["Attributes"]
+
+    async def set_queue_attributes(self, queue_url, attributes):
+        await self.sqs.set_queue_attributes(QueueUrl=queue_url, Attributes=attributes)
+        return f"Attributes updated for queue at '{queue_url}'."
+
+    # Dead-Letter Queue (DLQ) Management
+    async def create_dead_letter_queue(self, dlq_name):
+        dlq_url = (await self.sqs.create_queue(QueueName=dlq_name))["QueueUrl"]
+        dlq_arn = (await self.get_queue_attributes(dlq_url))["QueueArn"]
+        return dlq_url, dlq_arn
+
+    async def associate_dead_letter_queue(self, queue_url, dlq_arn, max_receive_count=5):
+        redrive_policy = {
+            "deadLetterTargetArn": dlq_arn,
+            "maxReceiveCount": str(max_receive_count),
+        }
+        await self.sqs.set_queue_attributes(
+            QueueUrl=queue_url,
+            Attributes={"RedrivePolicy": json.dumps(redrive_policy)},
+        )
+        return f"Dead-letter queue associated with queue at '{queue_url}'."
+
+    # FIFO Queue
+    async def create_fifo_queue(self, queue_name, attributes=None):
+        if not queue_name.endswith(".fifo"):
+            raise ValueError("FIFO queue names must end with '.fifo'")
+        if attributes is None:
+            attributes = {}
+        attributes["FifoQueue"] = "true"
+        response = await self.sqs.create_queue(QueueName=queue_name, Attributes=attributes)
+        return response["QueueUrl"]
+
+    # Monitoring
+    async def monitor_message_count(self, queue_url):
+        attributes = await self.get_queue_attributes(queue_url)
+        return int(attributes["ApproximateNumberOfMessages"])
+
+
+class AsyncDatabase(AsyncAWSManager):
+    sync_class = Database
+
+    async def open(self):
+        self.dynamodb = await self.create_client("dynamodb")
+        return self
+
+    async def create_table(self, table_name, key_schema, attribute_definitions, provisioned_throughput):
+        """
+        Creates a DynamoDB table.
+        """
+        await self.dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=key_schema,
+            AttributeDefinitions=attribute_definitions,
+            ProvisionedThroughput=provisioned_throughput,
+        )
+        return f"Table '{table_name}' created successfully."
+
+    async def describe_table(self, table_name):
+        """
+        Retrieves metadata about a DynamoDB table.
+        """
+        response = await self.dynamodb.describe_table(TableName=table_name)
+        return response["Table"]
+
+    async def put_item(self, table_name, item):
+        """
+        Adds an item to a DynamoDB table.
+        """
+        await self.dynamodb.put_item(TableName=table_name, Item=item)
+        return f"Item added to table '{table_name}'."
+
+    async def scan_table(self, table_name):
+        """
+        Retrieves all items from a DynamoDB table.
+        """
+        response = await self.dynamodb.scan(TableName=table_name)
+        return response.get("Items", [])
+
+    async def query_items(self, table_name, key_condition_expression, expression_attribute_values):
+        """
+        Queries items in a DynamoDB table using a key condition expression.
+        """
+        response = await self.dynamodb.query(
+            TableName=table_name,
+            KeyConditionExpression=key_condition_expression,
+            ExpressionAttributeValues=expression_attribute_values,
+        )
+        return response.get("Items", [])
+
+    async def update_item(self, table_name, key, update_expression, expression_attribute_values,
+                          expression_attribute_names=None):
+        """
+        Updates an item in a DynamoDB table.
+        """
+        update_params = {
+            "TableName": table_name,
+            "Key": key,
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeValues": expression_attribute_values,
+        }
+        if expression_attribute_names:
+            update_params["ExpressionAttributeNames"] = expression_attribute_names
+
+        await self.dynamodb.update_item(**update_params)
+        return f"Item updated in table '{table_name}'."
+
+    async def delete_item(self, table_name, key):
+        """
+        Deletes an item from a DynamoDB table.
+        """
+        await self.dynamodb.delete_item(TableName=table_name, Key=key)
+        return f"Item deleted from table '{table_name}'."
+
+    async def batch_write_items(self, table_name, items):
+        """
+        Adds many items to a DynamoDB table, 25 per request, resending any items
+        DynamoDB leaves unprocessed.
+        """
+        items = list(items)
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            requests = {table_name: [{"PutRequest": {"Item": item}} for item in items[start:start + BATCH_WRITE_SIZE]]}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                requests = (await self.dynamodb.batch_write_item(RequestItems=requests)).get("UnprocessedItems")
+                if not requests:
+                    break
+                if attempt + 1 < BATCH_MAX_ATTEMPTS:
+                    await asyncio.sleep(min(2.0, 0.05 * 2 ** attempt))
+            else:
+                raise RuntimeError(f"Items left unprocessed in table '{table_name}' after {BATCH_MAX_ATTEMPTS} attempts.")
+        return f"{len(items)} items added to table '{table_name}'."
+
+    async def batch_get_items(self, table_name, keys):
+        """
+        Retrieves many items from a DynamoDB table, 100 keys per request, retrying
+        any keys DynamoDB leaves unprocessed.
+        """
+        keys = list(keys)
+        items = []
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            requests = {table_name: {"Keys": keys[start:start + BATCH_GET_SIZE]}}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                response = await self.dynamodb.batch_get_item(RequestItems=requests)
+                items.extend(response.get("Responses", {}).get(table_name, []))
+                requests = response.get("UnprocessedKeys")
+                if not requests:
+                    break
+                if attempt + 1 < BATCH_MAX_ATTEMPTS:
+                    await asyncio.sleep(min(2.0, 0.05 * 2 ** attempt))
+            else:
+                raise RuntimeError(f"Keys left unprocessed in table '{table_name}' after {BATCH_MAX_ATTEMPTS} attempts.")
+        return items
+
+    async def delete_table(self, table_name):
+        """
+        Deletes a DynamoDB table.
+        """
+        await self.dynamodb.delete_table(TableName=table_name)
+        return f"Table '{table_name}' deleted successfully."
+
+
+class AsyncCompute(AsyncAWSManager):
+    sync_class = Compute
+
+    async def open(self):
+        self.ec2 = await self.create_client("ec2")
+        return self
+
+    # Instance Operations
+    async def create_instance(self, instance_type, key_name):
+        """
+        Launches a new EC2 instance and returns its ID.
+        """
+        response = await self.ec2.run_instances(
+            ImageId="ami-12345678",  # Dummy AMI ID for moto
+            InstanceType=instance_type,
+            MinCount=1,
+            MaxCount=1,
+            KeyName=key_name,
+        )
+        return response["Instances"][0]["InstanceId"]
+
+    async def stop_instance(self, instance_id):
+        await self.ec2.stop_instances(InstanceIds=[instance_id])
+        return f"Instance '{instance_id}' stopped successfully."
+
+    async def start_instance(self, instance_id):
+        await self.ec2.start_instances(InstanceIds=[instance_id])
+        return f"Instance '{instance_id}' started successfully."
+
+    async def terminate_instance(self, instance_id):
+        await self.ec2.terminate_instances(InstanceIds=[instance_id])
+        return f"Instance '{instance_id}' terminated successfully."
+
+    async def describe_instance_status(self, instance_id):
+        response = await self.ec2.describe_instance_status(InstanceIds=[instance_id])
+        if response["InstanceStatuses"]:
+            return response["InstanceStatuses"][0]["InstanceState"]["Name"]
+        return "No status found for the instance."
+
+    # Key Pair Management
+    async def create_key_pair(self, key_name):
+        response = await self.ec2.create_key_pair(KeyName=key_name)
+        return response["KeyMaterial"]
+
+    # Elastic IP Management
+    async def allocate_elastic_ip(self):
+        response = await self.ec2.allocate_address(Domain="vpc")
+        return {"AllocationId": response["AllocationId"], "PublicIp": response["PublicIp"]}
+
+    async def associate_elastic_ip(self, allocation_id, instance_id):
+        await self.ec2.associate_address(AllocationId=allocation_id, InstanceId=instance_id)
+        return f"Elastic IP associated with instance '{instance_id}'."
+
+    # Tagging Resources
+    async def tag_resource(self, resource_id, tags):
+        await self.ec2.create_tags(Resources=[resource_id], Tags=tags)
+        return f"Tags {tags} added to resource '{resource_id}'."
+
+    # Volume Management
+    async def create_volume(self, availability_zone, size):
+        response = await self.ec2.create_volume(AvailabilityZone=availability_zone, Size=size)
+        return response["VolumeId"]
+
+    async def attach_volume(self, volume_id, instance_id, device_name):
+        await self.ec2.attach_volume(VolumeId=volume_id, InstanceId=instance_id, Device=device_name)
+        return f"Volume '{volume_id}' attached to instance '{instance_id}'."
+
+    # Monitoring
+    async def enable_monitoring(self, instance_id):
+        await self.ec2.monitor_instances(InstanceIds=[instance_id])
+        return f"Monitoring enabled for instance '{instance_id}'."
+
+    async def disable_monitoring(self, instance_id):
+        await self.ec2.unmonitor_instances(InstanceIds=[instance_id])
+        return f"Monitoring disabled for instance '{instance_id}'."
+
+
+class AsyncCloudWatch(AsyncAWSManager):
+    sync_class = CloudWatch
+
+    async def open(self):
+        self.cloudwatch = await self.create_client("cloudwatch")
+        self.logs = await self.create_client("logs")
+        return self
+
+    # Metrics Management
+    async def put_metric_data(self, namespace, metric_name, value, unit="None", dimensions=None):
+        data = {"MetricName": metric_name, "Value": value, "Unit": unit}
+        if dimensions:
+            data["Dimensions"] = dimensions
+        await self.cloudwatch.put_metric_data(Namespace=namespace, MetricData=[data])
+        return f"Metric '{metric_name}' published to namespace '{namespace}'."
+
+    async def list_metrics(self, namespace=None):
+        params = {"Namespace": namespace} if namespace else {}
+        response = await self.cloudwatch.list_metrics(**params)
+        return [
+            {
+                "Namespace": metric["Namespace"],
+                "MetricName": metric["MetricName"],
+                "Dimensions": metric.get("Dimensions", []),
+            }
+            for metric in response.get("Metrics", [])
+        ]
+
+    async def get_metric_statistics(self, namespace, metric_name, start_time, end_time, period, statistics,
+                                    dimensions=None):
+        params = {
+            "Namespace": namespace,
+            "MetricName": metric_name,
+            "StartTime": start_time,
+            "EndTime": end_time,
+            "Period": period,
+            "Statistics": statistics,
+        }
+        if dimensions:
+            params["Dimensions"] = dimensions
+        response = await self.cloudwatch.get_metric_statistics(**params)
+        return response.get("Datapoints", [])
+
+    async def get_metric_data(self, queries, start_time, end_time, max_workers=4):
+        """
+        Runs many metric queries through GetMetricData; see CloudWatch.get_metric_data().
+        Up to ``max_workers`` packed requests are in flight at once.
+        """
+        requests = CloudWatch._pack_metric_data_queries(queries)
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch(metric_data_queries):
+            results = {}
+            async with semaphore:
+                paginator = self.cloudwatch.get_paginator("get_metric_data")
+                async for page in paginator.paginate(
+                    MetricDataQueries=metric_data_queries,
+                    StartTime=start_time,
+                    EndTime=end_time,
+                    ScanBy="TimestampAscending",
+                ):
+                    CloudWatch._add_metric_data_page(results, page)
+            return results
+
+        pages = await asyncio.gather(*(fetch(request) for request in requests))
+        return CloudWatch._merge_metric_data(pages)
+
+    # Alarms Management
+    async def create_alarm(self, alarm_name, metric_name, namespace, threshold, comparison_operator,
+                           evaluation_periods, period, statistic, dimensions=None):
+        await self.cloudwatch.put_metric_alarm(
+            AlarmName=alarm_name,
+            MetricName=metric_name,
+            Namespace=namespace,
+            Threshold=threshold,
+            ComparisonOperator=comparison_operator,
+            EvaluationPeriods=evaluation_periods,
+            Period=period,
+            Statistic=statistic,
+            Dimensions=dimensions or [],
+        )
+        return f"Alarm '{alarm_name}' created successfully."
+
+    async def delete_alarm(self, alarm_name):
+        await self.cloudwatch.delete_alarms(AlarmNames=[alarm_name])
+        return f"Alarm '{alarm_name}' deleted successfully."
+
+    async def list_alarms(self, prefix=None):
+        params = {"AlarmNamePrefix": prefix} if prefix else {}
+        paginator = self.cloudwatch.get_paginator("describe_alarms")
+        return [alarm async for page in paginator.paginate(**params) for alarm in page.get("MetricAlarms", [])]
+
+    reconcile_alarms = _in_thread("reconcile_alarms")
+
+    # Logs Management
+    async def create_log_group(self, log_group_name):
+        await self.logs.create_log_group(logGroupName=log_group_name)
+        return f"Log group '{log_group_name}' created successfully."
+
+    async def list_log_groups(self, prefix=None):
+        return [log_group["logGroupName"] async for log_group in self.iter_log_groups(prefix)]
+
+    async def iter_log_groups(self, prefix=None):
+        params = {"logGroupNamePrefix": prefix} if prefix else {}
+        paginator = self.logs.get_paginator("describe_log_groups")
+        async for page in paginator.paginate(**params):
+            for log_group in page.get("logGroups", []):
+                yield log_group
+
+    async def delete_log_group(self, log_group_name):
+        await self.logs.delete_log_group(logGroupName=log_group_name)
+        return f"Log group '{log_group_name}' deleted successfully."
+
+    async def create_log_stream(self, log_group_name, log_stream_name):
+        await self.logs.create_log_stream(logGroupName=log_group_name, logStreamName=log_stream_name)
+        return f"Log stream '{log_stream_name}' created in log group '{log_group_name}'."
+
+    async def put_log_events(self, log_group_name, log_stream_name, messages):
+        now = int(datetime.datetime.now().timestamp() * 1000)
+        events = [msg if isinstance(msg, dict) else {"timestamp": now, "message": msg} for msg in messages]
+        for batch in split_log_batches(events):
+            await self.logs.put_log_events(logGroupName=log_group_name, logStreamName=log_stream_name, logEvents=batch)
+        return f"Published {len(events)} log events to stream '{log_stream_name}'."
+
+    async def get_log_events(self, log_group_name, log_stream_name, start_time=None, end_time=None):
+        return [event async for event in self.iter_log_events(log_group_name, log_stream_name, start_time, end_time)]
+
+    async def iter_log_events(self, log_group_name, log_stream_name, start_time=None, end_time=None):
+        params = {"logGroupName": log_group_name, "logStreamName": log_stream_name, "startFromHead": True}
+        if start_time:
+            params["startTime"] = start_time
+        if end_time:
+            params["endTime"] = end_time
+        while True:
+            response = await self.logs.get_log_events(**params)
+            for event in response.get("events", []):
+                yield event
+            next_token = response.get("nextForwardToken")
+            if not next_token or next_token == params.get("nextToken"):
+                return
+            params["nextToken"] = next_token
+
+    async def iter_filtered_log_events(self, log_group_name, log_stream_names=None, filter_pattern=None,
+                                       start_time=None, end_time=None):
+        params = {"logGroupName": log_group_name}
+        if filter_pattern:
+            params["filterPattern"] = filter_pattern
+        if start_time:
+            params["startTime"] = start_time
+        if end_time:
+            params["endTime"] = end_time
+        if not log_stream_names:
+            streams = [self._iter_filter_pages(params)]
+        else:
+            streams = [self._iter_filter_pages(dict(params, logStreamNames=[name])) for name in log_stream_names]
+        async for event in _merge(streams, key=lambda event: (event["timestamp"], event.get("ingestionTime", 0))):
+            yield event
+
+    async def _iter_filter_pages(self, params):
+        paginator = self.logs.get_paginator("filter_log_events")
+        async for page in paginator.paginate(**params):
+            for event in page.get("events", []):
+                yield event
+
+    tail = _iter_in_thread("tail")
+    run_insights_query = _in_thread("run_insights_query")
+
+    # Dashboard Management
+    async def create_dashboard(self, dashboard_name, dashboard_body):
+        if not isinstance(dashboard_body, str):
+            dashboard_body = canonical_json(dashboard_body)
+        await self.cloudwatch.put_dashboard(DashboardName=dashboard_name, DashboardBody=dashboard_body)
+        return f"Dashboard '{dashboard_name}' created successfully."
+
+    async def delete_dashboard(self, dashboard_name):
+        await self.cloudwatch.delete_dashboards(DashboardNames=[dashboard_name])
+        return f"Dashboard '{dashboard_name}' deleted successfully."
+
+    async def get_dashboard(self, dashboard_name):
+        response = await self.cloudwatch.get_dashboard(DashboardName=dashboard_name)
+        return response.get("DashboardBody", "")
+
+    async def list_dashboards(self, prefix=None):
+        params = {"DashboardNamePrefix": prefix} if prefix else {}
+        paginator = self.cloudwatch.get_paginator("list_dashboards")
+        return [
+            dashboard["DashboardName"]
+            async for page in paginator.paginate(**params)
+            for dashboard in page.get("DashboardEntries", [])
+        ]
+
+    sync_dashboards = _in_thread("sync_dashboards")
+
+
+class AsyncIAM(AsyncAWSManager):
+    sync_class = IAM
+
+    async def open(self):
+        self.iam = await self.create_client("iam")
+        return self
+
+    async def _paginate(self, operation, key, **params):
+        paginator = self.iam.get_paginator(operation)
+        return [item async for page in paginator.paginate(**params) for item in page[key]]
+
+    # User Management
+    async def create_iam_user(self, user_name):
+        await self.iam.create_user(UserName=user_name)
+        return f"IAM user '{user_name}' created successfully."
+
+    async def delete_iam_user(self, user_name):
+        await self.iam.delete_user(UserName=user_name)
+        return f"IAM user '{user_name}' deleted successfully."
+
+    async def list_iam_users(self):
+        return [user["UserName"] for user in await self._paginate("list_users", "Users")]
+
+    # Group Management
+    async def create_group(self, group_name):
+        await self.iam.create_group(GroupName=group_name)
+        return f"IAM group '{group_name}' created successfully."
+
+    async def delete_group(self, group_name):
+        await self.iam.delete_group(GroupName=group_name)
+        return f"IAM group '{group_name}' deleted successfully."
+
+    async def list_groups(self):
+        return [group["GroupName"] for group in await self._paginate("list_groups", "Groups")]
+
+    async def add_user_to_group(self, user_name, group_name):
+        await self.iam.add_user_to_group(UserName=user_name, GroupName=group_name)
+        return f"User '{user_name}' added to group '{group_name}'."
+
+    async def remove_user_from_group(self, user_name, group_name):
+        await self.iam.remove_user_from_group(UserName=user_name, GroupName=group_name)
+        return f"User '{user_name}' removed from group '{group_name}'."
+
+    # Role Management
+    async def create_role(self, role_name, assume_role_policy_document):
+        await self.iam.create_role(RoleName=role_name, AssumeRolePolicyDocument=assume_role_policy_document)
+        return f"IAM role '{role_name}' created successfully."
+
+    async def delete_role(self, role_name):
+        await self.iam.delete_role(RoleName=role_name)
+        return f"IAM role '{role_name}' deleted successfully."
+
+    async def list_roles(self):
+        return [role["RoleName"] for role in await self._paginate("list_roles", "Roles")]
+
+    # Policy Management
+    async def create_policy(self, policy_name, policy_document):
+        response = await self.iam.create_policy(PolicyName=policy_name, PolicyDocument=policy_document)
+        return response["Policy"]["Arn"]
+
+    async def optimize_policy(self, policy_document, collapse_actions=True, keep_sids=False):
+        return optimize_policy_document(policy_document, collapse=collapse_actions, keep_sids=keep_sids)
+
+    async def delete_policy(self, policy_arn):
+        await self.iam.delete_policy(PolicyArn=policy_arn)
+        return f"IAM policy with ARN '{policy_arn}' deleted successfully."
+
+    async def list_policies(self, scope="All"):
+        return [policy["PolicyName"] for policy in await self._paginate("list_policies", "Policies", Scope=scope)]
+
+    async def attach_user_policy(self, user_name, policy_arn):
+        await self.iam.attach_user_policy(UserName=user_name, PolicyArn=policy_arn)
+        return f"Policy '{policy_arn}' attached to user '{user_name}'."
+
+    async def detach_user_policy(self, user_name, policy_arn):
+        await self.iam.detach_user_policy(UserName=user_name, PolicyArn=policy_arn)
+        return f"Policy '{policy_arn}' detached from user '{user_name}'."
+
+    async def attach_role_policy(self, role_name, policy_arn):
+        await self.iam.attach_role_policy(RoleName=role_name, PolicyArn=policy_arn)
+        return f"Policy '{policy_arn}' attached to role '{role_name}'."
+
+    async def detach_role_policy(self, role_name, policy_arn):
+        await self.iam.detach_role_policy(RoleName=role_name, PolicyArn=policy_arn)
+        return f"Policy '{policy_arn}' detached from role '{role_name}'."
+
+    async def attach_group_policy(self, group_name, policy_arn):
+        await self.iam.attach_group_policy(GroupName=group_name, PolicyArn=policy_arn)
+        return f"Policy '{policy_arn}' attached to group '{group_name}'."
+
+    async def detach_group_policy(self, group_name, policy_arn):
+        await self.iam.detach_group_policy(GroupName=group_name, PolicyArn=policy_arn)
+        return f"Policy '{policy_arn}' detached from group '{group_name}'."
+
+    # Inventory and Bulk Operations
+    load_inventory = _in_thread("load_inventory")
+    bulk_create = _in_thread("bulk_create")
+    bulk_delete = _in_thread("bulk_delete")
+
+
+class AsyncCloudFormation(AsyncAWSManager):
+    sync_class = CloudFormation
+
+    async def open(self):
+        self.cloudformation = await self.create_client("cloudformation")
+        return self
+
+    # Template Staging
+    async def use_template_bucket(self, bucket_name, prefix="cloudformation-templates/", storage=None):
+        return self.sync.use_template_bucket(bucket_name, prefix, storage)
+
+    async def _template_args(self, template_body):
+        if isinstance(template_body, dict):
+            template_body = json.dumps(template_body, separators=(",", ":"))
+        if len(template_body.encode("utf-8")) <= TEMPLATE_BODY_LIMIT:
+            return {"TemplateBody": template_body}
+        return {"TemplateURL": await asyncio.to_thread(self.sync.stage_template, template_body)}
+
+    stage_template = _in_thread("stage_template")
+
+    # Stack Management
+    async def create_stack(self, stack_name, template_body, parameters=None, capabilities=None):
+        await self.cloudformation.create_stack(
+            StackName=stack_name,
+            **await self._template_args(template_body),
+            Parameters=parameters or [],
+            Capabilities=capabilities or ["CAPABILITY_NAMED_IAM"],
+        )
+        return f"CloudFormation stack '{stack_name}' creation initiated."
+
+    async def update_stack(self, stack_name, template_body, parameters=None, capabilities=None):
+        await self.cloudformation.update_stack(
+            StackName=stack_name,
+            **await self._template_args(template_body),
+            Parameters=parameters or [],
+            Capabilities=capabilities or ["CAPABILITY_NAMED_IAM"],
+        )
+        return f"CloudFormation stack '{stack_name}' update initiated."
+
+    async def delete_stack(self, stack_name):
+        await self.cloudformation.delete_stack(StackName=stack_name)
+        return f"CloudFormation stack '{stack_name}' deletion initiated."
+
+    deploy_stack = _in_thread("deploy_stack")
+    deploy_stacks = _in_thread("deploy_stacks")
+    wait_for_stacks = _in_thread("wait_for_stacks")
+
+    async def list_stacks(self, status_filter=None):
+        paginator = self.cloudformation.get_paginator("list_stacks")
+        pages = paginator.paginate(StackStatusFilter=status_filter or ["CREATE_COMPLETE", "UPDATE_COMPLETE"])
+        return [stack["StackName"] async for page in pages for stack in page.get("StackSummaries", [])]
+
+    async def describe_stack(self, stack_name):
+        response = await self.cloudformation.describe_stacks(StackName=stack_name)
+        return response["Stacks"][0]
+
+    async def find_stack(self, stack_name):
+        try:
+            return await self.describe_stack(stack_name)
+        except ClientError as e:
+            if "does not exist" in e.response["Error"]["Message"]:
+                return None
+            raise
+
+    async def describe_stack_resources(self, stack_name):
+        response = await self.cloudformation.describe_stack_resources(StackName=stack_name)
+        return response["StackResources"]
+
+    async def list_stack_resources(self, stack_name):
+        paginator = self.cloudformation.get_paginator("list_stack_resources")
+        return [
+            resource async for page in paginator.paginate(StackName=stack_name)
+            for resource in page.get("StackResourceSummaries", [])
+        ]
+
+    build_resource_index = _in_thread("build_resource_index")
+    detect_drift = _in_thread("detect_drift")
+
+    # Template Management
+    async def validate_template(self, template_body):
+        return await self.cloudformation.validate_template(**await self._template_args(template_body))
+
+    async def check_template(self, template_body, confirm=False):
+        try:
+            template = load_template(template_body)
+        except ValueError as e:
+            return {"Valid": False, "Errors": [str(e)], "CreationOrder": []}
+        result = {"Valid": template.valid, "Errors": list(template.errors), "CreationOrder": []}
+        if template.valid:
+            result["CreationOrder"] = template.creation_order()
+            if confirm:
+                response = await self.validate_template(template_body)
+                result["Parameters"] = response.get("Parameters", [])
+                result["Capabilities"] = response.get("Capabilities", [])
+        return result
+
+    async def get_template(self, stack_name):
+        response = await self.cloudformation.get_template(StackName=stack_name)
+        return response["TemplateBody"]
+
+    # Monitoring Stack Events
+    async def describe_stack_events(self, stack_name):
+        paginator = self.cloudformation.get_paginator("describe_stack_events")
+        return [event async for page in paginator.paginate(StackName=stack_name) for event in page["StackEvents"]]
+
+    tail_stack_events = _iter_in_thread("tail_stack_events")
+
+    # Change Set Management
+    async def create_change_set(self, stack_name, template_body, change_set_name, parameters=None, capabilities=None,
+                                change_set_type="UPDATE"):
+        await self.cloudformation.create_change_set(
+            StackName=stack_name,
+            **await self._template_args(template_body),
+            ChangeSetName=change_set_name,
+            Parameters=parameters or [],
+            Capabilities=capabilities or ["CAPABILITY_NAMED_IAM"],
+            ChangeSetType=change_set_type,
+        )
+        return f"Change set '{change_set_name}' creation initiated for stack '{stack_name}'."
+
+    async def describe_change_set(self, change_set_name, stack_name):
+        params = {"ChangeSetName": change_set_name, "StackName": stack_name}
+        response = await self.cloudformation.describe_change_set(**params)
+        changes = list(response.get("Changes", []))
+        while response.get("NextToken"):
+            response = await self.cloudformation.describe_change_set(NextToken=response["NextToken"], **params)
+            changes.extend(response.get("Changes", []))
+        response["Changes"] = changes
+        response.pop("NextToken", None)
+        return response
+
+    async def wait_for_change_set(self, change_set_name, stack_name, poll_interval=2.0, timeout=600):
+        deadline = time.monotonic() + timeout
+        while True:
+            response = await self.cloudformation.describe_change_set(ChangeSetName=change_set_name, StackName=stack_name)
+            if response["Status"] in ("CREATE_COMPLETE", "FAILED"):
+                if response.get("NextToken"):
+                    return await self.describe_change_set(change_set_name, stack_name)
+                return response
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Change set '{change_set_name}' is still {response['Status']} after {timeout}s.")
+            await asyncio.sleep(poll_interval)
+
+    async def delete_change_set(self, change_set_name, stack_name):
+        await self.cloudformation.delete_change_set(ChangeSetName=change_set_name, StackName=stack_name)
+        return f"Change set '{change_set_name}' deleted from stack '{stack_name}'."
+
+    async def execute_change_set(self, change_set_name, stack_name):
+        await self.cloudformation.execute_change_set(ChangeSetName=change_set_name, StackName=stack_name)
+        return f"Change set '{change_set_name}' executed for stack '{stack_name}'."
+
+    # Stack Policy Management
+    async def set_stack_policy(self, stack_name, policy_body):
+        await self.cloudformation.set_stack_policy(StackName=stack_name, StackPolicyBody=policy_body)
+        return f"Stack policy set for stack '{stack_name}'."
+
+    async def get_stack_policy(self, stack_name):
+        response = await self.cloudformation.get_stack_policy(StackName=stack_name)
+        return response["StackPolicyBody"]
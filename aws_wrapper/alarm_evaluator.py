@@ -0,0 +1,139 @@
+import datetime
+import math
+from itertools import accumulate
+
+from aws_wrapper.metric_cache import MetricCache, _to_epoch
+
+OK = "OK"
+ALARM = "ALARM"
+INSUFFICIENT_DATA = "INSUFFICIENT_DATA"
+
+COMPARISON_OPERATORS = {
+    "GreaterThanThreshold": lambda value, threshold: value > threshold,
+    "GreaterThanOrEqualToThreshold": lambda value, threshold: value >= threshold,
+    "LessThanThreshold": lambda value, threshold: value < threshold,
+    "LessThanOrEqualToThreshold": lambda value, threshold: value <= threshold,
+}
+
+
+class AlarmEvaluator:
+    """
+    Replays alarm definitions over historical datapoints without creating alarms.
+
+    Alarms use the same parameters as ``CloudWatch.create_alarm`` (plus the optional
+    ``datapoints_to_alarm`` and ``treat_missing_data``). Datapoints are pulled in bulk
+    through a MetricCache, so alarms sharing a metric, statistic and period are
+    fetched once and repeated backtests reuse the cached history.
+    """
+
+    def __init__(self, cloudwatch, metric_cache=None):
+        """
+        :param cloudwatch: CloudWatch wrapper used to fetch datapoints.
+        :param metric_cache: MetricCache to read through (optional; one is created if omitted).
+        """
+        self.cloudwatch = cloudwatch
+        self.metric_cache = metric_cache or MetricCache(cloudwatch)
+
+    def evaluate(self, alarm, start_time, end_time):
+        """
+        Backtests one alarm definition.
+        :param alarm: Alarm dict using the create_alarm parameter names.
+        :param start_time: Start of the replay (datetime or epoch seconds).
+        :param end_time: End of the replay (datetime or epoch seconds).
+        :return: List of state transitions, each a dict with "Timestamp", "OldState",
+            "NewState" and "Value" (the datapoint of the period that caused it).
+        """
+        return self.evaluate_many([alarm], start_time, end_time)[alarm["alarm_name"]]
+
+    def evaluate_many(self, alarms, start_time, end_time):
+        """
+        Backtests many alarm definitions, fetching each distinct series only once.
+        :return: Dictionary mapping alarm name to its list of state transitions.
+        """
+        start, end = _to_epoch(start_time), _to_epoch(end_time)
+        warmup = max(alarm["evaluation_periods"] * alarm["period"] for alarm in alarms)
+        series = {}
+        results = {}
+        for alarm in alarms:
+            key = MetricCache._key(
+                alarm["namespace"], alarm["metric_name"], alarm.get("dimensions"), alarm["statistic"], alarm["period"]
+            )
+            if key not in series:
+                series[key] = self.metric_cache.get_metric_statistics(
+                    alarm["namespace"],
+                    alarm["metric_name"],
+                    start - warmup,
+                    end,
+                    alarm["period"],
+                    alarm["statistic"],
+                    dimensions=alarm.get("dimensions"),
+                )
+            timestamps, values = series[key]
+            results[alarm["alarm_name"]] = replay_alarm(alarm, timestamps, values, start, end)
+        return results
+
+
+def replay_alarm(alarm, timestamps, values, start, end):
+    """
+    Evaluates an alarm over a datapoint series.
+    Datapoints are laid on a fixed period grid and breach and missing counts for
+    every evaluation window come from prefix sums, so the whole replay is a few
+    linear passes over the series regardless of the number of evaluation periods.
+    :param alarm: Alarm dict using the create_alarm parameter names.
+    :param timestamps: Datapoint timestamps in epoch seconds.
+    :param values: Datapoint values aligned with ``timestamps``.
+    :param start: Epoch seconds of the first evaluated period; earlier datapoints only fill its window.
+    :param end: Epoch seconds at which the replay stops.
+    :return: List of state transitions.
+    """
+    compare = COMPARISON_OPERATORS.get(alarm["comparison_operator"])
+    if compare is None:
+        raise ValueError(f"Unsupported comparison operator '{alarm['comparison_operator']}'.")
+    period = alarm["period"]
+    evaluation_periods = alarm["evaluation_periods"]
+    datapoints_to_alarm = alarm.get("datapoints_to_alarm") or evaluation_periods
+    treat_missing_data = alarm.get("treat_missing_data") or "missing"
+    threshold = alarm["threshold"]
+
+    origin = (start // period) * period - (evaluation_periods - 1) * period
+    size = max(0, int(math.ceil((end - origin) / period)))
+    grid = [math.nan] * size
+    for ts, value in zip(timestamps, values):
+        slot = int((ts - origin) // period)
+        if 0 <= slot < size:
+            grid[slot] = value
+
+    missing = [value != value for value in grid]
+    breaching = [not is_missing and compare(value, threshold) for value, is_missing in zip(grid, missing)]
+    if treat_missing_data == "breaching":
+        breaching = [b or m for b, m in zip(breaching, missing)]
+        missing = [False] * size
+    elif treat_missing_data == "notBreaching":
+        missing = [False] * size
+
+    breach_sums = [0, *accumulate(breaching)]
+    missing_sums = [0, *accumulate(missing)]
+
+    transitions = []
+    state = INSUFFICIENT_DATA
+    for slot in range(evaluation_periods - 1, size):
+        lo = slot + 1 - evaluation_periods
+        breaches = breach_sums[slot + 1] - breach_sums[lo]
+        gaps = missing_sums[slot + 1] - missing_sums[lo]
+        if breaches >= datapoints_to_alarm:
+            new_state = ALARM
+        elif gaps == evaluation_periods:
+            new_state = state if treat_missing_data == "ignore" else INSUFFICIENT_DATA
+        elif treat_missing_data == "ignore" and missing[slot]:
+            new_state = state
+        else:
+            new_state = OK
+        if new_state != state:
+            transitions.append({
+                "Timestamp": datetime.datetime.fromtimestamp(origin + slot * period, tz=datetime.timezone.utc),
+                "OldState": state,
+                "NewState": new_state,
+                "Value": None if grid[slot] != grid[slot] else grid[slot],
+            })
+            state = new_state
+    return transitions
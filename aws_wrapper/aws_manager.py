@@ -1,3 +1,53 @@
+import boto3
+
+from aws_wrapper.credentials import default_cache
+from aws_wrapper.instrumentation import track_client
+from aws_wrapper.retry import default_controller
+
+
 class AWSManager:
-    def __init__(self, region="us-east-1"):
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        """
+        :param region: AWS region.
+        :param role_arn: Role to assume for every call (optional; default credentials otherwise).
+        :param session_policy: Session policy that further limits the assumed role (optional).
+        :param credential_cache: RoleSessionCache to take role credentials from
+            (defaults to the process-wide cache).
+        :param retry_controller: RetryController that retries and rate-limits every
+            call (defaults to the process-wide controller; False keeps botocore's own retries).
+        """
         self.region = region
+        self.role_arn = role_arn
+        self.session_policy = session_policy
+        self.credential_cache = credential_cache
+        self.retry_controller = retry_controller
+
+    def _attach(self, client):
+        track_client(client)
+        if self.retry_controller is False:
+            return client
+        return (self.retry_controller or default_controller()).attach(client)
+
+    def create_client(self, service_name):
+        """
+        Creates a boto3 client for the service, signed with cached role credentials
+        when a role ARN was given and retried through the retry controller.
+        """
+        if self.role_arn is None:
+            return self._attach(boto3.client(service_name, region_name=self.region))
+        cache = self.credential_cache or default_cache()
+        return self._attach(
+            cache.client(service_name, self.role_arn, region=self.region, session_policy=self.session_policy)
+        )
+
+    def create_resource(self, service_name):
+        """
+        Creates a boto3 resource for the service, like create_client().
+        """
+        if self.role_arn is None:
+            resource = boto3.resource(service_name, region_name=self.region)
+        else:
+            cache = self.credential_cache or default_cache()
+            resource = cache.resource(service_name, self.role_arn, region=self.region, session_policy=self.session_policy)
+        self._attach(resource.meta.client)
+        return resource
@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.concurrency import RateLimiter
+
+# Returned by a worker whose operation was cancelled before it started.
+_CANCELLED = object()
+
+# Returned by next() once the input is used up.
+_EXHAUSTED = object()
+
+
+class Operation:
+    """
+    One call for a BatchExecutor: ``function(*args, **kwargs)``.
+    """
+
+    __slots__ = ("function", "args", "kwargs", "key", "service")
+
+    def __init__(self, function, args=(), kwargs=None, key=None, service=None):
+        """
+        :param function: Callable to run, usually a wrapper method such as ``storage.upload_file``.
+        :param args: Positional arguments.
+        :param kwargs: Keyword arguments (optional).
+        :param key: Identifies the operation in results (defaults to its position in the input).
+        :param service: Name used to pick the rate limit (defaults to the wrapper class name,
+            e.g. "Storage", for wrapper methods).
+        """
+        self.function = function
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+        self.key = key
+        self.service = service if service is not None else _service_of(function)
+
+
+def _service_of(function):
+    owner = getattr(function, "__self__", None)
+    return type(owner).__name__ if isinstance(owner, AWSManager) else None
+
+
+def _as_operation(item, index):
+    if not isinstance(item, Operation):
+        # A bare callable, or a (callable, *args) tuple.
+        function, *args = item if isinstance(item, tuple) else (item,)
+        item = Operation(function, args)
+    if item.key is None:
+        item.key = index
+    return item
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the nearest-rank percentile of an already sorted list, or None if it is empty.
+    :param fraction: Percentile as a fraction, e.g. 0.99.
+    """
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies):
+    """
+    Summarizes latencies in seconds as {"p50", "p90", "p99", "max", "mean"}.
+    """
+    values = sorted(latencies)
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    return {
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p99": percentile(values, 0.99),
+        "max": values[-1],
+        "mean": sum(values) / len(values),
+    }
+
+
+class BatchExecutor:
+    """
+    Runs many single-item wrapper calls concurrently.
+
+    Operations are read from the input iterable only as workers free up, so
+    generators of millions of items can be fed in without being materialized.
+    Each service can be given its own rate limit, results are streamed back in
+    completion order, and a batch can be cancelled at any point.
+    """
+
+    def __init__(self, max_workers=16, rate_limits=None, max_pending=None, stop_on_error=False):
+        """
+        :param max_workers: Maximum number of operations running at once.
+        :param rate_limits: Dictionary mapping service name to calls per second or to
+            a RateLimiter (optional). Operations of other services are not limited.
+        :param max_pending: Maximum number of operations submitted but not finished,
+            and separately of operations held back by their service's rate limit
+            (defaults to twice ``max_workers``).
+        :param stop_on_error: Cancel the rest of the batch after the first failure.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        self.rate_limits = {
+            service: limit if isinstance(limit, RateLimiter) else RateLimiter(limit)
+            for service, limit in (rate_limits or {}).items()
+        }
+        self.stop_on_error = stop_on_error
+        self._cancelled = threading.Event()
+        self._latencies = {}
+        self._counts = {}
+        self._started = None
+        self._finished = None
+
+    def cancel(self):
+        """
+        Stops the running batch: no more operations are read from the input, those
+        not yet started are reported as cancelled, and running ones are left to finish.
+        """
+        self._cancelled.set()
+        return "Batch cancelled."
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _call(self, operation):
+        if self._cancelled.is_set():
+            return _CANCELLED, 0.0
+        start = time.perf_counter()
+        try:
+            result = operation.function(*operation.args, **operation.kwargs)
+        except Exception as e:
+            e.batch_latency = time.perf_counter() - start
+            raise
+        return result, time.perf_counter() - start
+
+    def _outcome(self, operation, future=None):
+        outcome = {"key": operation.key, "service": operation.service}
+        if future is None or future.cancelled():
+            outcome["status"] = "cancelled"
+        elif future.exception() is not None:
+            error = future.exception()
+            outcome.update(status="failed", error=error, latency=getattr(error, "batch_latency", None))
+        else:
+            result, latency = future.result()
+            if result is _CANCELLED:
+                outcome["status"] = "cancelled"
+            else:
+                outcome.update(status="succeeded", result=result, latency=latency)
+
+        counts = self._counts.setdefault(operation.service, {"succeeded": 0, "failed": 0, "cancelled": 0})
+        counts[outcome["status"]] += 1
+        if outcome.get("latency") is not None:
+            self._latencies.setdefault(operation.service, []).append(outcome["latency"])
+        if outcome["status"] == "failed" and self.stop_on_error:
+            self._cancelled.set()
+        return outcome
+
+    def stream(self, operations):
+        """
+        Runs operations and yields their outcomes as they complete.
+        :param operations: Iterable of Operation objects, callables or (callable, *args) tuples.
+        :return: Generator of {"key", "service", "status": "succeeded" | "failed" | "cancelled",
+            "result" or "error", "latency"} dictionaries, latency in seconds.
+        """
+        self._cancelled.clear()
+        self._latencies, self._counts = {}, {}
+        self._started, self._finished = time.perf_counter(), None
+        source = iter(operations)
+        exhausted = False
+        index = 0
+        running = {}
+        # Operations waiting for a token from their service's rate limiter. They
+        # are submitted only once one is available, so no worker ever sleeps on a
+        # limiter and a slow service cannot occupy the pool.
+        held = {service: deque() for service in self.rate_limits}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def submit(operation):
+            running[executor.submit(self._call, operation)] = operation
+
+        try:
+            while True:
+                if not self._cancelled.is_set():
+                    for service, queue in held.items():
+                        limiter = self.rate_limits[service]
+                        while queue and len(running) < self.max_pending and limiter.try_acquire():
+                            submit(queue.popleft())
+                    while not exhausted and len(running) < self.max_pending:
+                        if sum(len(queue) for queue in held.values()) >= self.max_pending:
+                            break
+                        item = next(source, _EXHAUSTED)
+                        if item is _EXHAUSTED:
+                            exhausted = True
+                            break
+                        operation = _as_operation(item, index)
+                        index += 1
+                        limiter = self.rate_limits.get(operation.service)
+                        if limiter is None or (not held[operation.service] and limiter.try_acquire()):
+                            submit(operation)
+                        else:
+                            held[operation.service].append(operation)
+                if self._cancelled.is_set():
+                    for future in running:
+                        future.cancel()
+                    for queue in held.values():
+                        while queue:
+                            yield self._outcome(queue.popleft())
+                waiting = [self.rate_limits[service].wait_time() for service, queue in held.items() if queue]
+                if not running:
+                    if not waiting:
+                        break
+                    # Nothing is running: sleep until the next token, unless cancelled.
+                    self._cancelled.wait(min(waiting))
+                    continue
+                done, _ = wait(running, timeout=min(waiting) if waiting else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._outcome(running.pop(future), future)
+        finally:
+            # Also reached when the caller stops iterating early.
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._finished = time.perf_counter()
+
+    def run(self, operations):
+        """
+        Runs operations to completion.
+        :return: {"results": {key: result}, "errors": {key: message}, "cancelled": [keys],
+            "summary": summary()}.
+        """
+        report = {"results": {}, "errors": {}, "cancelled": []}
+        for outcome in self.stream(operations):
+            if outcome["status"] == "succeeded":
+                report["results"][outcome["key"]] = outcome["result"]
+            elif outcome["status"] == "failed":
+                report["errors"][outcome["key"]] = str(outcome["error"])
+            else:
+                report["cancelled"].append(outcome["key"])
+        report["summary"] = self.summary()
+        return report
+
+    def summary(self):
+        """
+        Summarizes the last batch: outcome counts, elapsed seconds, throughput and
+        latency percentiles, overall and per service.
+        """
+        if self._started is None:
+            return {}
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        totals = {"succeeded": 0, "failed": 0, "cancelled": 0}
+        services = {}
+        for service, counts in self._counts.items():
+            for status, count in counts.items():
+                totals[status] += count
+            services[service] = {**counts, "latency": latency_summary(self._latencies.get(service, []))}
+        completed = totals["succeeded"] + totals["failed"]
+        return {
+            **totals,
+            "elapsed": elapsed,
+            "ops_per_second": completed / elapsed if elapsed > 0 else 0.0,
+            "latency": latency_summary([latency for values in self._latencies.values() for latency in values]),
+            "services": services,
+        }
+
+
+def run_batch(operations, max_workers=16, rate_limits=None, stop_on_error=False):
+    """
+    Runs operations with a new BatchExecutor and returns its report; see BatchExecutor.run().
+    """
+    return BatchExecutor(max_workers, rate_limits, stop_on_error=stop_on_error).run(operations)
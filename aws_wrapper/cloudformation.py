@@ -1,15 +1,86 @@
-import boto3
+import hashlib
 import json
+import time
 
+from botocore.exceptions import ClientError
+from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.instrumentation import instrumented
+from aws_wrapper.stack_events import StackEventTailer
+from aws_wrapper.stack_index import StackResourceIndex
+from aws_wrapper.stack_orchestrator import StackOrchestrator
+from aws_wrapper.stack_waiter import StackDeploymentError, StackWaiter
+from aws_wrapper.storage import Storage
+from aws_wrapper.template import load_template
+from aws_wrapper.template_hash import StackHashCache, deployment_hash, parameter_dict
 
-class CloudFormation:
-    def __init__(self, region="us-east-1"):
-        self.cloudformation = boto3.client("cloudformation", region_name=region)
+# Largest template CloudFormation accepts inline as TemplateBody, in bytes.
+TEMPLATE_BODY_LIMIT = 51_200
+
+NO_CHANGES_REASONS = ("didn't contain changes", "No updates are to be performed")
+
+
+@instrumented
+class CloudFormation(AWSManager):
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.cloudformation = self.create_client("cloudformation")
+        self.template_hashes = StackHashCache()
+        self.template_bucket = None
+        self.template_prefix = "cloudformation-templates/"
+        self.storage = None
+        self._staged_templates = set()
+
+    # Template Staging
+    def use_template_bucket(self, bucket_name, prefix="cloudformation-templates/", storage=None):
+        """
+        Stages templates larger than the inline limit in an S3 bucket.
+        :param bucket_name: Bucket to upload templates to.
+        :param prefix: Key prefix for staged templates.
+        :param storage: Storage wrapper to upload through (optional; created with
+            this wrapper's region and credentials otherwise).
+        """
+        self.template_bucket = bucket_name
+        self.template_prefix = prefix
+        self.storage = storage or Storage(
+            self.region, self.role_arn, self.session_policy, self.credential_cache, self.retry_controller
+        )
+        return f"Templates over {TEMPLATE_BODY_LIMIT} bytes will be staged in bucket '{bucket_name}'."
+
+    def _template_args(self, template_body):
+        """
+        Returns {"TemplateBody": ...} for templates within the inline limit and
+        {"TemplateURL": ...} for larger ones, staging them in S3 first.
+        """
+        if isinstance(template_body, dict):
+            template_body = json.dumps(template_body, separators=(",", ":"))
+        if len(template_body.encode("utf-8")) <= TEMPLATE_BODY_LIMIT:
+            return {"TemplateBody": template_body}
+        return {"TemplateURL": self.stage_template(template_body)}
+
+    def stage_template(self, template_body):
+        """
+        Uploads a template to the staging bucket under a key derived from its
+        SHA-256, skipping the upload when that key already exists.
+        :return: The template's S3 URL.
+        """
+        if self.template_bucket is None:
+            raise ValueError(
+                f"Template is larger than {TEMPLATE_BODY_LIMIT} bytes; call use_template_bucket() to stage it in S3."
+            )
+        body = template_body.encode("utf-8")
+        extension = "json" if template_body.lstrip().startswith("{") else "yaml"
+        key = f"{self.template_prefix}{hashlib.sha256(body).hexdigest()}.{extension}"
+        if key not in self._staged_templates:
+            if not self.storage.object_exists(self.template_bucket, key):
+                self.storage.upload_file(self.template_bucket, key, body)
+            self._staged_templates.add(key)
+        return f"https://{self.template_bucket}.s3.{self.region}.amazonaws.com/{key}"
 
     # Stack Management
     def create_stack(self, stack_name, template_body, parameters=None, capabilities=None):
         """
         Creates a new CloudFormation stack.
+        Templates over 51,200 bytes are staged in S3 (see use_template_bucket).
         """
         if parameters is None:
             parameters = []
@@ -18,7 +89,7 @@ class CloudFormation:
 
         self.cloudformation.create_stack(
             StackName=stack_name,
-            TemplateBody=template_body,
+            **self._template_args(template_body),
             Parameters=parameters,
             Capabilities=capabilities,
         )
@@ -27,6 +98,7 @@ class CloudFormation:
     def update_stack(self, stack_name, template_body, parameters=None, capabilities=None):
         """
         Updates an existing CloudFormation stack.
+        Templates over 51,200 bytes are staged in S3 (see use_template_bucket).
         """
         if parameters is None:
             parameters = []
@@ -35,7 +107,7 @@ class CloudFormation:
 
         self.cloudformation.update_stack(
             StackName=stack_name,
-            TemplateBody=template_body,
+            **self._template_args(template_body),
             Parameters=parameters,
             Capabilities=capabilities,
         )
@@ -48,12 +120,146 @@ class CloudFormation:
         self.cloudformation.delete_stack(StackName=stack_name)
         return f"CloudFormation stack '{stack_name}' deletion initiated."
 
+    def deploy_stack(self, stack_name, template_body, parameters=None, capabilities=None, wait=True, waiter=None,
+                     poll_interval=5.0):
+        """
+        Creates or updates a stack only if its template or parameters changed.
+
+        The hash of the normalized template, parameters and capabilities is compared with the
+        one recorded for the stack's last successful deployment; a match returns
+        without any API call. With nothing recorded, the deployed template and
+        parameters are fetched once and compared instead. Changes to an existing
+        stack go through a change set, which is discarded if CloudFormation finds
+        nothing to do; new stacks are created directly.
+        :param stack_name: Name of the stack.
+        :param template_body: Template as a JSON/YAML string or a dict.
+        :param parameters: Parameters as a dict or a list of ParameterKey/ParameterValue entries.
+        :param capabilities: Capabilities (defaults to ["CAPABILITY_NAMED_IAM"]).
+        :param wait: Wait for the stack operation to finish and record the new hash.
+        :param waiter: StackWaiter to wait with, shared between deployments (optional).
+        :param poll_interval: Seconds between status polls.
+        :return: Dictionary with "stack_name", "action" ("skipped", "unchanged",
+            "created" or "updated"), "change_set_name", "changes" and "stack_status".
+        """
+        if isinstance(template_body, dict):
+            template_body = json.dumps(template_body)
+        params = parameter_dict(parameters)
+        digest = deployment_hash(template_body, params, capabilities)
+        result = {"stack_name": stack_name, "action": "skipped", "change_set_name": None, "changes": [], "stack_status": None}
+        if self.template_hashes.get(stack_name) == digest:
+            return result
+
+        stack = self.find_stack(stack_name)
+        if stack is None:
+            # Deleted outside this wrapper: whatever was recorded no longer applies.
+            self.template_hashes.discard(stack_name)
+        exists = stack is not None and stack["StackStatus"] != "REVIEW_IN_PROGRESS"
+        if exists and self.template_hashes.get(stack_name) is None and self._deployed_matches(stack, template_body, params):
+            self.template_hashes.set(stack_name, digest)
+            return {**result, "action": "unchanged", "stack_status": stack["StackStatus"]}
+
+        parameter_list = [{"ParameterKey": key, "ParameterValue": value} for key, value in params.items()]
+        if stack is None:
+            # A new stack has nothing to diff against, so skip the change set round trips.
+            self.create_stack(stack_name, template_body, parameter_list, capabilities)
+            result["action"] = "created"
+        else:
+            change_set_name = f"deploy-{digest[:16]}-{int(time.time())}"
+            self.create_change_set(stack_name, template_body, change_set_name, parameter_list, capabilities,
+                                   change_set_type="UPDATE" if exists else "CREATE")
+            change_set = self.wait_for_change_set(change_set_name, stack_name)
+            if change_set["Status"] == "FAILED":
+                reason = change_set.get("StatusReason") or ""
+                if exists and any(text in reason for text in NO_CHANGES_REASONS):
+                    self.delete_change_set(change_set_name, stack_name)
+                    self.template_hashes.set(stack_name, digest)
+                    return {**result, "action": "unchanged", "stack_status": stack["StackStatus"]}
+                raise StackDeploymentError(f"Change set for stack '{stack_name}' failed: {reason}")
+            self.execute_change_set(change_set_name, stack_name)
+            result.update(
+                action="updated" if exists else "created",
+                change_set_name=change_set_name,
+                changes=change_set.get("Changes", []),
+            )
+
+        if not (wait or waiter):
+            self.template_hashes.discard(stack_name)
+            return result
+
+        own_waiter = waiter is None
+        waiter = waiter or StackWaiter(self, poll_interval=poll_interval)
+        try:
+            final = waiter.watch(stack_name).result()
+        finally:
+            if own_waiter:
+                waiter.close()
+        result["stack_status"] = final["StackStatus"]
+        if not final["Succeeded"]:
+            self.template_hashes.discard(stack_name)
+            raise StackDeploymentError(f"Stack '{stack_name}' ended in {final['StackStatus']}: {final.get('StackStatusReason')}")
+        self.template_hashes.set(stack_name, digest)
+        return result
+
+    def _deployed_matches(self, stack, template_body, params):
+        """
+        Compares a requested deployment with what the stack is running. Deployed
+        parameters that were not passed must still equal their template defaults.
+        """
+        deployed_template = self.get_template(stack["StackName"])
+        if deployment_hash(deployed_template) != deployment_hash(template_body):
+            return False
+        deployed = parameter_dict(stack.get("Parameters"))
+        try:
+            declared = json.loads(template_body).get("Parameters", {})
+        except ValueError:
+            declared = {}
+        for key, value in deployed.items():
+            expected = params.get(key, declared.get(key, {}).get("Default"))
+            if expected is None or str(expected) != value:
+                return False
+        return set(params) <= set(deployed)
+
+    def wait_for_stacks(self, stack_names, timeout=None, on_event=None, poll_interval=5.0):
+        """
+        Waits until every stack's create, update or delete operation finishes.
+        All stacks are polled together (see StackWaiter), so waiting on many
+        deployments costs about one list_stacks call per poll.
+        :param stack_names: Stack names or IDs.
+        :param timeout: Maximum seconds to wait (optional).
+        :param on_event: Callback(stack_name, event) for new stack events, oldest first (optional).
+        :param poll_interval: Seconds between polls.
+        :return: Dictionary mapping stack name to {"StackStatus", "StackStatusReason",
+            "Succeeded", ...}.
+        """
+        waiter = StackWaiter(self, poll_interval=poll_interval, on_event=on_event)
+        try:
+            return waiter.wait(stack_names, timeout=timeout)
+        finally:
+            waiter.close()
+
+    def deploy_stacks(self, stacks, max_concurrency=8, poll_interval=5.0, on_event=None):
+        """
+        Creates or updates a set of interdependent stacks, deploying independent
+        stacks concurrently and feeding outputs into dependent stacks' parameters.
+        Dependencies are taken from "depends_on", StackOutput parameter values and
+        Fn::ImportValue references; stacks downstream of a failure are skipped.
+        :param stacks: List of {"name", "template", "parameters", "depends_on",
+            "capabilities"} definitions (see StackOrchestrator.deploy).
+        :param max_concurrency: Maximum number of stacks deploying at once.
+        :param poll_interval: Seconds between status polls.
+        :param on_event: Callback(stack_name, event) for stack events (optional).
+        :return: Dictionary mapping stack name to its deployment result.
+        """
+        orchestrator = StackOrchestrator(self, max_concurrency=max_concurrency, poll_interval=poll_interval, on_event=on_event)
+        return orchestrator.deploy(stacks)
+
     def list_stacks(self, status_filter=None):
         """
-        Lists all CloudFormation stacks.
+        Lists all CloudFormation stacks, across all pages.
         """
-        response = self.cloudformation.list_stacks(StackStatusFilter=status_filter or ["CREATE_COMPLETE", "UPDATE_COMPLETE"])
-        return [stack["StackName"] for stack in response.get("StackSummaries", [])]
+        paginator = self.cloudformation.get_paginator("list_stacks")
+        pages = paginator.paginate(StackStatusFilter=status_filter or ["CREATE_COMPLETE", "UPDATE_COMPLETE"])
+        return [stack["StackName"] for page in pages for stack in page.get("StackSummaries", [])]
 
     def describe_stack(self, stack_name):
         """
@@ -62,6 +268,17 @@ class CloudFormation:
         response = self.cloudformation.describe_stacks(StackName=stack_name)
         return response["Stacks"][0]
 
+    def find_stack(self, stack_name):
+        """
+        Describes a CloudFormation stack, or returns None if it does not exist.
+        """
+        try:
+            return self.describe_stack(stack_name)
+        except ClientError as e:
+            if "does not exist" in e.response["Error"]["Message"]:
+                return None
+            raise
+
     def describe_stack_resources(self, stack_name):
         """
         Retrieves the resources of a CloudFormation stack.
@@ -69,14 +286,69 @@ class CloudFormation:
         response = self.cloudformation.describe_stack_resources(StackName=stack_name)
         return response["StackResources"]
 
+    def list_stack_resources(self, stack_name):
+        """
+        Lists the resource summaries of a CloudFormation stack, across all pages.
+        """
+        paginator = self.cloudformation.get_paginator("list_stack_resources")
+        return [
+            resource for page in paginator.paginate(StackName=stack_name)
+            for resource in page.get("StackResourceSummaries", [])
+        ]
+
+    def build_resource_index(self, max_workers=8, rate_limiter=None):
+        """
+        Loads the resources of every live stack into a StackResourceIndex, several
+        stacks at a time. Call refresh() on the index later to pick up only the
+        stacks that changed.
+        :param max_workers: Maximum number of stacks loaded at once.
+        :param rate_limiter: RateLimiter acquired before each stack is loaded (optional).
+        """
+        index = StackResourceIndex(self, max_workers=max_workers, rate_limiter=rate_limiter)
+        index.refresh()
+        return index
+
+    def detect_drift(self, stack_names, max_workers=8, poll_interval=2.0):
+        """
+        Runs drift detection on several stacks in parallel.
+        :return: Dictionary mapping stack name to {"StackDriftStatus",
+            "DriftedResources"} or {"error"}.
+        """
+        index = StackResourceIndex(self, max_workers=max_workers)
+        return index.detect_drift(stack_names, poll_interval=poll_interval)
+
     # Template Management
     def validate_template(self, template_body):
         """
         Validates a CloudFormation template.
+        Templates over 51,200 bytes are staged in S3 (see use_template_bucket).
         """
-        response = self.cloudformation.validate_template(TemplateBody=template_body)
+        response = self.cloudformation.validate_template(**self._template_args(template_body))
         return response
 
+    def check_template(self, template_body, confirm=False):
+        """
+        Validates a template offline: parses it (cached by content hash), checks
+        references, Fn::GetAtt targets, conditions, mappings and parameter defaults,
+        and orders its resources by dependency.
+        :param template_body: Template as a JSON or YAML string, or a dictionary.
+        :param confirm: Also call validate_template when the offline checks pass.
+        :return: Dictionary with "Valid", "Errors", "CreationOrder" (waves of logical
+            IDs) and, when confirmed, the API's "Parameters" and "Capabilities".
+        """
+        try:
+            template = load_template(template_body)
+        except ValueError as e:
+            return {"Valid": False, "Errors": [str(e)], "CreationOrder": []}
+        result = {"Valid": template.valid, "Errors": list(template.errors), "CreationOrder": []}
+        if template.valid:
+            result["CreationOrder"] = template.creation_order()
+            if confirm:
+                response = self.validate_template(template_body)
+                result["Parameters"] = response.get("Parameters", [])
+                result["Capabilities"] = response.get("Capabilities", [])
+        return result
+
     def get_template(self, stack_name):
         """
         Retrieves the template body of an existing stack.
@@ -87,15 +359,34 @@ class CloudFormation:
     # Monitoring Stack Events
     def describe_stack_events(self, stack_name):
         """
-        Describes the events of a CloudFormation stack.
+        Describes the events of a CloudFormation stack, newest first, across all pages.
         """
-        response = self.cloudformation.describe_stack_events(StackName=stack_name)
-        return response["StackEvents"]
+        paginator = self.cloudformation.get_paginator("describe_stack_events")
+        return [event for page in paginator.paginate(StackName=stack_name) for event in page["StackEvents"]]
+
+    def tail_stack_events(self, stack_name, follow_nested=False, from_operation=True, poll_interval=5.0,
+                          until_complete=True, stop_event=None):
+        """
+        Follows a stack's events, yielding each new event once, oldest first. Every
+        poll reads only the pages newer than the last event seen.
+        :param stack_name: Stack name or ID.
+        :param follow_nested: Also yield events of nested stacks.
+        :param from_operation: Start at the most recent user-initiated operation
+            rather than the beginning of the stack's history.
+        :param poll_interval: Seconds between polls.
+        :param until_complete: Stop once the stack reaches a terminal status.
+        :param stop_event: threading.Event that ends the tail when set (optional).
+        """
+        tailer = StackEventTailer(self, stack_name, follow_nested=follow_nested, from_operation=from_operation)
+        yield from tailer.tail(poll_interval=poll_interval, until_complete=until_complete, stop_event=stop_event)
 
     # Change Set Management
-    def create_change_set(self, stack_name, template_body, change_set_name, parameters=None, capabilities=None):
+    def create_change_set(self, stack_name, template_body, change_set_name, parameters=None, capabilities=None,
+                          change_set_type="UPDATE"):
         """
         Creates a change set for a CloudFormation stack.
+        Templates over 51,200 bytes are staged in S3 (see use_template_bucket).
+        :param change_set_type: "UPDATE" for an existing stack, "CREATE" for a new one.
         """
         if parameters is None:
             parameters = []
@@ -104,23 +395,49 @@ class CloudFormation:
 
         self.cloudformation.create_change_set(
             StackName=stack_name,
-            TemplateBody=template_body,
+            **self._template_args(template_body),
             ChangeSetName=change_set_name,
             Parameters=parameters,
             Capabilities=capabilities,
+            ChangeSetType=change_set_type,
         )
         return f"Change set '{change_set_name}' creation initiated for stack '{stack_name}'."
 
     def describe_change_set(self, change_set_name, stack_name):
         """
-        Describes a change set.
+        Describes a change set, with the changes from every page merged into "Changes".
         """
-        response = self.cloudformation.describe_change_set(
-            ChangeSetName=change_set_name,
-            StackName=stack_name,
-        )
+        params = {"ChangeSetName": change_set_name, "StackName": stack_name}
+        response = self.cloudformation.describe_change_set(**params)
+        changes = list(response.get("Changes", []))
+        while response.get("NextToken"):
+            response = self.cloudformation.describe_change_set(NextToken=response["NextToken"], **params)
+            changes.extend(response.get("Changes", []))
+        response["Changes"] = changes
+        response.pop("NextToken", None)
         return response
 
+    def wait_for_change_set(self, change_set_name, stack_name, poll_interval=2.0, timeout=600):
+        """
+        Polls a change set until it has been computed.
+        :return: The final describe_change_set response (Status "CREATE_COMPLETE" or "FAILED").
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            response = self.cloudformation.describe_change_set(ChangeSetName=change_set_name, StackName=stack_name)
+            if response["Status"] in ("CREATE_COMPLETE", "FAILED"):
+                return self.describe_change_set(change_set_name, stack_name) if response.get("NextToken") else response
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Change set '{change_set_name}' is still {response['Status']} after {timeout}s.")
+            time.sleep(poll_interval)
+
+    def delete_change_set(self, change_set_name, stack_name):
+        """
+        Deletes a change set.
+        """
+        self.cloudformation.delete_change_set(ChangeSetName=change_set_name, StackName=stack_name)
+        return f"Change set '{change_set_name}' deleted from stack '{stack_name}'."
+
     def execute_change_set(self, change_set_name, stack_name):
         """
         Executes a change set for a CloudFormation stack.
@@ -1,11 +1,54 @@
-import boto3
 import datetime
+import heapq
+import math
+import re
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 
+from botocore.exceptions import ClientError
+from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.concurrency import RateLimiter
+from aws_wrapper.dashboard import body_hash, canonical_json
+from aws_wrapper.instrumentation import instrumented
+from aws_wrapper.log_shipper import split_log_batches
 
-class CloudWatch:
-    def __init__(self, region="us-east-1"):
-        self.cloudwatch = boto3.client("cloudwatch", region_name=region)
-        self.logs = boto3.client("logs", region_name=region)
+# GetMetricData accepts at most this many queries per request.
+MAX_METRIC_DATA_QUERIES = 500
+# StartQuery accepts at most this many log groups per query.
+MAX_INSIGHTS_LOG_GROUPS = 50
+# DeleteAlarms accepts at most this many names per request.
+MAX_DELETE_ALARMS = 100
+# Dashboards deleted per DeleteDashboards request.
+MAX_DELETE_DASHBOARDS = 100
+
+# Alarm dict keys (create_alarm parameter names) and their PutMetricAlarm names.
+ALARM_FIELDS = {
+    "alarm_name": "AlarmName",
+    "metric_name": "MetricName",
+    "namespace": "Namespace",
+    "threshold": "Threshold",
+    "comparison_operator": "ComparisonOperator",
+    "evaluation_periods": "EvaluationPeriods",
+    "period": "Period",
+    "statistic": "Statistic",
+    "dimensions": "Dimensions",
+    "alarm_description": "AlarmDescription",
+    "alarm_actions": "AlarmActions",
+    "ok_actions": "OKActions",
+    "insufficient_data_actions": "InsufficientDataActions",
+    "datapoints_to_alarm": "DatapointsToAlarm",
+    "treat_missing_data": "TreatMissingData",
+    "unit": "Unit",
+}
+
+
+@instrumented
+class CloudWatch(AWSManager):
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.cloudwatch = self.create_client("cloudwatch")
+        self.logs = self.create_client("logs")
 
     # Metrics Management
     def put_metric_data(self, namespace, metric_name, value, unit="None", dimensions=None):
@@ -56,6 +99,157 @@ class CloudWatch:
         response = self.cloudwatch.get_metric_statistics(**params)
         return response.get("Datapoints", [])
 
+    def get_metric_data(self, queries, start_time, end_time, max_workers=4):
+        """
+        Runs many metric queries, including math expressions, through GetMetricData.
+        Queries are packed into requests of up to 500 (expressions stay in the same
+        request as the queries they reference) and every page is followed.
+        :param queries: List of query dicts. Metric queries take "id", "namespace",
+            "metric_name", "stat", "period" and optional "dimensions" and "unit";
+            expression queries take "id" and "expression". Both accept optional
+            "label" and "return_data".
+        :param start_time: Start of the time range.
+        :param end_time: End of the time range.
+        :param max_workers: Number of packed requests fetched concurrently.
+        :return: Dictionary with "Timestamps" (ascending epoch seconds) and "Values"
+            and "Labels" keyed by query id. Each value column is an array aligned to
+            "Timestamps", with NaN where a query has no datapoint.
+        """
+        requests = self._pack_metric_data_queries(queries)
+        if len(requests) > 1 and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as executor:
+                pages = list(executor.map(
+                    lambda request: self._fetch_metric_data(request, start_time, end_time), requests
+                ))
+        else:
+            pages = [self._fetch_metric_data(request, start_time, end_time) for request in requests]
+
+        return self._merge_metric_data(pages)
+
+    @staticmethod
+    def _merge_metric_data(pages):
+        """
+        Aligns the results of every packed request on one sorted timestamp axis.
+        :param pages: Dictionaries returned by _fetch_metric_data().
+        """
+        series, labels = {}, {}
+        for results in pages:
+            for query_id, (label, timestamps, values) in results.items():
+                labels[query_id] = label
+                series[query_id] = (timestamps, values)
+
+        all_timestamps = sorted({ts for timestamps, _ in series.values() for ts in timestamps})
+        row_of = {ts: row for row, ts in enumerate(all_timestamps)}
+        columns = {}
+        for query_id, (timestamps, values) in series.items():
+            column = array("d", [math.nan]) * len(all_timestamps)
+            for ts, value in zip(timestamps, values):
+                column[row_of[ts]] = value
+            columns[query_id] = column
+        return {"Timestamps": array("d", all_timestamps), "Values": columns, "Labels": labels}
+
+    @staticmethod
+    def _metric_data_query(query):
+        """
+        Converts a query dict into the GetMetricData request shape.
+        """
+        request = {"Id": query["id"], "ReturnData": query.get("return_data", True)}
+        if "label" in query:
+            request["Label"] = query["label"]
+        if "expression" in query:
+            request["Expression"] = query["expression"]
+            return request
+        metric_stat = {
+            "Metric": {
+                "Namespace": query["namespace"],
+                "MetricName": query["metric_name"],
+                "Dimensions": query.get("dimensions") or [],
+            },
+            "Period": query["period"],
+            "Stat": query["stat"],
+        }
+        if "unit" in query:
+            metric_stat["Unit"] = query["unit"]
+        request["MetricStat"] = metric_stat
+        return request
+
+    @classmethod
+    def _pack_metric_data_queries(cls, queries):
+        """
+        Groups queries that reference each other and packs the groups into requests
+        of at most MAX_METRIC_DATA_QUERIES queries.
+        """
+        requests = [cls._metric_data_query(query) for query in queries]
+        ids = [request["Id"] for request in requests]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Metric query ids must be unique.")
+
+        parent = {query_id: query_id for query_id in ids}
+
+        def find(query_id):
+            while parent[query_id] != query_id:
+                parent[query_id] = parent[parent[query_id]]
+                query_id = parent[query_id]
+            return query_id
+
+        for request in requests:
+            expression = request.get("Expression")
+            if not expression:
+                continue
+            if "METRICS(" in expression.upper():
+                referenced = ids
+            else:
+                referenced = [token for token in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expression) if token in parent]
+            for query_id in referenced:
+                parent[find(query_id)] = find(request["Id"])
+
+        groups = {}
+        for request in requests:
+            groups.setdefault(find(request["Id"]), []).append(request)
+
+        batches = []
+        for group in sorted(groups.values(), key=len, reverse=True):
+            if len(group) > MAX_METRIC_DATA_QUERIES:
+                raise ValueError(
+                    f"{len(group)} metric queries reference each other; at most "
+                    f"{MAX_METRIC_DATA_QUERIES} fit in one GetMetricData request."
+                )
+            for batch in batches:
+                if len(batch) + len(group) <= MAX_METRIC_DATA_QUERIES:
+                    batch.extend(group)
+                    break
+            else:
+                batches.append(list(group))
+        return batches
+
+    def _fetch_metric_data(self, metric_data_queries, start_time, end_time):
+        """
+        Runs one packed GetMetricData request, following NextToken.
+        :return: Dictionary mapping query id to (label, timestamps, values).
+        """
+        results = {}
+        paginator = self.cloudwatch.get_paginator("get_metric_data")
+        for page in paginator.paginate(
+            MetricDataQueries=metric_data_queries,
+            StartTime=start_time,
+            EndTime=end_time,
+            ScanBy="TimestampAscending",
+        ):
+            self._add_metric_data_page(results, page)
+        return results
+
+    @staticmethod
+    def _add_metric_data_page(results, page):
+        """
+        Appends one GetMetricData response page to ``results``.
+        """
+        for result in page.get("MetricDataResults", []):
+            label, timestamps, values = results.setdefault(
+                result["Id"], (result.get("Label", result["Id"]), array("d"), array("d"))
+            )
+            timestamps.extend(ts.timestamp() for ts in result.get("Timestamps", []))
+            values.extend(result.get("Values", []))
+
     # Alarms Management
     def create_alarm(
         self,
@@ -103,13 +297,109 @@ class CloudWatch:
         self.cloudwatch.delete_alarms(AlarmNames=[alarm_name])
         return f"Alarm '{alarm_name}' deleted successfully."
 
-    def list_alarms(self):
+    def list_alarms(self, prefix=None):
         """
-        List all CloudWatch alarms.
+        List all CloudWatch alarms, following every page.
+        :param prefix: Only list alarms whose names start with this prefix (optional).
         :return: List of dictionaries containing alarm details.
         """
-        response = self.cloudwatch.describe_alarms()
-        return response.get("MetricAlarms", [])
+        params = {"AlarmNamePrefix": prefix} if prefix else {}
+        paginator = self.cloudwatch.get_paginator("describe_alarms")
+        alarms = []
+        for page in paginator.paginate(**params):
+            alarms.extend(page.get("MetricAlarms", []))
+        return alarms
+
+    def reconcile_alarms(self, desired_alarms, prefix=None, delete_stale=True, max_workers=8, rate_limit=10):
+        """
+        Makes the account's alarms match a desired set.
+        Existing alarms are paged once and diffed in memory; unchanged alarms are
+        skipped, changed or missing ones are written concurrently under a rate limit,
+        and stale ones are removed in batches of 100.
+        :param desired_alarms: List of alarm dicts using the create_alarm parameter names,
+            optionally with alarm_description, alarm_actions, ok_actions,
+            insufficient_data_actions, datapoints_to_alarm, treat_missing_data and unit.
+        :param prefix: Only alarms whose names start with this prefix are managed; required
+            when delete_stale is true.
+        :param delete_stale: Delete managed alarms that are not in the desired set.
+        :param max_workers: Number of concurrent PutMetricAlarm calls.
+        :param rate_limit: Maximum API calls per second.
+        :return: Dictionary listing the "created", "updated", "unchanged" and "deleted" alarm names.
+        """
+        if delete_stale and not prefix:
+            raise ValueError("A prefix is required to delete stale alarms; pass delete_stale=False otherwise.")
+        existing = {alarm["AlarmName"]: alarm for alarm in self.list_alarms(prefix)}
+        desired = {}
+        for alarm in desired_alarms:
+            request = self._alarm_request(alarm)
+            if prefix and not request["AlarmName"].startswith(prefix):
+                raise ValueError(f"Alarm '{request['AlarmName']}' does not match the managed prefix '{prefix}'.")
+            desired[request["AlarmName"]] = request
+
+        summary = {"created": [], "updated": [], "unchanged": [], "deleted": []}
+        writes = []
+        for name, request in desired.items():
+            if name not in existing:
+                summary["created"].append(name)
+                writes.append(request)
+            elif self._alarm_differs(request, existing[name]):
+                summary["updated"].append(name)
+                writes.append(request)
+            else:
+                summary["unchanged"].append(name)
+
+        limiter = RateLimiter(rate_limit)
+
+        def put(request):
+            limiter.acquire()
+            self.cloudwatch.put_metric_alarm(**request)
+
+        if writes:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(writes))) as executor:
+                list(executor.map(put, writes))
+
+        if delete_stale:
+            stale = sorted(name for name in existing if name not in desired)
+            for i in range(0, len(stale), MAX_DELETE_ALARMS):
+                limiter.acquire()
+                self.cloudwatch.delete_alarms(AlarmNames=stale[i:i + MAX_DELETE_ALARMS])
+            summary["deleted"] = stale
+        return summary
+
+    @staticmethod
+    def _alarm_request(alarm):
+        """
+        Converts an alarm dict into PutMetricAlarm parameters with dimensions in a
+        stable order, so requests can be compared with existing alarms.
+        """
+        request = {api_name: alarm[name] for name, api_name in ALARM_FIELDS.items() if alarm.get(name) is not None}
+        request.setdefault("Dimensions", [])
+        request["Dimensions"] = sorted(request["Dimensions"], key=lambda d: (d["Name"], d["Value"]))
+        return request
+
+    @staticmethod
+    def _alarm_differs(request, existing):
+        defaults = {
+            "AlarmActions": [],
+            "OKActions": [],
+            "InsufficientDataActions": [],
+            "TreatMissingData": "missing",
+            "DatapointsToAlarm": request["EvaluationPeriods"],
+        }
+        # Fields set on the live alarm but left out of the request must be cleared too.
+        extra = {key for key in ALARM_FIELDS.values() if existing.get(key) not in (None, "", [])}
+        for key in set(request) | set(defaults) | extra:
+            wanted = request.get(key, defaults.get(key))
+            current = existing.get(key, defaults.get(key))
+            if key == "Dimensions":
+                current = sorted(current or [], key=lambda d: (d["Name"], d["Value"]))
+            elif key == "Threshold":
+                wanted, current = float(wanted), float(current)
+            elif isinstance(wanted, list):
+                wanted, current = sorted(wanted), sorted(current or [])
+            if wanted != current:
+                return True
+        return False
 
     # Logs Management
     def create_log_group(self, log_group_name):
@@ -119,9 +409,20 @@ class CloudWatch:
         self.logs.create_log_group(logGroupName=log_group_name)
         return f"Log group '{log_group_name}' created successfully."
 
-    def list_log_groups(self):
-        response = self.logs.describe_log_groups()
-        return [log_group["logGroupName"] for log_group in response.get("logGroups", [])]
+    def list_log_groups(self, prefix=None):
+        return [log_group["logGroupName"] for log_group in self.iter_log_groups(prefix)]
+
+    def iter_log_groups(self, prefix=None):
+        """
+        Lazily yields log group descriptions, one page at a time.
+        :param prefix: Only yield log groups whose names start with this prefix (optional).
+        """
+        params = {}
+        if prefix:
+            params["logGroupNamePrefix"] = prefix
+        paginator = self.logs.get_paginator("describe_log_groups")
+        for page in paginator.paginate(**params):
+            yield from page.get("logGroups", [])
 
     def delete_log_group(self, log_group_name):
         """
@@ -140,36 +441,249 @@ class CloudWatch:
     def put_log_events(self, log_group_name, log_stream_name, messages):
         """
         Publishes log events to a log stream.
+        Events are sorted and split into batches that respect the PutLogEvents size,
+        count and 24-hour span limits.
+        :param messages: List of message strings (stamped with the current time) or
+            {"timestamp": epoch_ms, "message": str} dictionaries.
         """
-        events = [{"timestamp": int(datetime.datetime.now().timestamp() * 1000), "message": msg} for msg in messages]
-        response = self.logs.put_log_events(
-            logGroupName=log_group_name,
-            logStreamName=log_stream_name,
-            logEvents=events
-        )
+        now = int(datetime.datetime.now().timestamp() * 1000)
+        events = [
+            msg if isinstance(msg, dict) else {"timestamp": now, "message": msg}
+            for msg in messages
+        ]
+        for batch in split_log_batches(events):
+            self.logs.put_log_events(
+                logGroupName=log_group_name,
+                logStreamName=log_stream_name,
+                logEvents=batch
+            )
         return f"Published {len(events)} log events to stream '{log_stream_name}'."
 
     def get_log_events(self, log_group_name, log_stream_name, start_time=None, end_time=None):
         """
-        Retrieves log events from a log stream.
+        Retrieves all log events from a log stream, following every page.
+        """
+        return list(self.iter_log_events(log_group_name, log_stream_name, start_time, end_time))
+
+    def iter_log_events(self, log_group_name, log_stream_name, start_time=None, end_time=None):
+        """
+        Lazily yields log events from a log stream, oldest first, following nextForwardToken.
+        :param start_time: Earliest event time in epoch milliseconds (optional).
+        :param end_time: Latest event time in epoch milliseconds (optional).
         """
         params = {
             "logGroupName": log_group_name,
             "logStreamName": log_stream_name,
+            "startFromHead": True,
         }
         if start_time:
             params["startTime"] = start_time
         if end_time:
             params["endTime"] = end_time
 
-        response = self.logs.get_log_events(**params)
-        return response.get("events", [])
+        while True:
+            response = self.logs.get_log_events(**params)
+            yield from response.get("events", [])
+            next_token = response.get("nextForwardToken")
+            if not next_token or next_token == params.get("nextToken"):
+                return
+            params["nextToken"] = next_token
+
+    def iter_filtered_log_events(self, log_group_name, log_stream_names=None, filter_pattern=None, start_time=None, end_time=None):
+        """
+        Lazily yields events matching a filter pattern, ordered by timestamp.
+        When several streams are given, each is paged independently and the streams
+        are interleaved with a k-way merge, so memory stays bounded by one page per stream.
+        :param log_group_name: Name of the log group.
+        :param log_stream_names: Streams to read (optional; defaults to the whole group).
+        :param filter_pattern: CloudWatch Logs filter pattern (optional).
+        :param start_time: Earliest event time in epoch milliseconds (optional).
+        :param end_time: Latest event time in epoch milliseconds (optional).
+        """
+        params = {"logGroupName": log_group_name}
+        if filter_pattern:
+            params["filterPattern"] = filter_pattern
+        if start_time:
+            params["startTime"] = start_time
+        if end_time:
+            params["endTime"] = end_time
+
+        if not log_stream_names:
+            yield from self._iter_filter_pages(params)
+            return
+        streams = [self._iter_filter_pages(dict(params, logStreamNames=[name])) for name in log_stream_names]
+        yield from heapq.merge(*streams, key=lambda event: (event["timestamp"], event.get("ingestionTime", 0)))
+
+    def _iter_filter_pages(self, params):
+        paginator = self.logs.get_paginator("filter_log_events")
+        for page in paginator.paginate(**params):
+            yield from page.get("events", [])
+
+    def tail(self, log_group_name, log_stream_name=None, start_time=None, filter_pattern=None,
+             poll_interval=1.0, max_poll_interval=30.0, stop_event=None, lookback=60_000):
+        """
+        Follows a log stream, or a whole log group, yielding new events as they arrive.
+        Polling backs off exponentially while nothing new arrives and snaps back to
+        ``poll_interval`` as soon as events show up. When following a group, each poll
+        reads again from ``lookback`` before the newest event seen, so events ingested
+        late with older timestamps (e.g. from batched producers) are still yielded,
+        possibly out of timestamp order; events already yielded are skipped by eventId.
+        :param log_group_name: Name of the log group.
+        :param log_stream_name: Stream to follow (optional; defaults to every stream in the group).
+        :param start_time: Start following from this time in epoch milliseconds (optional; defaults to now).
+        :param filter_pattern: Filter pattern applied when following a group (optional).
+        :param poll_interval: Shortest delay between polls, in seconds.
+        :param max_poll_interval: Longest delay between polls, in seconds.
+        :param stop_event: threading.Event that ends the tail when set (optional).
+        :param lookback: How far back, in milliseconds, group polls look for late events.
+        """
+        if start_time is None:
+            start_time = int(datetime.datetime.now().timestamp() * 1000)
+        delay = poll_interval
+        if log_stream_name:
+            params = {
+                "logGroupName": log_group_name,
+                "logStreamName": log_stream_name,
+                "startTime": start_time,
+                "startFromHead": True,
+            }
+            while not (stop_event and stop_event.is_set()):
+                response = self.logs.get_log_events(**params)
+                events = response.get("events", [])
+                yield from events
+                params["nextToken"] = response.get("nextForwardToken", params.get("nextToken"))
+                if events:
+                    delay = poll_interval
+                    continue
+                delay = self._tail_wait(delay, max_poll_interval, stop_event)
+            return
+
+        newest, seen = start_time, {}
+        while not (stop_event and stop_event.is_set()):
+            window_start = max(start_time, newest - lookback)
+            # Only event IDs inside the window can come back, so older ones are dropped.
+            seen = {event_id: timestamp for event_id, timestamp in seen.items() if timestamp >= window_start}
+            new_events = 0
+            for event in self.iter_filtered_log_events(log_group_name, filter_pattern=filter_pattern, start_time=window_start):
+                if event["eventId"] in seen:
+                    continue
+                seen[event["eventId"]] = event["timestamp"]
+                newest = max(newest, event["timestamp"])
+                new_events += 1
+                yield event
+            if new_events:
+                delay = poll_interval
+                continue
+            delay = self._tail_wait(delay, max_poll_interval, stop_event)
+
+    @staticmethod
+    def _tail_wait(delay, max_delay, stop_event):
+        if stop_event:
+            stop_event.wait(delay)
+        else:
+            time.sleep(delay)
+        return min(delay * 2, max_delay)
+
+    # Logs Insights
+    def run_insights_query(self, query_string, log_group_names, start_time, end_time, slices=1,
+                           max_concurrent=10, poll_interval=0.5, max_poll_interval=5.0, limit=None):
+        """
+        Runs a Logs Insights query and yields result rows as each sub-query completes.
+        The work is split into one sub-query per chunk of up to 50 log groups and per
+        time slice; up to ``max_concurrent`` sub-queries run at once and are polled
+        with exponential backoff. Only slice queries whose rows are independent
+        (e.g. filter/fields, not stats), since each slice is evaluated on its own.
+        :param query_string: Logs Insights query.
+        :param log_group_names: Log groups to search.
+        :param start_time: Start of the range (datetime or epoch seconds).
+        :param end_time: End of the range (datetime or epoch seconds).
+        :param slices: Number of equal time slices to split the range into.
+        :param max_concurrent: Maximum number of sub-queries running at once.
+        :param poll_interval: Shortest delay between result polls, in seconds.
+        :param max_poll_interval: Longest delay between result polls, in seconds.
+        :param limit: Maximum number of rows returned per sub-query (optional).
+        :return: Generator of {field: value} dictionaries.
+        """
+        start = int(start_time.timestamp()) if isinstance(start_time, datetime.datetime) else int(start_time)
+        end = int(end_time.timestamp()) if isinstance(end_time, datetime.datetime) else int(end_time)
+        bounds = [start + (end - start) * i // slices for i in range(slices + 1)]
+        pending = [
+            (log_group_names[i:i + MAX_INSIGHTS_LOG_GROUPS], bounds[j], bounds[j + 1])
+            for j in range(slices)
+            for i in range(0, len(log_group_names), MAX_INSIGHTS_LOG_GROUPS)
+        ]
+        pending.reverse()
+        running = []
+        seen = set()
+        delay = poll_interval
+        try:
+            while pending or running:
+                while pending and len(running) < max_concurrent:
+                    query_id = self._start_insights_query(query_string, *pending[-1], limit=limit)
+                    if query_id is None:
+                        break
+                    pending.pop()
+                    running.append(query_id)
+
+                completed = False
+                for query_id in list(running):
+                    response = self.logs.get_query_results(queryId=query_id)
+                    status = response.get("status")
+                    if status in ("Scheduled", "Running"):
+                        continue
+                    running.remove(query_id)
+                    if status != "Complete":
+                        raise RuntimeError(f"Logs Insights query '{query_id}' ended with status '{status}'.")
+                    completed = True
+                    for result in response.get("results", []):
+                        row = {field["field"]: field.get("value") for field in result}
+                        pointer = row.get("@ptr")
+                        if pointer is not None:
+                            if pointer in seen:
+                                continue
+                            seen.add(pointer)
+                        yield row
+
+                if completed:
+                    delay = poll_interval
+                elif running or pending:
+                    time.sleep(delay)
+                    delay = min(delay * 2, max_poll_interval)
+        finally:
+            for query_id in running:
+                try:
+                    self.logs.stop_query(queryId=query_id)
+                except ClientError:
+                    pass
+
+    def _start_insights_query(self, query_string, log_group_names, start, end, limit=None):
+        """
+        Starts one Logs Insights query, or returns None when the account's
+        concurrent query limit has been reached.
+        """
+        params = {
+            "logGroupNames": log_group_names,
+            "startTime": start,
+            "endTime": end,
+            "queryString": query_string,
+        }
+        if limit:
+            params["limit"] = limit
+        try:
+            return self.logs.start_query(**params)["queryId"]
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "LimitExceededException":
+                return None
+            raise
 
     # Dashboard Management
     def create_dashboard(self, dashboard_name, dashboard_body):
         """
         Creates a CloudWatch dashboard.
+        :param dashboard_body: JSON string, dict, or Dashboard.
         """
+        if not isinstance(dashboard_body, str):
+            dashboard_body = canonical_json(dashboard_body)
         self.cloudwatch.put_dashboard(
             DashboardName=dashboard_name,
             DashboardBody=dashboard_body
@@ -190,9 +704,59 @@ class CloudWatch:
         response = self.cloudwatch.get_dashboard(DashboardName=dashboard_name)
         return response.get("DashboardBody", "")
 
-    def list_dashboards(self):
+    def list_dashboards(self, prefix=None):
+        """
+        Lists all CloudWatch dashboards, following every page.
+        :param prefix: Only list dashboards whose names start with this prefix (optional).
+        """
+        params = {"DashboardNamePrefix": prefix} if prefix else {}
+        paginator = self.cloudwatch.get_paginator("list_dashboards")
+        return [
+            dashboard["DashboardName"]
+            for page in paginator.paginate(**params)
+            for dashboard in page.get("DashboardEntries", [])
+        ]
+
+    def sync_dashboards(self, dashboards, prefix=None, delete_missing=False, max_workers=8):
         """
-        Lists all CloudWatch dashboards.
+        Pushes only the dashboards whose bodies differ from what is deployed.
+        Current bodies are fetched concurrently and compared by the hash of their
+        canonical JSON, so unchanged dashboards cost one read and no write.
+        :param dashboards: Dictionary mapping dashboard name to a Dashboard, dict or JSON string.
+        :param prefix: Only dashboards whose names start with this prefix are managed (optional);
+            every name in ``dashboards`` must start with it.
+        :param delete_missing: Delete managed dashboards that are not in ``dashboards``.
+        :param max_workers: Number of concurrent API calls.
+        :return: Dictionary listing the "created", "updated", "unchanged" and "deleted" dashboard names.
         """
-        response = self.cloudwatch.list_dashboards()
-        return [dashboard["DashboardName"] for dashboard in response.get("DashboardEntries", [])]
+        outside = sorted(name for name in dashboards if prefix and not name.startswith(prefix))
+        if outside:
+            raise ValueError(f"Dashboards {', '.join(outside)} do not match the managed prefix '{prefix}'.")
+        existing = set(self.list_dashboards(prefix))
+        desired = {name: canonical_json(body) for name, body in dashboards.items()}
+        summary = {"created": [], "updated": [], "unchanged": [], "deleted": []}
+
+        def current_hash(name):
+            return name, body_hash(self.get_dashboard(name))
+
+        to_compare = [name for name in desired if name in existing]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            current = dict(executor.map(current_hash, to_compare))
+            writes = []
+            for name, body in desired.items():
+                if name not in existing:
+                    summary["created"].append(name)
+                    writes.append(name)
+                elif current[name] != body_hash(body):
+                    summary["updated"].append(name)
+                    writes.append(name)
+                else:
+                    summary["unchanged"].append(name)
+            list(executor.map(lambda name: self.create_dashboard(name, desired[name]), writes))
+
+        if delete_missing:
+            stale = sorted(existing - set(desired))
+            for i in range(0, len(stale), MAX_DELETE_DASHBOARDS):
+                self.cloudwatch.delete_dashboards(DashboardNames=stale[i:i + MAX_DELETE_DASHBOARDS])
+            summary["deleted"] = stale
+        return summary
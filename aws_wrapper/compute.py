@@ -1,11 +1,12 @@
-import boto3
 from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.instrumentation import instrumented
 
 
+@instrumented
 class Compute(AWSManager):
-    def __init__(self, region="us-east-1"):
-        super().__init__(region)
-        self.ec2 = boto3.client("ec2", region_name=self.region)
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.ec2 = self.create_client("ec2")
 
     # Instance Operations
     def create_instance(self, instance_type, key_name):
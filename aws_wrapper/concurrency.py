@@ -0,0 +1,136 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket that spaces out calls to at most ``rate`` per second,
+    allowing bursts of up to ``burst`` calls.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: Sustained calls per second.
+        :param burst: Bucket capacity (defaults to ``rate``, at least 1).
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Takes tokens if they are available right now.
+        :return: True if the tokens were taken.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """
+        Returns the seconds until ``tokens`` will be available, without taking them.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until tokens are available, then takes them.
+        :return: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def run_graph(tasks, dependencies=None, max_workers=8, rate_limiter=None):
+    """
+    Runs tasks in dependency order, executing independent tasks concurrently.
+    A task starts once everything it depends on has succeeded; when a task fails,
+    every task that depends on it (directly or transitively) is skipped.
+    :param tasks: Dictionary mapping task key to a zero-argument callable.
+    :param dependencies: Dictionary mapping task key to the keys it must wait for (optional).
+        Keys that are not in ``tasks`` are ignored.
+    :param max_workers: Maximum number of tasks running at once.
+    :param rate_limiter: RateLimiter each task acquires before it starts (optional).
+    :return: Dictionary mapping task key to {"status": "succeeded" | "failed" | "skipped",
+        "result": ..., "error": ...}.
+    """
+    dependencies = dependencies or {}
+    waiting_on = {key: {dep for dep in dependencies.get(key, ()) if dep in tasks and dep != key} for key in tasks}
+    dependents = {key: [] for key in tasks}
+    for key, deps in waiting_on.items():
+        for dep in deps:
+            dependents[dep].append(key)
+    _check_acyclic(waiting_on, dependents)
+
+    def run(key):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return tasks[key]()
+
+    outcomes = {}
+    ready = [key for key, deps in waiting_on.items() if not deps]
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while ready or running:
+            while ready:
+                key = ready.pop()
+                running[executor.submit(run, key)] = key
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    outcomes[key] = {"status": "succeeded", "result": future.result()}
+                    for dependent in dependents[key]:
+                        waiting_on[dependent].discard(key)
+                        if not waiting_on[dependent] and dependent not in outcomes:
+                            ready.append(dependent)
+                else:
+                    outcomes[key] = {"status": "failed", "error": error}
+                    _skip_dependents(key, dependents, outcomes)
+    return outcomes
+
+
+def _skip_dependents(key, dependents, outcomes):
+    stack = list(dependents[key])
+    while stack:
+        dependent = stack.pop()
+        if dependent not in outcomes:
+            outcomes[dependent] = {"status": "skipped", "error": f"Dependency '{key}' failed."}
+            stack.extend(dependents[dependent])
+
+
+def _check_acyclic(waiting_on, dependents):
+    remaining = {key: len(deps) for key, deps in waiting_on.items()}
+    queue = [key for key, count in remaining.items() if count == 0]
+    visited = 0
+    while queue:
+        key = queue.pop()
+        visited += 1
+        for dependent in dependents[key]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                queue.append(dependent)
+    if visited != len(remaining):
+        cycle = sorted(str(key) for key, count in remaining.items() if count > 0)
+        raise ValueError(f"Task dependencies contain a cycle involving: {', '.join(cycle)}.")
@@ -0,0 +1,292 @@
+import datetime
+import functools
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import boto3
+import botocore.session
+from botocore.credentials import (
+    CredentialProvider,
+    CredentialResolver,
+    DeferredRefreshableCredentials,
+    ReadOnlyCredentials,
+)
+
+DEFAULT_SESSION_NAME = "aws-wrapper"
+
+# Cached credentials are never handed out with less than this many seconds left.
+EXPIRY_SAFETY_SECONDS = 60
+
+# Seconds to wait before retrying a failed background refresh.
+REFRESH_RETRY_SECONDS = 30
+
+
+class _CacheProvider(CredentialProvider):
+    """
+    Credential provider that hands botocore a refreshable credentials object
+    backed by a RoleSessionCache entry, so clients built once keep working
+    across refreshes.
+    """
+
+    METHOD = "assume-role-cache"
+
+    def __init__(self, credentials):
+        super().__init__()
+        self._credentials = credentials
+
+    def load(self):
+        return self._credentials
+
+
+class RoleSessionCache:
+    """
+    Thread-safe cache of assumed-role credentials, shared by every wrapper that
+    is given a role ARN.
+
+    Entries are keyed by role ARN, session policy, session name and external ID.
+    Each entry is refreshed by a background timer ``refresh_margin`` seconds
+    before it expires, and concurrent fetches of the same key share a single
+    AssumeRole call. Once an entry is warm, callers always read it from memory;
+    only the very first request for a key waits on STS.
+    """
+
+    def __init__(self, region="us-east-1", duration_seconds=3600, refresh_margin=900, sts_client=None):
+        """
+        :param region: Region of the STS client and of clients created by client().
+        :param duration_seconds: Requested session duration.
+        :param refresh_margin: Seconds before expiry at which an entry is refreshed.
+        :param sts_client: STS client used to assume roles (optional).
+        """
+        self.region = region
+        self.duration_seconds = duration_seconds
+        self.refresh_margin = min(refresh_margin, duration_seconds / 2)
+        self._sts_client = sts_client
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._params = {}
+        self._inflight = {}
+        self._timers = {}
+        self._clients = {}
+        # Bumped by invalidate(), so an AssumeRole call that was in flight at the
+        # time does not put its now-stale result back in the cache.
+        self._generation = 0
+        self.stats = {"hits": 0, "assume_role_calls": 0, "background_refreshes": 0, "refresh_errors": 0}
+
+    @staticmethod
+    def _key(role_arn, session_policy=None, session_name=None, external_id=None):
+        if isinstance(session_policy, dict):
+            session_policy = json.dumps(session_policy, sort_keys=True, separators=(",", ":"))
+        return (role_arn, session_policy, session_name or DEFAULT_SESSION_NAME, external_id)
+
+    def _sts(self):
+        if self._sts_client is None:
+            self._sts_client = boto3.client("sts", region_name=self.region)
+        return self._sts_client
+
+    # Lookups
+    def get_credentials(self, role_arn, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns credentials for a role, assuming it only if nothing usable is cached.
+        :param role_arn: ARN of the role to assume.
+        :param session_policy: Session policy document as a dict or JSON string (optional).
+        :param session_name: Role session name (optional).
+        :param external_id: External ID required by the role's trust policy (optional).
+        :return: ReadOnlyCredentials(access_key, secret_key, token, account_id).
+        """
+        key = self._key(role_arn, session_policy, session_name, external_id)
+        with self._lock:
+            self._params.setdefault(key, {"role_arn": role_arn, "session_policy": key[1], "external_id": external_id})
+        return self._current(key)
+
+    def credential_metadata(self, role_arn, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns the role's credentials in the form botocore's RefreshableCredentials
+        refreshes from: {"access_key", "secret_key", "token", "expiry_time", "account_id"}.
+        """
+        key = self._key(role_arn, session_policy, session_name, external_id)
+        credentials = self.get_credentials(role_arn, session_policy, session_name, external_id)
+        entry = self._entries.get(key)
+        expiration = entry["expiration"] if entry is not None else time.time() + EXPIRY_SAFETY_SECONDS
+        return {
+            "access_key": credentials.access_key,
+            "secret_key": credentials.secret_key,
+            "token": credentials.token,
+            "expiry_time": datetime.datetime.fromtimestamp(expiration, datetime.timezone.utc).isoformat(),
+            "account_id": credentials.account_id,
+        }
+
+    def credentials(self, role_arn, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns a botocore RefreshableCredentials that refreshes from this cache,
+        for use with sessions and clients that outlive one refresh.
+        """
+        return DeferredRefreshableCredentials(
+            refresh_using=functools.partial(self.credential_metadata, role_arn, session_policy, session_name, external_id),
+            method=_CacheProvider.METHOD,
+        )
+
+    def peek(self, role_arn, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns the cached credentials for a role if they are still usable, or None.
+        Never calls STS, so it is safe to use from an event loop.
+        """
+        entry = self._entries.get(self._key(role_arn, session_policy, session_name, external_id))
+        if entry is not None and entry["expiration"] - time.time() > EXPIRY_SAFETY_SECONDS:
+            return entry["credentials"]
+        return None
+
+    def session(self, role_arn, region=None, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns a boto3 Session that signs requests with the role's cached credentials.
+        """
+        botocore_session = botocore.session.get_session()
+        provider = _CacheProvider(self.credentials(role_arn, session_policy, session_name, external_id))
+        botocore_session.register_component("credential_provider", CredentialResolver([provider]))
+        return boto3.Session(botocore_session=botocore_session, region_name=region or self.region)
+
+    def client(self, service_name, role_arn, region=None, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns a client for a service under a role. Clients are created once per
+        role, region and service and reused, since their credentials stay current.
+        """
+        region = region or self.region
+        key = (self._key(role_arn, session_policy, session_name, external_id), service_name, region)
+        client = self._clients.get(key)
+        if client is None:
+            client = self.session(role_arn, region, session_policy, session_name, external_id).client(service_name)
+            with self._lock:
+                client = self._clients.setdefault(key, client)
+        return client
+
+    def resource(self, service_name, role_arn, region=None, session_policy=None, session_name=None, external_id=None):
+        """
+        Returns a boto3 resource for a service under a role.
+        """
+        return self.session(role_arn, region, session_policy, session_name, external_id).resource(service_name)
+
+    # Refreshing
+    def _current(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry["expiration"] - time.time() > EXPIRY_SAFETY_SECONDS:
+            self.stats["hits"] += 1
+            return entry["credentials"]
+        return self._refresh(key)
+
+    def _refresh(self, key):
+        """
+        Assumes the role for ``key``. Concurrent callers for the same key wait on
+        the same call instead of each making their own.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            credentials = self._assume_role(key)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(credentials)
+            return credentials
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _assume_role(self, key):
+        with self._lock:
+            params = self._params[key]
+            generation = self._generation
+        request = {
+            "RoleArn": params["role_arn"],
+            "RoleSessionName": key[2],
+            "DurationSeconds": self.duration_seconds,
+        }
+        if params["session_policy"]:
+            request["Policy"] = params["session_policy"]
+        if params["external_id"]:
+            request["ExternalId"] = params["external_id"]
+        self.stats["assume_role_calls"] += 1
+        response = self._sts().assume_role(**request)
+
+        result = response["Credentials"]
+        account_id = params["role_arn"].split(":")[4] if params["role_arn"].count(":") >= 5 else None
+        credentials = ReadOnlyCredentials(
+            result["AccessKeyId"], result["SecretAccessKey"], result["SessionToken"], account_id
+        )
+        expiration = result["Expiration"].timestamp()
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while AssumeRole was running: hand the result to this
+                # caller only.
+                return credentials
+            self._entries[key] = {"credentials": credentials, "expiration": expiration}
+        self._schedule(key, max(0.0, expiration - time.time() - self.refresh_margin))
+        return credentials
+
+    def _schedule(self, key, delay):
+        timer = threading.Timer(delay, self._background_refresh, args=(key,))
+        timer.daemon = True
+        with self._lock:
+            previous = self._timers.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._timers[key] = timer
+        timer.start()
+
+    def _background_refresh(self, key):
+        if key not in self._params:
+            return
+        try:
+            self._refresh(key)
+            self.stats["background_refreshes"] += 1
+        except Exception:
+            # Keep serving the current credentials and try again shortly.
+            self.stats["refresh_errors"] += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry["expiration"] > time.time():
+                self._schedule(key, min(REFRESH_RETRY_SECONDS, max(0.0, entry["expiration"] - time.time()) / 2))
+
+    def invalidate(self, role_arn=None):
+        """
+        Drops cached credentials for one role, or for every role if none is given.
+        """
+        with self._lock:
+            keys = [key for key in self._params if role_arn is None or key[0] == role_arn]
+            self._generation += 1
+            for key in keys:
+                self._params.pop(key, None)
+                self._entries.pop(key, None)
+                timer = self._timers.pop(key, None)
+                if timer is not None:
+                    timer.cancel()
+            self._clients = {k: c for k, c in self._clients.items() if k[0] not in keys}
+        return f"Invalidated {len(keys)} cached role session(s)."
+
+    def close(self):
+        """
+        Stops background refreshes and clears the cache.
+        """
+        return self.invalidate()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """
+    Returns the process-wide RoleSessionCache shared by wrappers that are not
+    given their own.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = RoleSessionCache()
+        return _default_cache
@@ -0,0 +1,150 @@
+import hashlib
+import json
+
+# CloudWatch dashboards are laid out on a grid this many units wide.
+GRID_WIDTH = 24
+
+
+def canonical_json(body):
+    """
+    Serializes a dashboard body deterministically: sorted keys and no whitespace.
+    :param body: Dashboard, dict, or JSON string.
+    :return: Canonical JSON string.
+    """
+    if isinstance(body, Dashboard):
+        body = body.to_dict()
+    elif isinstance(body, (str, bytes)):
+        body = json.loads(body)
+    return json.dumps(body, sort_keys=True, separators=(",", ":"))
+
+
+def body_hash(body):
+    """
+    Returns the SHA-256 of a dashboard body's canonical JSON.
+    """
+    return hashlib.sha256(canonical_json(body).encode("utf-8")).hexdigest()
+
+
+class Dashboard:
+    """
+    Structured CloudWatch dashboard body.
+
+    Widgets added without explicit coordinates are placed left to right on the
+    24-unit grid, wrapping to a new row when the current one is full.
+    """
+
+    def __init__(self, start=None, end=None, period_override=None):
+        """
+        :param start: Default time range start, e.g. "-PT3H" (optional).
+        :param end: Default time range end (optional).
+        :param period_override: "auto" or "inherit" (optional).
+        """
+        self.start = start
+        self.end = end
+        self.period_override = period_override
+        self.widgets = []
+        self._cursor_x = 0
+        self._cursor_y = 0
+        self._row_height = 0
+
+    def add_widget(self, widget_type, properties, width=6, height=6, x=None, y=None):
+        """
+        Adds a widget of any type.
+        :param widget_type: Widget type ("metric", "text", "log", "alarm", ...).
+        :param properties: Widget properties dictionary.
+        :param width: Width in grid units.
+        :param height: Height in grid units.
+        :param x: Column (optional; auto-placed if omitted).
+        :param y: Row (optional; auto-placed if omitted).
+        :return: The dashboard, for chaining.
+        """
+        if x is None or y is None:
+            if self._cursor_x + width > GRID_WIDTH:
+                self._cursor_x = 0
+                self._cursor_y += self._row_height
+                self._row_height = 0
+            x, y = self._cursor_x, self._cursor_y
+            self._cursor_x += width
+            self._row_height = max(self._row_height, height)
+        self.widgets.append({
+            "type": widget_type,
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "properties": properties,
+        })
+        return self
+
+    def add_metric_widget(self, metrics, title=None, region=None, period=300, stat="Average",
+                          view="timeSeries", stacked=False, **layout):
+        """
+        Adds a metric graph.
+        :param metrics: Metric arrays, e.g. [["AWS/EC2", "CPUUtilization", "InstanceId", "i-123"]].
+        :param title: Widget title (optional).
+        :param region: Region of the metrics (optional).
+        :param period: Period in seconds.
+        :param stat: Statistic to display.
+        :param view: "timeSeries", "singleValue", "bar" or "pie".
+        :param stacked: Stack the series.
+        """
+        properties = {"metrics": metrics, "period": period, "stat": stat, "view": view, "stacked": stacked}
+        if title:
+            properties["title"] = title
+        if region:
+            properties["region"] = region
+        return self.add_widget("metric", properties, **layout)
+
+    def add_text_widget(self, markdown, **layout):
+        """
+        Adds a markdown text widget.
+        """
+        return self.add_widget("text", {"markdown": markdown}, **layout)
+
+    def add_log_widget(self, query, log_group_names, title=None, region=None, view="table", **layout):
+        """
+        Adds a Logs Insights widget.
+        :param query: Logs Insights query.
+        :param log_group_names: Log groups the query runs against.
+        """
+        sources = " | ".join(f"SOURCE '{name}'" for name in log_group_names)
+        properties = {"query": f"{sources} | {query}", "view": view}
+        if title:
+            properties["title"] = title
+        if region:
+            properties["region"] = region
+        return self.add_widget("log", properties, **layout)
+
+    def to_dict(self):
+        body = {"widgets": self.widgets}
+        if self.start:
+            body["start"] = self.start
+        if self.end:
+            body["end"] = self.end
+        if self.period_override:
+            body["periodOverride"] = self.period_override
+        return body
+
+    def to_json(self):
+        """
+        Returns the canonical JSON dashboard body.
+        """
+        return canonical_json(self.to_dict())
+
+    @classmethod
+    def from_json(cls, dashboard_body):
+        """
+        Builds a Dashboard from an existing JSON body.
+        """
+        body = json.loads(dashboard_body)
+        dashboard = cls(body.get("start"), body.get("end"), body.get("periodOverride"))
+        for widget in body.get("widgets", []):
+            dashboard.add_widget(
+                widget["type"],
+                widget.get("properties", {}),
+                width=widget.get("width", 6),
+                height=widget.get("height", 6),
+                x=widget.get("x"),
+                y=widget.get("y"),
+            )
+        return dashboard
@@ -1,12 +1,22 @@
-import boto3
+import time
+
 from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.instrumentation import instrumented
+
+# Items per BatchWriteItem and keys per BatchGetItem request.
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
 
+# Attempts at items DynamoDB leaves unprocessed, e.g. when throttled.
+BATCH_MAX_ATTEMPTS = 8
 
+
+@instrumented
 class Database(AWSManager):
-    def __init__(self, region="us-east-1"):
-        super().__init__(region)
-        self.dynamodb = boto3.client("dynamodb", region_name=self.region)
-        self.dynamodb_resource = boto3.resource("dynamodb", region_name=self.region)
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.dynamodb = self.create_client("dynamodb")
+        self.dynamodb_resource = self.create_resource("dynamodb")
 
     def create_table(self, table_name, key_schema, attribute_definitions, provisioned_throughput):
         """
@@ -107,6 +117,53 @@ class Database(AWSManager):
         self.dynamodb.delete_item(TableName=table_name, Key=key)
         return f"Item deleted from table '{table_name}'."
 
+    def batch_write_items(self, table_name, items):
+        """
+        Adds many items to a DynamoDB table, 25 per request, resending any items
+        DynamoDB leaves unprocessed.
+
+        :param table_name: Name of the table.
+        :param items: Iterable of items to add.
+        :return: Success message.
+        """
+        items = list(items)
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            requests = {table_name: [{"PutRequest": {"Item": item}} for item in items[start:start + BATCH_WRITE_SIZE]]}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                requests = self.dynamodb.batch_write_item(RequestItems=requests).get("UnprocessedItems")
+                if not requests:
+                    break
+                if attempt + 1 < BATCH_MAX_ATTEMPTS:
+                    time.sleep(min(2.0, 0.05 * 2 ** attempt))
+            else:
+                raise RuntimeError(f"Items left unprocessed in table '{table_name}' after {BATCH_MAX_ATTEMPTS} attempts.")
+        return f"{len(items)} items added to table '{table_name}'."
+
+    def batch_get_items(self, table_name, keys):
+        """
+        Retrieves many items from a DynamoDB table, 100 keys per request, retrying
+        any keys DynamoDB leaves unprocessed.
+
+        :param table_name: Name of the table.
+        :param keys: Iterable of primary keys.
+        :return: List of the items found, in no particular order.
+        """
+        keys = list(keys)
+        items = []
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            requests = {table_name: {"Keys": keys[start:start + BATCH_GET_SIZE]}}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                response = self.dynamodb.batch_get_item(RequestItems=requests)
+                items.extend(response.get("Responses", {}).get(table_name, []))
+                requests = response.get("UnprocessedKeys")
+                if not requests:
+                    break
+                if attempt + 1 < BATCH_MAX_ATTEMPTS:
+                    time.sleep(min(2.0, 0.05 * 2 ** attempt))
+            else:
+                raise RuntimeError(f"Keys left unprocessed in table '{table_name}' after {BATCH_MAX_ATTEMPTS} attempts.")
+        return items
+
     def delete_table(self, table_name):
         """
         Deletes a DynamoDB table.
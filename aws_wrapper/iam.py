@@ -1,9 +1,22 @@
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 
+from botocore.exceptions import ClientError
+from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.concurrency import RateLimiter, run_graph
+from aws_wrapper.iam_inventory import IAMInventory, GROUP, ROLE, USER
+from aws_wrapper.iam_policy_optimizer import optimize_policy_document
+from aws_wrapper.instrumentation import instrumented
 
-class IAM:
-    def __init__(self, region="us-east-1"):
-        self.iam = boto3.client("iam", region_name=region)
+
+def _raise(error):
+    raise error
+
+
+@instrumented
+class IAM(AWSManager):
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.iam = self.create_client("iam")
 
     # User Management
     def create_iam_user(self, user_name):
@@ -24,8 +37,7 @@ class IAM:
         """
         Lists all IAM users.
         """
-        response = self.iam.list_users()
-        return [user["UserName"] for user in response.get("Users", [])]
+        return [user["UserName"] for user in self._paginate("list_users", "Users")]
 
     # Group Management
     def create_group(self, group_name):
@@ -46,8 +58,7 @@ class IAM:
         """
         Lists all IAM groups.
         """
-        response = self.iam.list_groups()
-        return [group["GroupName"] for group in response.get("Groups", [])]
+        return [group["GroupName"] for group in self._paginate("list_groups", "Groups")]
 
     def add_user_to_group(self, user_name, group_name):
         """
@@ -84,8 +95,7 @@ class IAM:
         """
         Lists all IAM roles.
         """
-        response = self.iam.list_roles()
-        return [role["RoleName"] for role in response.get("Roles", [])]
+        return [role["RoleName"] for role in self._paginate("list_roles", "Roles")]
 
     # Policy Management
     def create_policy(self, policy_name, policy_document):
@@ -98,7 +108,22 @@ class IAM:
         )
         policy_arn = response["Policy"]["Arn"]
         return policy_arn
-        
+
+    def optimize_policy(self, policy_document, collapse_actions=True, keep_sids=False):
+        """
+        Shrinks a policy document before it is passed to create_policy: merges
+        statements with the same effect and conditions, drops duplicate and
+        wildcard-shadowed actions and resources, collapses actions into wildcards
+        that the bundled action catalog shows grant nothing extra, and minifies.
+        :param policy_document: Policy document as a dict or JSON string.
+        :param collapse_actions: Collapse action lists into wildcards.
+        :param keep_sids: Keep statement Sids where statements are not merged.
+        :return: Tuple of (minified policy JSON, report with "original_bytes",
+            "optimized_bytes", "saved_bytes", statement counts and whether it "fits"
+            IAM's managed policy size limit).
+        """
+        return optimize_policy_document(policy_document, collapse=collapse_actions, keep_sids=keep_sids)
+
     def delete_policy(self, policy_arn):
         """
         Deletes an IAM policy.
@@ -110,8 +135,7 @@ class IAM:
         """
         Lists all IAM policies.
         """
-        response = self.iam.list_policies(Scope=scope)
-        return [policy["PolicyName"] for policy in response.get("Policies", [])]
+        return [policy["PolicyName"] for policy in self._paginate("list_policies", "Policies", Scope=scope)]
 
     def attach_user_policy(self, user_name, policy_arn):
         """
@@ -154,3 +178,312 @@ class IAM:
         """
         self.iam.detach_group_policy(GroupName=group_name, PolicyArn=policy_arn)
         return f"Policy '{policy_arn}' detached from group '{group_name}'."
+
+    # Inventory
+    def load_inventory(self, max_workers=8, include_aws_managed=True):
+        """
+        Loads every user, group, role and managed policy into an in-memory graph.
+        Uses paginated GetAccountAuthorizationDetails, and falls back to parallel
+        per-entity calls when that API is not permitted.
+        :param max_workers: Number of concurrent API calls for per-entity requests.
+        :param include_aws_managed: Also load documents of attached AWS managed policies.
+        :return: IAMInventory.
+        """
+        inventory = IAMInventory()
+        try:
+            for page in self.iam.get_paginator("get_account_authorization_details").paginate(
+                Filter=["User", "Group", "Role", "LocalManagedPolicy"]
+            ):
+                inventory.add_authorization_details(page)
+        except ClientError as error:
+            if error.response["Error"]["Code"] not in ("AccessDenied", "AccessDeniedException"):
+                raise
+            inventory = self._load_inventory_per_entity(max_workers)
+
+        if include_aws_managed:
+            missing = sorted(set(inventory.policy_principals) - set(inventory.policy_documents))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for policy in executor.map(self._get_policy_with_document, missing):
+                    inventory.add_policy(policy)
+        return inventory
+
+    def _pages(self, operation, limiter=None, **params):
+        pages = iter(self.iam.get_paginator(operation).paginate(**params))
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            page = next(pages, None)
+            if page is None:
+                return
+            yield page
+
+    def _paginate(self, operation, key, limiter=None, **params):
+        for page in self._pages(operation, limiter, **params):
+            yield from page.get(key, [])
+
+    def _get_policy_with_document(self, policy_arn):
+        policy = self.iam.get_policy(PolicyArn=policy_arn)["Policy"]
+        version = self.iam.get_policy_version(PolicyArn=policy_arn, VersionId=policy["DefaultVersionId"])
+        policy["Document"] = version["PolicyVersion"]["Document"]
+        return policy
+
+    def _load_inventory_per_entity(self, max_workers):
+        """
+        Builds the inventory from list/get calls, fetching each entity's
+        attachments and inline policies concurrently.
+        """
+        inventory = IAMInventory()
+        users = list(self._paginate("list_users", "Users"))
+        groups = list(self._paginate("list_groups", "Groups"))
+        roles = list(self._paginate("list_roles", "Roles"))
+        policies = list(self._paginate("list_policies", "Policies", Scope="Local"))
+        for kind, entities, name_key in [(USER, users, "UserName"), (GROUP, groups, "GroupName"), (ROLE, roles, "RoleName")]:
+            for entity in entities:
+                inventory.add_entity(kind, entity["Arn"], entity[name_key], {"Path": entity.get("Path")})
+
+        def principal_details(kind, entity):
+            if kind == USER:
+                name = {"UserName": entity["UserName"]}
+                attached = self._paginate("list_attached_user_policies", "AttachedPolicies", **name)
+                inline = [
+                    (policy_name, self.iam.get_user_policy(PolicyName=policy_name, **name)["PolicyDocument"])
+                    for policy_name in self._paginate("list_user_policies", "PolicyNames", **name)
+                ]
+                group_arns = [group["Arn"] for group in self._paginate("list_groups_for_user", "Groups", **name)]
+            elif kind == GROUP:
+                name = {"GroupName": entity["GroupName"]}
+                attached = self._paginate("list_attached_group_policies", "AttachedPolicies", **name)
+                inline = [
+                    (policy_name, self.iam.get_group_policy(PolicyName=policy_name, **name)["PolicyDocument"])
+                    for policy_name in self._paginate("list_group_policies", "PolicyNames", **name)
+                ]
+                group_arns = []
+            else:
+                name = {"RoleName": entity["RoleName"]}
+                attached = self._paginate("list_attached_role_policies", "AttachedPolicies", **name)
+                inline = [
+                    (policy_name, self.iam.get_role_policy(PolicyName=policy_name, **name)["PolicyDocument"])
+                    for policy_name in self._paginate("list_role_policies", "PolicyNames", **name)
+                ]
+                group_arns = []
+            return entity["Arn"], [policy["PolicyArn"] for policy in attached], inline, group_arns
+
+        jobs = [(USER, user) for user in users] + [(GROUP, group) for group in groups] + [(ROLE, role) for role in roles]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            details = list(executor.map(lambda job: principal_details(*job), jobs))
+            local_policies = list(executor.map(lambda policy: self._get_policy_with_document(policy["Arn"]), policies))
+
+        for principal_arn, attached, inline, group_arns in details:
+            for policy_arn in attached:
+                inventory.attach_policy(principal_arn, policy_arn)
+            for policy_name, document in inline:
+                inventory.add_inline_policy(principal_arn, policy_name, document)
+            for group_arn in group_arns:
+                inventory.add_group_member(group_arn, principal_arn)
+        for policy in local_policies:
+            inventory.add_policy(policy)
+        return inventory
+
+    # Bulk Provisioning and Teardown
+    def bulk_create(self, users=(), groups=(), roles=None, policies=None, memberships=None,
+                    attachments=None, max_workers=8, rate_limit=10):
+        """
+        Creates principals and policies, then wires up memberships and attachments.
+        Every call is a node in a dependency graph (a policy is attached only after
+        both it and its principal exist), and independent calls run concurrently
+        under a shared rate limit.
+        :param users: User names to create.
+        :param groups: Group names to create.
+        :param roles: Dictionary mapping role name to its assume-role policy document.
+        :param policies: Dictionary mapping policy name to its policy document.
+        :param memberships: Dictionary mapping group name to the user names to add.
+        :param attachments: List of (kind, principal_name, policy) tuples, where kind is
+            "user", "group" or "role" and policy is a policy name from ``policies`` or an ARN.
+        :return: Dictionary with "succeeded", "failed" and "skipped" task names and
+            "policy_arns" mapping created policy names to their ARNs.
+        """
+        roles, policies = roles or {}, policies or {}
+        tasks, dependencies = {}, {}
+        policy_arns = {}
+
+        for name in users:
+            tasks[f"create-user:{name}"] = lambda name=name: self.create_iam_user(name)
+        for name in groups:
+            tasks[f"create-group:{name}"] = lambda name=name: self.create_group(name)
+        for name, document in roles.items():
+            tasks[f"create-role:{name}"] = lambda name=name, document=document: self.create_role(name, document)
+        for name, document in policies.items():
+            def create(name=name, document=document):
+                policy_arns[name] = self.create_policy(name, document)
+                return policy_arns[name]
+            tasks[f"create-policy:{name}"] = create
+
+        for group_name, user_names in (memberships or {}).items():
+            for user_name in user_names:
+                key = f"add-user-to-group:{user_name}:{group_name}"
+                tasks[key] = lambda u=user_name, g=group_name: self.add_user_to_group(u, g)
+                dependencies[key] = {f"create-user:{user_name}", f"create-group:{group_name}"}
+
+        attach = {USER: self.attach_user_policy, GROUP: self.attach_group_policy, ROLE: self.attach_role_policy}
+        for kind, principal_name, policy in attachments or ():
+            key = f"attach-{kind}-policy:{principal_name}:{policy}"
+            tasks[key] = lambda kind=kind, principal=principal_name, policy=policy: attach[kind](
+                principal, policy_arns.get(policy, policy)
+            )
+            dependencies[key] = {f"create-{kind}:{principal_name}", f"create-policy:{policy}"}
+
+        outcomes = run_graph(tasks, dependencies, max_workers, RateLimiter(rate_limit))
+        summary = self._bulk_summary(outcomes)
+        summary["policy_arns"] = policy_arns
+        return summary
+
+    def bulk_delete(self, users=(), groups=(), roles=(), policies=(), max_workers=8, rate_limit=10):
+        """
+        Deletes principals and policies together with everything that blocks their deletion.
+        Attachments, inline policies, group memberships, access keys, login profiles,
+        MFA devices, instance profile links and non-default policy versions are discovered
+        concurrently, then removed in dependency order (for example, detach before
+        delete and remove from group before deleting the user). Independent branches
+        run concurrently under a shared rate limit.
+        :param users: User names to delete.
+        :param groups: Group names to delete.
+        :param roles: Role names to delete.
+        :param policies: Managed policy ARNs to delete.
+        :return: Dictionary with "succeeded", "failed" and "skipped" task names. An
+            item whose discovery fails (e.g. NoSuchEntity) is reported under its
+            delete task in "failed"; the other items still go ahead.
+        """
+        limiter = RateLimiter(rate_limit)
+        discoveries = (
+            [(self._discover_user, name, f"delete-user:{name}") for name in users]
+            + [(self._discover_group, name, f"delete-group:{name}") for name in groups]
+            + [(self._discover_role, name, f"delete-role:{name}") for name in roles]
+            + [(self._discover_policy, arn, f"delete-policy:{arn}") for arn in policies]
+        )
+        tasks, dependencies = {}, {}
+
+        def add(key, action, before=()):
+            tasks.setdefault(key, action)
+            for later in before:
+                dependencies.setdefault(later, set()).add(key)
+
+        def discover(job):
+            find, name, delete = job
+            try:
+                return find(name, limiter)
+            except ClientError as error:
+                # Fail this item's delete task with the error instead of the whole call.
+                return [(delete, lambda error=error: _raise(error), ())]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for steps in executor.map(discover, discoveries):
+                for key, action, before in steps:
+                    add(key, action, before)
+
+        outcomes = run_graph(tasks, dependencies, max_workers, limiter)
+        return self._bulk_summary(outcomes)
+
+    def _discover_user(self, user_name, limiter):
+        delete = f"delete-user:{user_name}"
+        name = {"UserName": user_name}
+        steps = [(delete, lambda: self.delete_iam_user(user_name), ())]
+        for policy in self._paginate("list_attached_user_policies", "AttachedPolicies", limiter, **name):
+            arn = policy["PolicyArn"]
+            steps.append((f"detach-user-policy:{user_name}:{arn}", lambda arn=arn: self.detach_user_policy(user_name, arn),
+                          (delete, f"delete-policy:{arn}")))
+        for policy_name in self._paginate("list_user_policies", "PolicyNames", limiter, **name):
+            steps.append((f"delete-user-policy:{user_name}:{policy_name}",
+                          lambda p=policy_name: self.iam.delete_user_policy(PolicyName=p, **name), (delete,)))
+        for group in self._paginate("list_groups_for_user", "Groups", limiter, **name):
+            group_name = group["GroupName"]
+            steps.append((f"remove-user-from-group:{user_name}:{group_name}",
+                          lambda g=group_name: self.remove_user_from_group(user_name, g),
+                          (delete, f"delete-group:{group_name}")))
+        for key in self._paginate("list_access_keys", "AccessKeyMetadata", limiter, **name):
+            key_id = key["AccessKeyId"]
+            steps.append((f"delete-access-key:{user_name}:{key_id}",
+                          lambda k=key_id: self.iam.delete_access_key(AccessKeyId=k, **name), (delete,)))
+        for device in self._paginate("list_mfa_devices", "MFADevices", limiter, **name):
+            serial = device["SerialNumber"]
+            steps.append((f"deactivate-mfa-device:{user_name}:{serial}",
+                          lambda s=serial: self.iam.deactivate_mfa_device(SerialNumber=s, **name), (delete,)))
+        limiter.acquire()
+        try:
+            self.iam.get_login_profile(**name)
+            steps.append((f"delete-login-profile:{user_name}", lambda: self.iam.delete_login_profile(**name), (delete,)))
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "NoSuchEntity":
+                raise
+        return steps
+
+    def _discover_group(self, group_name, limiter):
+        delete = f"delete-group:{group_name}"
+        name = {"GroupName": group_name}
+        steps = [(delete, lambda: self.delete_group(group_name), ())]
+        for policy in self._paginate("list_attached_group_policies", "AttachedPolicies", limiter, **name):
+            arn = policy["PolicyArn"]
+            steps.append((f"detach-group-policy:{group_name}:{arn}", lambda arn=arn: self.detach_group_policy(group_name, arn),
+                          (delete, f"delete-policy:{arn}")))
+        for policy_name in self._paginate("list_group_policies", "PolicyNames", limiter, **name):
+            steps.append((f"delete-group-policy:{group_name}:{policy_name}",
+                          lambda p=policy_name: self.iam.delete_group_policy(PolicyName=p, **name), (delete,)))
+        for user in self._paginate("get_group", "Users", limiter, **name):
+            user_name = user["UserName"]
+            steps.append((f"remove-user-from-group:{user_name}:{group_name}",
+                          lambda u=user_name: self.remove_user_from_group(u, group_name),
+                          (delete, f"delete-user:{user_name}")))
+        return steps
+
+    def _discover_role(self, role_name, limiter):
+        delete = f"delete-role:{role_name}"
+        name = {"RoleName": role_name}
+        steps = [(delete, lambda: self.delete_role(role_name), ())]
+        for policy in self._paginate("list_attached_role_policies", "AttachedPolicies", limiter, **name):
+            arn = policy["PolicyArn"]
+            steps.append((f"detach-role-policy:{role_name}:{arn}", lambda arn=arn: self.detach_role_policy(role_name, arn),
+                          (delete, f"delete-policy:{arn}")))
+        for policy_name in self._paginate("list_role_policies", "PolicyNames", limiter, **name):
+            steps.append((f"delete-role-policy:{role_name}:{policy_name}",
+                          lambda p=policy_name: self.iam.delete_role_policy(PolicyName=p, **name), (delete,)))
+        for profile in self._paginate("list_instance_profiles_for_role", "InstanceProfiles", limiter, **name):
+            profile_name = profile["InstanceProfileName"]
+            steps.append((f"remove-role-from-instance-profile:{role_name}:{profile_name}",
+                          lambda p=profile_name: self.iam.remove_role_from_instance_profile(InstanceProfileName=p, **name),
+                          (delete,)))
+        return steps
+
+    def _discover_policy(self, policy_arn, limiter):
+        delete = f"delete-policy:{policy_arn}"
+        steps = [(delete, lambda: self.delete_policy(policy_arn), ())]
+        entity_types = [
+            ("PolicyUsers", "user", self.detach_user_policy),
+            ("PolicyGroups", "group", self.detach_group_policy),
+            ("PolicyRoles", "role", self.detach_role_policy),
+        ]
+        for page in self._pages("list_entities_for_policy", limiter, PolicyArn=policy_arn):
+            for response_key, kind, detach in entity_types:
+                for entity in page.get(response_key, []):
+                    principal_name = entity[f"{kind.capitalize()}Name"]
+                    steps.append((f"detach-{kind}-policy:{principal_name}:{policy_arn}",
+                                  lambda d=detach, p=principal_name: d(p, policy_arn),
+                                  (delete, f"delete-{kind}:{principal_name}")))
+        for version in self._paginate("list_policy_versions", "Versions", limiter, PolicyArn=policy_arn):
+            if version["IsDefaultVersion"]:
+                continue
+            version_id = version["VersionId"]
+            steps.append((f"delete-policy-version:{policy_arn}:{version_id}",
+                          lambda v=version_id: self.iam.delete_policy_version(PolicyArn=policy_arn, VersionId=v),
+                          (delete,)))
+        return steps
+
+    @staticmethod
+    def _bulk_summary(outcomes):
+        summary = {"succeeded": [], "failed": {}, "skipped": []}
+        for key, outcome in sorted(outcomes.items()):
+            if outcome["status"] == "succeeded":
+                summary["succeeded"].append(key)
+            elif outcome["status"] == "failed":
+                summary["failed"][key] = str(outcome["error"])
+            else:
+                summary["skipped"].append(key)
+        return summary
@@ -0,0 +1,215 @@
+import json
+import os
+from urllib.parse import unquote
+
+USER = "user"
+GROUP = "group"
+ROLE = "role"
+POLICY = "policy"
+
+
+def parse_policy_document(document):
+    """
+    Returns a policy document as a dict, decoding the URL-encoded JSON strings
+    some IAM APIs return.
+    """
+    if isinstance(document, dict):
+        return document
+    if document.lstrip().startswith("%7B"):
+        document = unquote(document)
+    return json.loads(document)
+
+
+class IAMInventory:
+    """
+    In-memory graph of IAM users, groups, roles and managed policies.
+
+    Entities are keyed by ARN. Attachments, group memberships and inline policy
+    documents are indexed in both directions, so "which policies apply to this
+    principal" and "which principals use this policy" are dictionary lookups.
+    """
+
+    def __init__(self):
+        self.entities = {}
+        self.arns_by_name = {USER: {}, GROUP: {}, ROLE: {}, POLICY: {}}
+        self.policy_documents = {}
+        self.inline_policies = {}
+        self.attached_policies = {}
+        self.policy_principals = {}
+        self.group_members = {}
+        self.user_groups = {}
+        self._memberships = []
+
+    # Building
+    def add_entity(self, kind, arn, name, details=None):
+        self.entities[arn] = {"Kind": kind, "Name": name, "Arn": arn, **(details or {})}
+        # Policy names repeat across paths and between AWS-managed and customer
+        # policies, so each name maps to every ARN that carries it.
+        self.arns_by_name[kind].setdefault(name, set()).add(arn)
+
+    def attach_policy(self, principal_arn, policy_arn):
+        self.attached_policies.setdefault(principal_arn, set()).add(policy_arn)
+        self.policy_principals.setdefault(policy_arn, set()).add(principal_arn)
+
+    def add_inline_policy(self, principal_arn, policy_name, document):
+        self.inline_policies.setdefault(principal_arn, {})[policy_name] = parse_policy_document(document)
+
+    def add_group_member(self, group_arn, user_arn):
+        self.group_members.setdefault(group_arn, set()).add(user_arn)
+        self.user_groups.setdefault(user_arn, set()).add(group_arn)
+
+    def add_policy(self, policy):
+        """
+        Adds a managed policy from a GetAccountAuthorizationDetails or GetPolicy response.
+        :param policy: Policy dict; its default version document may be given under
+            "PolicyVersionList" or "Document".
+        """
+        details = {key: policy[key] for key in ("Path", "DefaultVersionId", "AttachmentCount") if key in policy}
+        name = policy.get("PolicyName") or policy["Arn"].rsplit("/", 1)[-1]
+        self.add_entity(POLICY, policy["Arn"], name, details)
+        if "Document" in policy:
+            self.policy_documents[policy["Arn"]] = parse_policy_document(policy["Document"])
+        for version in policy.get("PolicyVersionList", []):
+            if version.get("IsDefaultVersion"):
+                self.policy_documents[policy["Arn"]] = parse_policy_document(version["Document"])
+
+    def add_authorization_details(self, page):
+        """
+        Merges one page of GetAccountAuthorizationDetails into the graph.
+        """
+        for group in page.get("GroupDetailList", []):
+            self.add_entity(GROUP, group["Arn"], group["GroupName"], {"Path": group.get("Path")})
+            for policy in group.get("AttachedManagedPolicies", []):
+                self.attach_policy(group["Arn"], policy["PolicyArn"])
+            for policy in group.get("GroupPolicyList", []):
+                self.add_inline_policy(group["Arn"], policy["PolicyName"], policy["PolicyDocument"])
+        for role in page.get("RoleDetailList", []):
+            details = {"Path": role.get("Path")}
+            if "AssumeRolePolicyDocument" in role:
+                details["AssumeRolePolicyDocument"] = parse_policy_document(role["AssumeRolePolicyDocument"])
+            self.add_entity(ROLE, role["Arn"], role["RoleName"], details)
+            for policy in role.get("AttachedManagedPolicies", []):
+                self.attach_policy(role["Arn"], policy["PolicyArn"])
+            for policy in role.get("RolePolicyList", []):
+                self.add_inline_policy(role["Arn"], policy["PolicyName"], policy["PolicyDocument"])
+        for user in page.get("UserDetailList", []):
+            self.add_entity(USER, user["Arn"], user["UserName"], {"Path": user.get("Path")})
+            for policy in user.get("AttachedManagedPolicies", []):
+                self.attach_policy(user["Arn"], policy["PolicyArn"])
+            for policy in user.get("UserPolicyList", []):
+                self.add_inline_policy(user["Arn"], policy["PolicyName"], policy["PolicyDocument"])
+            for group_name in user.get("GroupList", []):
+                self._memberships.append((group_name, user["Arn"]))
+        for policy in page.get("Policies", []):
+            self.add_policy(policy)
+        self._resolve_memberships()
+
+    def _resolve_memberships(self):
+        """
+        Links users to groups by name once the groups are known; users and their
+        groups may arrive on different pages.
+        """
+        unresolved = []
+        for group_name, user_arn in self._memberships:
+            if group_name in self.arns_by_name[GROUP]:
+                self.add_group_member(self.arn(GROUP, group_name), user_arn)
+            else:
+                unresolved.append((group_name, user_arn))
+        self._memberships = unresolved
+
+    # Lookups
+    def arn(self, kind, name):
+        """
+        Returns the ARN of a user, group, role or policy by name.
+        Raises ValueError when several policies share the name; look those up by ARN.
+        """
+        arns = self.arns_by_name[kind][name]
+        if len(arns) > 1:
+            raise ValueError(f"Name '{name}' matches several {kind} ARNs: {', '.join(sorted(arns))}.")
+        return next(iter(arns))
+
+    def names(self, kind):
+        return sorted(self.arns_by_name[kind])
+
+    def policies_for(self, principal_arn, include_groups=True):
+        """
+        Returns the managed policy ARNs attached to a principal.
+        :param include_groups: For users, also include policies attached to their groups.
+        """
+        policies = set(self.attached_policies.get(principal_arn, ()))
+        if include_groups:
+            for group_arn in self.user_groups.get(principal_arn, ()):
+                policies |= self.attached_policies.get(group_arn, set())
+        return policies
+
+    def principals_for(self, policy_arn, expand_groups=False):
+        """
+        Returns the principal ARNs a managed policy is attached to.
+        :param expand_groups: Also include the members of attached groups.
+        """
+        principals = set(self.policy_principals.get(policy_arn, ()))
+        if expand_groups:
+            for principal_arn in list(principals):
+                principals |= self.group_members.get(principal_arn, set())
+        return principals
+
+    def documents_for(self, principal_arn, include_groups=True):
+        """
+        Returns every policy document that applies to a principal: attached managed
+        policies and inline policies, including those inherited from groups.
+        """
+        principals = [principal_arn]
+        if include_groups:
+            principals.extend(sorted(self.user_groups.get(principal_arn, ())))
+        documents = []
+        for arn in principals:
+            for policy_arn in sorted(self.attached_policies.get(arn, ())):
+                if policy_arn in self.policy_documents:
+                    documents.append(self.policy_documents[policy_arn])
+            documents.extend(self.inline_policies.get(arn, {}).values())
+        return documents
+
+    # Snapshots
+    def to_dict(self):
+        return {
+            "version": 1,
+            "entities": list(self.entities.values()),
+            "policy_documents": self.policy_documents,
+            "inline_policies": self.inline_policies,
+            "attached_policies": {arn: sorted(policies) for arn, policies in self.attached_policies.items()},
+            "group_members": {arn: sorted(users) for arn, users in self.group_members.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        inventory = cls()
+        for entity in data["entities"]:
+            details = {key: value for key, value in entity.items() if key not in ("Kind", "Name", "Arn")}
+            inventory.add_entity(entity["Kind"], entity["Arn"], entity["Name"], details)
+        inventory.policy_documents = dict(data["policy_documents"])
+        inventory.inline_policies = {arn: dict(policies) for arn, policies in data["inline_policies"].items()}
+        for principal_arn, policies in data["attached_policies"].items():
+            for policy_arn in policies:
+                inventory.attach_policy(principal_arn, policy_arn)
+        for group_arn, users in data["group_members"].items():
+            for user_arn in users:
+                inventory.add_group_member(group_arn, user_arn)
+        return inventory
+
+    def save(self, path):
+        """
+        Writes a JSON snapshot of the graph.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, default=str)
+        os.replace(tmp_path, path)
+        return f"IAM inventory saved to '{path}'."
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a snapshot written by save().
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,332 @@
+import functools
+import ipaddress
+import json
+import re
+
+from aws_wrapper.iam_inventory import parse_policy_document
+
+ALLOW = "Allow"
+EXPLICIT_DENY = "ExplicitDeny"
+IMPLICIT_DENY = "ImplicitDeny"
+
+_VARIABLE = re.compile(r"\$\{([^}]+)\}")
+
+
+class PatternTrie:
+    """
+    Trie of IAM wildcard patterns ("*" matches any run of characters, "?" matches
+    exactly one) that returns the values of every pattern matching a string.
+
+    Matching walks all live trie nodes in lockstep, one character at a time, so a
+    lookup costs O(len(text) * live nodes) no matter how many patterns share a
+    prefix. Results are memoized per input string.
+    """
+
+    __slots__ = ("case_sensitive", "_root", "_cache", "_cache_size")
+
+    class _Node:
+        __slots__ = ("children", "star", "is_star", "values")
+
+        def __init__(self, is_star=False):
+            self.children = {}
+            self.star = None
+            self.is_star = is_star
+            self.values = []
+
+    def __init__(self, case_sensitive=True, cache_size=65536):
+        self.case_sensitive = case_sensitive
+        self._root = self._Node()
+        self._cache = {}
+        self._cache_size = cache_size
+
+    def add(self, pattern, value):
+        if not self.case_sensitive:
+            pattern = pattern.lower()
+        node = self._root
+        for char in pattern:
+            if char == "*":
+                if node.is_star:
+                    continue
+                if node.star is None:
+                    node.star = self._Node(is_star=True)
+                node = node.star
+            else:
+                node = node.children.setdefault(char, self._Node())
+        node.values.append(value)
+        self._cache.clear()
+
+    @staticmethod
+    def _closure(node, states):
+        while node is not None and node not in states:
+            states.add(node)
+            node = node.star
+
+    def match(self, text):
+        """
+        Returns the set of values whose patterns match ``text``.
+        """
+        if not self.case_sensitive:
+            text = text.lower()
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        states = set()
+        self._closure(self._root, states)
+        for char in text:
+            next_states = set()
+            for node in states:
+                if node.is_star:
+                    next_states.add(node)
+                child = node.children.get(char)
+                if child is not None:
+                    self._closure(child, next_states)
+                child = node.children.get("?")
+                if child is not None:
+                    self._closure(child, next_states)
+            states = next_states
+            if not states:
+                break
+        result = frozenset(value for node in states for value in node.values)
+
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[text] = result
+        return result
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+@functools.lru_cache(maxsize=4096)
+def _wildcard_regex(pattern, case_sensitive=True):
+    regex = "".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", 0 if case_sensitive else re.IGNORECASE)
+
+
+def _substitute(pattern, context):
+    def replace(match):
+        name = match.group(1)
+        if name in ("*", "?", "$"):
+            return name
+        value = context.get(name.lower())
+        return str(value[0] if isinstance(value, list) else value) if value is not None else match.group(0)
+
+    return _VARIABLE.sub(replace, pattern)
+
+
+def _string_like(value, pattern):
+    return _wildcard_regex(pattern).match(value) is not None
+
+
+def _numeric(compare):
+    return lambda value, expected: compare(float(value), float(expected))
+
+
+def _ip_address(value, expected):
+    return ipaddress.ip_address(value) in ipaddress.ip_network(expected, strict=False)
+
+
+def _bool(value, expected):
+    return str(value).lower() == str(expected).lower()
+
+
+# Condition operator -> (match function, negated).
+CONDITION_OPERATORS = {
+    "StringEquals": (lambda value, expected: value == expected, False),
+    "StringNotEquals": (lambda value, expected: value == expected, True),
+    "StringEqualsIgnoreCase": (lambda value, expected: value.lower() == expected.lower(), False),
+    "StringNotEqualsIgnoreCase": (lambda value, expected: value.lower() == expected.lower(), True),
+    "StringLike": (_string_like, False),
+    "StringNotLike": (_string_like, True),
+    "NumericEquals": (_numeric(lambda a, b: a == b), False),
+    "NumericNotEquals": (_numeric(lambda a, b: a == b), True),
+    "NumericLessThan": (_numeric(lambda a, b: a < b), False),
+    "NumericLessThanEquals": (_numeric(lambda a, b: a <= b), False),
+    "NumericGreaterThan": (_numeric(lambda a, b: a > b), False),
+    "NumericGreaterThanEquals": (_numeric(lambda a, b: a >= b), False),
+    "Bool": (_bool, False),
+    "ArnEquals": (lambda value, expected: value == expected, False),
+    "ArnNotEquals": (lambda value, expected: value == expected, True),
+    "ArnLike": (_string_like, False),
+    "ArnNotLike": (_string_like, True),
+    "IpAddress": (_ip_address, False),
+    "NotIpAddress": (_ip_address, True),
+}
+
+
+def _compile_condition(condition):
+    """
+    Turns a Condition block into a list of (key, values, match, negated, if_exists, set_operator).
+    """
+    clauses = []
+    for operator, entries in (condition or {}).items():
+        set_operator = None
+        if ":" in operator:
+            set_operator, operator = operator.split(":", 1)
+        if_exists = operator.endswith("IfExists")
+        base = operator[: -len("IfExists")] if if_exists else operator
+        if base == "Null":
+            for key, expected in entries.items():
+                clauses.append((key.lower(), [str(v).lower() for v in _as_list(expected)], None, False, False, None))
+            continue
+        if base not in CONDITION_OPERATORS:
+            raise ValueError(f"Unsupported condition operator '{operator}'.")
+        match, negated = CONDITION_OPERATORS[base]
+        for key, expected in entries.items():
+            clauses.append((key.lower(), [str(v) for v in _as_list(expected)], match, negated, if_exists, set_operator))
+    return clauses
+
+
+def _conditions_hold(clauses, context):
+    for key, expected, match, negated, if_exists, set_operator in clauses:
+        actual = context.get(key)
+        if match is None:
+            if ("true" in expected) != (actual is None):
+                return False
+            continue
+        if actual is None:
+            if if_exists or negated or set_operator == "ForAllValues":
+                continue
+            return False
+        values = [str(v) for v in _as_list(actual)]
+        if set_operator == "ForAllValues":
+            ok = all(any(match(v, e) for e in expected) != negated for v in values)
+        elif set_operator == "ForAnyValue" and negated:
+            # At least one value matches none of the expected values.
+            ok = any(not any(match(v, e) for e in expected) for v in values)
+        else:
+            matched = any(match(v, e) for v in values for e in expected)
+            ok = not matched if negated else matched
+        if not ok:
+            return False
+    return True
+
+
+class CompiledPolicy:
+    """
+    A policy document compiled into action and resource tries.
+
+    Statement indexes are stored under each Action and Resource pattern, so the
+    statements that apply to a request are the intersection of two trie lookups;
+    NotAction/NotResource statements and resources with policy variables are
+    checked individually.
+    """
+
+    def __init__(self, document):
+        document = parse_policy_document(document)
+        self.statements = []
+        self.action_trie = PatternTrie(case_sensitive=False)
+        self.resource_trie = PatternTrie()
+        self.not_action = []
+        self.not_resource = []
+        self.variable_resources = []
+        for index, statement in enumerate(_as_list(document.get("Statement"))):
+            effect = statement.get("Effect")
+            if effect not in ("Allow", "Deny"):
+                raise ValueError(f"Invalid statement effect '{effect}'.")
+            self.statements.append((effect, _compile_condition(statement.get("Condition"))))
+
+            if "NotAction" in statement:
+                not_actions = PatternTrie(case_sensitive=False)
+                for pattern in _as_list(statement["NotAction"]):
+                    not_actions.add(pattern, index)
+                self.not_action.append((index, not_actions))
+            else:
+                for pattern in _as_list(statement.get("Action")):
+                    self.action_trie.add(pattern, index)
+
+            if "NotResource" in statement:
+                self.not_resource.append((index, [_wildcard_regex(p) for p in _as_list(statement["NotResource"])]))
+            else:
+                for pattern in _as_list(statement.get("Resource", "*")):
+                    if "${" in pattern:
+                        self.variable_resources.append((index, pattern))
+                    else:
+                        self.resource_trie.add(pattern, index)
+
+    def matching_statements(self, action, resource, context):
+        actions = set(self.action_trie.match(action))
+        for index, trie in self.not_action:
+            if not trie.match(action):
+                actions.add(index)
+        if not actions:
+            return []
+
+        resources = set(self.resource_trie.match(resource))
+        for index, patterns in self.not_resource:
+            if index in actions and not any(p.match(resource) for p in patterns):
+                resources.add(index)
+        for index, pattern in self.variable_resources:
+            if index in actions and index not in resources:
+                if _wildcard_regex(_substitute(pattern, context)).match(resource):
+                    resources.add(index)
+        return [index for index in actions & resources if _conditions_hold(self.statements[index][1], context)]
+
+    def evaluate(self, action, resource, context):
+        decision = IMPLICIT_DENY
+        for index in self.matching_statements(action, resource, context):
+            if self.statements[index][0] == "Deny":
+                return EXPLICIT_DENY
+            decision = ALLOW
+        return decision
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_canonical(canonical_document):
+    return CompiledPolicy(json.loads(canonical_document))
+
+
+def compile_policy(document):
+    """
+    Compiles a policy document, reusing the compiled form of identical documents.
+    """
+    document = parse_policy_document(document)
+    return _compile_canonical(json.dumps(document, sort_keys=True))
+
+
+class PolicyEvaluator:
+    """
+    Offline identity-policy evaluator for "can this principal do this action on
+    this resource" checks.
+
+    Follows IAM's evaluation order: an explicit Deny in any policy wins, otherwise
+    any Allow grants access, otherwise access is implicitly denied. Permission
+    boundaries, SCPs and resource-based policies are not considered.
+    """
+
+    def __init__(self, documents):
+        """
+        :param documents: Policy documents (dicts or JSON strings) that apply to the principal.
+        """
+        self.policies = [compile_policy(document) for document in documents]
+
+    @classmethod
+    def for_principal(cls, inventory, principal_arn):
+        """
+        Builds an evaluator from every policy an IAMInventory attaches to a principal.
+        """
+        return cls(inventory.documents_for(principal_arn))
+
+    def evaluate(self, action, resource="*", context=None):
+        """
+        :param action: Action such as "s3:GetObject".
+        :param resource: Resource ARN.
+        :param context: Condition context keys such as {"aws:SourceIp": "10.0.0.1"} (optional).
+        :return: "Allow", "ExplicitDeny" or "ImplicitDeny".
+        """
+        context = {key.lower(): value for key, value in (context or {}).items()}
+        decision = IMPLICIT_DENY
+        for policy in self.policies:
+            result = policy.evaluate(action, resource, context)
+            if result == EXPLICIT_DENY:
+                return EXPLICIT_DENY
+            if result == ALLOW:
+                decision = ALLOW
+        return decision
+
+    def is_allowed(self, action, resource="*", context=None):
+        return self.evaluate(action, resource, context) == ALLOW
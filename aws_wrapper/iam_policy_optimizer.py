@@ -0,0 +1,206 @@
+import functools
+import json
+import os
+
+from aws_wrapper.iam_inventory import parse_policy_document
+from aws_wrapper.iam_policy import _as_list, _wildcard_regex
+
+# IAM counts managed policy size in characters, excluding whitespace.
+MANAGED_POLICY_SIZE_LIMIT = 6144
+
+ACTION_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "iam_actions.json")
+
+
+@functools.lru_cache(maxsize=None)
+def load_action_catalog(path=ACTION_CATALOG_PATH):
+    """
+    Loads an action catalog: a JSON object mapping service prefix to every action
+    name the service defines, e.g. {"sqs": ["CreateQueue", ...]}.
+    """
+    with open(path) as f:
+        return {service.lower(): tuple(actions) for service, actions in json.load(f).items()}
+
+
+def minify(document):
+    """
+    Serializes a policy document without whitespace.
+    """
+    return json.dumps(document, separators=(",", ":"))
+
+
+def _policy_size(document):
+    return len("".join(minify(document).split()))
+
+
+def _scalar_or_list(values):
+    return values[0] if len(values) == 1 else values
+
+
+def _dedupe(patterns, case_sensitive):
+    """
+    Drops duplicates and patterns already covered by a wildcard in the same list,
+    keeping first-seen order.
+    """
+    seen, unique = set(), []
+    for pattern in patterns:
+        key = pattern if case_sensitive else pattern.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(pattern)
+    wildcards = [p for p in unique if "*" in p or "?" in p]
+    return [
+        pattern for pattern in unique
+        if not any(w != pattern and _wildcard_regex(w, case_sensitive).match(pattern) for w in wildcards)
+    ]
+
+
+def _collapse_service(service_actions, granted):
+    """
+    Replaces every group of actions that covers all catalog actions sharing a name
+    prefix with that prefix plus "*". Prefixes end on a word boundary ("Get*",
+    "ListQueue*", never "G*"). Returns the prefixes and the actions left over.
+    """
+    by_lower = {action.lower(): action for action in service_actions}
+    granted = {action.lower() for action in granted} & set(by_lower)
+    if not granted:
+        return [], set()
+
+    # Shortest prefix first, so the widest fully-granted prefix wins.
+    prefixes = sorted(
+        {by_lower[name][:i] for name in granted for i in range(len(name)) if i == 0 or by_lower[name][i].isupper()},
+        key=lambda p: (len(p), p),
+    )
+    patterns, covered = [], set()
+    for prefix in prefixes:
+        if any(prefix.lower().startswith(p.lower()) for p in patterns):
+            continue
+        members = {name for name in by_lower if name.startswith(prefix.lower())}
+        if len(members) > 1 and members <= granted:
+            patterns.append(prefix)
+            covered |= members
+    return patterns, granted - covered
+
+
+def collapse_actions(actions, catalog=None):
+    """
+    Rewrites explicit actions as wildcards where that grants nothing extra according
+    to the catalog: "sqs:Get*" replaces "sqs:GetQueueAttributes" and "sqs:GetQueueUrl"
+    only if the catalog lists no other sqs:Get action, and "sqs:*" replaces the lot
+    when every sqs action is listed. Services that are not in the catalog and actions
+    that already contain wildcards are left untouched.
+
+    The catalog is a snapshot; a wildcard also matches actions a service adds later.
+    """
+    catalog = load_action_catalog() if catalog is None else catalog
+    by_service, result = {}, []
+    for action in actions:
+        service, _, name = action.partition(":")
+        if service.lower() in catalog and name and "*" not in name and "?" not in name:
+            by_service.setdefault(service.lower(), []).append(name)
+        else:
+            result.append(action)
+
+    for service, names in by_service.items():
+        known = {action.lower() for action in catalog[service]}
+        original = {name.lower(): name for name in names}
+        patterns, remaining = _collapse_service(catalog[service], names)
+        result.extend(f"{service}:{prefix}*" for prefix in patterns)
+        result.extend(f"{service}:{original[name]}" for name in sorted(remaining))
+        result.extend(f"{service}:{name}" for name in names if name.lower() not in known)
+    return result
+
+
+def _statement_key(statement, *fields):
+    return tuple(json.dumps(statement.get(field), sort_keys=True) for field in fields)
+
+
+def _merge(statements, shared, merged):
+    """
+    Merges statements that agree on everything except ``merged`` (a list field),
+    unioning that field. Only statements whose other list field is identical are
+    combined, so the merge never grants an action on a resource it did not before.
+    """
+    groups, order = {}, []
+    for statement in statements:
+        if merged not in statement or any(f"Not{field}" in statement for field in ("Action", "Resource")):
+            order.append([statement])
+            continue
+        key = _statement_key(statement, "Effect", "Condition", "Principal", "NotPrincipal", shared)
+        if key not in groups:
+            groups[key] = []
+            order.append(groups[key])
+        groups[key].append(statement)
+
+    result = []
+    for group in order:
+        if len(group) == 1:
+            result.append(group[0])
+            continue
+        combined = dict(group[0])
+        combined.pop("Sid", None)
+        combined[merged] = [value for statement in group for value in statement[merged]]
+        result.append(combined)
+    return result
+
+
+def _normalize(statement):
+    statement = dict(statement)
+    for field in ("Action", "NotAction", "Resource", "NotResource"):
+        if field in statement:
+            statement[field] = _as_list(statement[field])
+    return statement
+
+
+def optimize_policy_document(document, catalog=None, collapse=True, keep_sids=False):
+    """
+    Shrinks a policy document without changing what it allows or denies.
+
+    Statements with the same effect, conditions and resources are merged into one
+    with the union of their actions (and likewise for identical actions), duplicate
+    and wildcard-shadowed actions and resources are dropped, explicit actions are
+    collapsed into catalog-safe wildcards, and the result is minified.
+    :param document: Policy document as a dict or JSON string.
+    :param catalog: Action catalog (defaults to the bundled iam_actions.json).
+    :param collapse: Collapse action lists into wildcards.
+    :param keep_sids: Keep statement Sids (a merged statement always loses its Sid).
+    :return: Tuple of (minified JSON string, report dictionary).
+    """
+    original_json = document if isinstance(document, str) else json.dumps(document)
+    document = parse_policy_document(document)
+    statements = [_normalize(s) for s in _as_list(document.get("Statement"))]
+
+    merged = _merge(statements, "Resource", "Action")
+    merged = _merge(merged, "Action", "Resource")
+
+    optimized_statements = []
+    for statement in merged:
+        statement = dict(statement)
+        if not keep_sids:
+            statement.pop("Sid", None)
+        for field in ("Action", "NotAction"):
+            if field in statement:
+                actions = _dedupe(statement[field], case_sensitive=False)
+                if collapse and field == "Action":
+                    actions = collapse_actions(actions, catalog)
+                statement[field] = _scalar_or_list(actions)
+        for field in ("Resource", "NotResource"):
+            if field in statement:
+                statement[field] = _scalar_or_list(_dedupe(statement[field], case_sensitive=True))
+        optimized_statements.append(statement)
+
+    optimized = {key: value for key, value in document.items() if key != "Statement"}
+    optimized["Statement"] = optimized_statements
+    optimized_json = minify(optimized)
+
+    report = {
+        "original_bytes": len(original_json.encode("utf-8")),
+        "optimized_bytes": len(optimized_json.encode("utf-8")),
+        "statements_before": len(statements),
+        "statements_after": len(optimized_statements),
+        "original_size": _policy_size(document),
+        "optimized_size": _policy_size(optimized),
+        "size_limit": MANAGED_POLICY_SIZE_LIMIT,
+    }
+    report["saved_bytes"] = report["original_bytes"] - report["optimized_bytes"]
+    report["fits"] = report["optimized_size"] <= MANAGED_POLICY_SIZE_LIMIT
+    return optimized_json, report
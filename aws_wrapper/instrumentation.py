@@ -0,0 +1,584 @@
+import functools
+import inspect
+import math
+import os
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# Checked on every wrapper call; see enable() and disable().
+_enabled = False
+_instrumentation = None
+_local = threading.local()
+
+# Quantiles reported by snapshot() and the Prometheus exporter.
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Limits of a single PutMetricData request and of one datum's Values list.
+CLOUDWATCH_MAX_DATUMS = 1000
+CLOUDWATCH_MAX_VALUES = 150
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of durations, after HdrHistogram.
+
+    Durations are stored in whole microseconds. Values below 2**significant_bits
+    get a bucket each; above that, every power of two is split into
+    2**(significant_bits - 1) equal buckets. With the default of 7 bits, every
+    recorded value is within 1.6% of its bucket, at any magnitude, and recording
+    is a dictionary increment.
+    """
+
+    __slots__ = ("significant_bits", "counts", "count", "total", "min", "max")
+
+    def __init__(self, significant_bits=7):
+        self.significant_bits = significant_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        exponent = value.bit_length() - self.significant_bits
+        if exponent <= 0:
+            return value
+        return (exponent << (self.significant_bits - 1)) + (value >> exponent)
+
+    def _bucket_value(self, index):
+        # Midpoint of the bucket, in microseconds.
+        half = 1 << (self.significant_bits - 1)
+        if index < 2 * half:
+            return index
+        exponent = (index >> (self.significant_bits - 1)) - 1
+        mantissa = index - exponent * half
+        return (mantissa << exponent) + ((1 << exponent) >> 1)
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """
+        Returns the duration, in seconds, below which ``fraction`` of the recorded
+        durations fall, or None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        target = max(1, math.ceil(fraction * self.count))
+        if target >= self.count:
+            return self.max / 1_000_000
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self._bucket_value(index), self.min), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def buckets(self):
+        """
+        Returns [(seconds, count)] for every non-empty bucket, shortest first.
+        """
+        return [(self._bucket_value(index) / 1_000_000, self.counts[index]) for index in sorted(self.counts)]
+
+    def copy(self):
+        histogram = LatencyHistogram(self.significant_bits)
+        histogram.counts = dict(self.counts)
+        histogram.count, histogram.total, histogram.min, histogram.max = self.count, self.total, self.min, self.max
+        return histogram
+
+
+class OperationMetrics:
+    """
+    Everything recorded for one wrapper method, e.g. "Storage.upload_file".
+    """
+
+    __slots__ = ("latency", "calls", "errors", "requests", "retries", "bytes_in", "bytes_out")
+
+    def __init__(self, significant_bits=7):
+        self.latency = LatencyHistogram(significant_bits)
+        self.calls = 0
+        self.errors = {}
+        self.requests = 0
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def copy(self):
+        metrics = OperationMetrics()
+        metrics.latency = self.latency.copy()
+        metrics.calls, metrics.errors, metrics.requests = self.calls, dict(self.errors), self.requests
+        metrics.retries, metrics.bytes_in, metrics.bytes_out = self.retries, self.bytes_in, self.bytes_out
+        return metrics
+
+
+class _Frame:
+    # Client activity of the wrapper call running on this thread.
+    __slots__ = ("requests", "attempts", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class Instrumentation:
+    """
+    Collects per-operation metrics for the service wrappers and hands them to
+    exporters.
+
+    Only one Instrumentation records at a time: the one passed to enable().
+    """
+
+    def __init__(self, exporters=None, significant_bits=7):
+        """
+        :param exporters: Exporters called by export() (optional), e.g.
+            [InMemoryExporter(), PrometheusExporter("metrics.prom")].
+        :param significant_bits: Precision of the latency histograms; see LatencyHistogram.
+        """
+        self.exporters = list(exporters or [])
+        self.significant_bits = significant_bits
+        self.operations = {}
+        # Incremented by reset(), so exporters know earlier totals no longer apply.
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, name, seconds, frame=None, error=None):
+        with self._lock:
+            metrics = self.operations.get(name)
+            if metrics is None:
+                metrics = self.operations[name] = OperationMetrics(self.significant_bits)
+            metrics.latency.record(seconds)
+            metrics.calls += 1
+            if error is not None:
+                metrics.errors[error] = metrics.errors.get(error, 0) + 1
+            if frame is not None:
+                metrics.requests += frame.requests
+                metrics.retries += frame.attempts - frame.requests
+                metrics.bytes_in += frame.bytes_in
+                metrics.bytes_out += frame.bytes_out
+
+    def frozen(self):
+        """
+        Returns a consistent copy of every operation's OperationMetrics.
+        """
+        return self.checkpoint()[1]
+
+    def checkpoint(self):
+        """
+        Returns (generation, frozen()) read together, so a caller that diffs
+        successive copies can tell when reset() came between them.
+        """
+        with self._lock:
+            return self.generation, {name: metrics.copy() for name, metrics in self.operations.items()}
+
+    def snapshot(self):
+        """
+        Returns {operation: {"calls", "errors": {error class: count}, "requests",
+        "retries", "bytes_in", "bytes_out", "latency": {"p50", "p90", "p99", "p999",
+        "min", "max", "mean"}}}, latencies in seconds.
+        """
+        snapshot = {}
+        for name, metrics in sorted(self.frozen().items()):
+            histogram = metrics.latency
+            latency = {f"p{str(q)[2:].ljust(2, '0')}": histogram.percentile(q) for q in QUANTILES}
+            latency.update(
+                min=histogram.min / 1_000_000 if histogram.min is not None else None,
+                max=histogram.max / 1_000_000,
+                mean=histogram.total / histogram.count / 1_000_000 if histogram.count else None,
+            )
+            snapshot[name] = {
+                "calls": metrics.calls,
+                "errors": dict(metrics.errors),
+                "requests": metrics.requests,
+                "retries": metrics.retries,
+                "bytes_in": metrics.bytes_in,
+                "bytes_out": metrics.bytes_out,
+                "latency": latency,
+            }
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.generation += 1
+        return "Instrumentation reset."
+
+    def export(self):
+        """
+        Passes the current metrics to every exporter.
+        :return: List of the exporters' return values.
+        """
+        return [exporter.export(self) for exporter in self.exporters]
+
+    def start_exporting(self, interval=60.0):
+        """
+        Calls export() every ``interval`` seconds on a background thread until
+        stop_exporting() is called.
+        """
+        def run():
+            try:
+                self.export()
+            finally:
+                if self._timer is not None:
+                    self.start_exporting(interval)
+
+        self._timer = threading.Timer(interval, run)
+        self._timer.daemon = True
+        self._timer.start()
+        return f"Exporting metrics every {interval} seconds."
+
+    def stop_exporting(self):
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        return "Stopped exporting metrics."
+
+
+def enable(instrumentation=None):
+    """
+    Starts recording every wrapper call.
+    :param instrumentation: Instrumentation to record into (a new one by default).
+    :return: The Instrumentation now recording.
+    """
+    global _enabled, _instrumentation
+    _instrumentation = instrumentation or _instrumentation or Instrumentation()
+    _enabled = True
+    return _instrumentation
+
+
+def disable():
+    """
+    Stops recording. Wrapper calls then cost one global lookup more than an
+    uninstrumented call.
+    """
+    global _enabled
+    _enabled = False
+    return "Instrumentation disabled."
+
+
+def current():
+    """
+    Returns the Instrumentation that is recording, or None when disabled.
+    """
+    return _instrumentation if _enabled else None
+
+
+# Recording wrapper calls
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _error_class(error):
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") or type(error).__name__
+    return type(error).__name__
+
+
+def _timed_call(name, method, args, kwargs):
+    instrumentation = _instrumentation
+    frame = _Frame()
+    stack = _stack()
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        result = method(*args, **kwargs)
+    except Exception as e:
+        instrumentation.record(name, time.perf_counter() - start, frame, _error_class(e))
+        raise
+    finally:
+        stack.pop()
+    instrumentation.record(name, time.perf_counter() - start, frame)
+    return result
+
+
+class _TimedIterator:
+    """
+    Wraps the generator returned by a lazy wrapper method. Only the time spent
+    producing items counts; the call is recorded when the generator is exhausted,
+    fails or is closed.
+    """
+
+    def __init__(self, name, iterator):
+        self._name = name
+        self._iterator = iterator
+        self._instrumentation = _instrumentation
+        self._frame = _Frame()
+        self._elapsed = 0.0
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        stack = _stack()
+        stack.append(self._frame)
+        start = time.perf_counter()
+        try:
+            item = next(self._iterator)
+        except StopIteration:
+            self._finish(start)
+            raise
+        except Exception as e:
+            self._finish(start, _error_class(e))
+            raise
+        finally:
+            stack.pop()
+        self._elapsed += time.perf_counter() - start
+        return item
+
+    def _finish(self, start=None, error=None):
+        if self._done:
+            return
+        self._done = True
+        if start is not None:
+            self._elapsed += time.perf_counter() - start
+        self._instrumentation.record(self._name, self._elapsed, self._frame, error)
+
+    def close(self):
+        self._iterator.close()
+        self._finish()
+
+
+def _wrap(name, method):
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return method(*args, **kwargs)
+            return _TimedIterator(name, method(*args, **kwargs))
+    else:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return method(*args, **kwargs)
+            return _timed_call(name, method, args, kwargs)
+    return wrapper
+
+
+def instrumented(cls):
+    """
+    Class decorator that records every public method of a wrapper class as
+    "<Class>.<method>" while instrumentation is enabled.
+    """
+    for name, value in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(value):
+            setattr(cls, name, _wrap(f"{cls.__name__}.{name}", value))
+    return cls
+
+
+# Recording client requests
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    if hasattr(body, "seek") and hasattr(body, "tell"):
+        try:
+            position = body.tell()
+            size = body.seek(0, os.SEEK_END)
+            body.seek(position)
+            return size - position
+        except (OSError, ValueError):
+            return 0
+    return 0
+
+
+def _on_attempt(attempts=1, request_dict=None, response=None, operation=None, **kwargs):
+    stack = getattr(_local, "stack", None)
+    if not stack:
+        return None
+    frame = stack[-1]
+    frame.attempts += 1
+    if attempts == 1:
+        frame.requests += 1
+    if request_dict is not None:
+        headers = request_dict.get("headers") or {}
+        # Chunked uploads (S3 checksums) only declare their payload size in a header.
+        length = headers.get("X-Amz-Decoded-Content-Length") or headers.get("Content-Length")
+        frame.bytes_out += int(length) if length is not None else _body_size(request_dict.get("body"))
+    if response is not None:
+        http_response = response[0]
+        length = http_response.headers.get("content-length")
+        if length is not None:
+            frame.bytes_in += int(length)
+        elif operation is None or not operation.has_streaming_output:
+            frame.bytes_in += len(http_response.content or b"")
+    return None
+
+
+def track_client(client):
+    """
+    Counts the requests, retries and bytes of a botocore client's calls towards
+    the wrapper call that made them. Tracking the same client again has no effect.
+    :return: The client.
+    """
+    service = client.meta.service_model.service_id.hyphenize()
+    client.meta.events.register(f"needs-retry.{service}", _on_attempt, unique_id=f"aws-wrapper-instrumentation-{service}")
+    return client
+
+
+# Exporters
+class InMemoryExporter:
+    """
+    Keeps every exported snapshot, most recent last.
+    """
+
+    def __init__(self, max_snapshots=100):
+        self.max_snapshots = max_snapshots
+        self.snapshots = []
+
+    @property
+    def latest(self):
+        return self.snapshots[-1] if self.snapshots else {}
+
+    def export(self, instrumentation):
+        self.snapshots.append(instrumentation.snapshot())
+        del self.snapshots[:-self.max_snapshots]
+        return self.snapshots[-1]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(instrumentation, prefix="aws_wrapper"):
+    """
+    Renders the current metrics in the Prometheus text exposition format.
+    """
+    snapshot = instrumentation.snapshot()
+    counters = [
+        ("calls_total", "Wrapper method calls.", "calls"),
+        ("requests_total", "AWS API requests made by wrapper methods.", "requests"),
+        ("retries_total", "AWS API requests retried.", "retries"),
+        ("bytes_in_total", "Response bytes received.", "bytes_in"),
+        ("bytes_out_total", "Request bytes sent.", "bytes_out"),
+    ]
+    lines = []
+    for suffix, description, field in counters:
+        lines += [f"# HELP {prefix}_{suffix} {description}", f"# TYPE {prefix}_{suffix} counter"]
+        lines += [f'{prefix}_{suffix}{{operation="{_label(name)}"}} {values[field]}' for name, values in snapshot.items()]
+
+    lines += [f"# HELP {prefix}_errors_total Wrapper method calls that raised, by error class.",
+              f"# TYPE {prefix}_errors_total counter"]
+    for name, values in snapshot.items():
+        for error, count in sorted(values["errors"].items()):
+            lines.append(f'{prefix}_errors_total{{operation="{_label(name)}",error="{_label(error)}"}} {count}')
+
+    lines += [f"# HELP {prefix}_latency_seconds Wrapper method latency.", f"# TYPE {prefix}_latency_seconds summary"]
+    for name, metrics in sorted(instrumentation.frozen().items()):
+        histogram, operation = metrics.latency, _label(name)
+        for quantile in QUANTILES:
+            lines.append(f'{prefix}_latency_seconds{{operation="{operation}",quantile="{quantile}"}} '
+                         f'{histogram.percentile(quantile):.6f}')
+        lines.append(f'{prefix}_latency_seconds_sum{{operation="{operation}"}} {histogram.total / 1_000_000:.6f}')
+        lines.append(f'{prefix}_latency_seconds_count{{operation="{operation}"}} {histogram.count}')
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """
+    Renders metrics in the Prometheus text format, optionally to a file for the
+    node_exporter textfile collector.
+    """
+
+    def __init__(self, path=None, prefix="aws_wrapper"):
+        """
+        :param path: File to write on each export (optional).
+        :param prefix: Prefix of every metric name.
+        """
+        self.path = path
+        self.prefix = prefix
+        self.text = ""
+
+    def export(self, instrumentation):
+        self.text = prometheus_text(instrumentation, self.prefix)
+        if self.path:
+            # Write then rename, so scrapers never read a half-written file.
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w") as f:
+                f.write(self.text)
+            os.replace(temporary, self.path)
+        return self.text
+
+
+class CloudWatchExporter:
+    """
+    Publishes metrics to CloudWatch with batched PutMetricData calls.
+
+    Each export sends only what was recorded since the previous one: counters
+    as Count sums and latencies as histogram Values/Counts, so CloudWatch can
+    compute percentiles across exports and hosts.
+    """
+
+    def __init__(self, cloudwatch, namespace="AWSWrapper", batch_size=CLOUDWATCH_MAX_DATUMS, dimensions=None):
+        """
+        :param cloudwatch: CloudWatch wrapper to publish through.
+        :param namespace: Metric namespace.
+        :param batch_size: Metric data items per PutMetricData call.
+        :param dimensions: Extra dimensions added to every metric, e.g. {"Host": "web-1"} (optional).
+        """
+        self.cloudwatch = cloudwatch
+        self.namespace = namespace
+        self.batch_size = min(batch_size, CLOUDWATCH_MAX_DATUMS)
+        self.dimensions = [{"Name": k, "Value": v} for k, v in (dimensions or {}).items()]
+        self._previous = {}
+        self._generation = None
+
+    def _metric_data(self, name, metrics, previous):
+        dimensions = [{"Name": "Operation", "Value": name}] + self.dimensions
+        data = []
+        counters = [
+            ("Calls", "Count", metrics.calls - previous.calls),
+            ("Errors", "Count", sum(metrics.errors.values()) - sum(previous.errors.values())),
+            ("Retries", "Count", metrics.retries - previous.retries),
+            ("BytesIn", "Bytes", metrics.bytes_in - previous.bytes_in),
+            ("BytesOut", "Bytes", metrics.bytes_out - previous.bytes_out),
+        ]
+        for metric_name, unit, value in counters:
+            if value:
+                data.append({"MetricName": metric_name, "Dimensions": dimensions, "Value": value, "Unit": unit})
+
+        histogram, before = metrics.latency, previous.latency.counts
+        buckets = [
+            (histogram._bucket_value(index) / 1000, count - before.get(index, 0))
+            for index, count in sorted(histogram.counts.items()) if count > before.get(index, 0)
+        ]
+        for start in range(0, len(buckets), CLOUDWATCH_MAX_VALUES):
+            chunk = buckets[start:start + CLOUDWATCH_MAX_VALUES]
+            data.append({
+                "MetricName": "Latency",
+                "Dimensions": dimensions,
+                "Values": [value for value, _ in chunk],
+                "Counts": [count for _, count in chunk],
+                "Unit": "Milliseconds",
+            })
+        return data
+
+    def export(self, instrumentation):
+        generation, current = instrumentation.checkpoint()
+        if generation != self._generation:
+            # Reset since the last export: everything recorded now is new.
+            self._previous = {}
+        data = []
+        for name, metrics in sorted(current.items()):
+            data += self._metric_data(name, metrics, self._previous.get(name) or OperationMetrics(metrics.latency.significant_bits))
+        for start in range(0, len(data), self.batch_size):
+            self.cloudwatch.cloudwatch.put_metric_data(Namespace=self.namespace, MetricData=data[start:start + self.batch_size])
+        self._previous, self._generation = current, generation
+        requests = math.ceil(len(data) / self.batch_size)
+        return f"Published {len(data)} metric data item(s) to '{self.namespace}' in {requests} request(s)."
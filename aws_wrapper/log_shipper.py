@@ -0,0 +1,228 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+# PutLogEvents limits.
+MAX_BATCH_BYTES = 1_048_576
+MAX_BATCH_EVENTS = 10_000
+MAX_BATCH_SPAN_MS = 24 * 60 * 60 * 1000
+EVENT_OVERHEAD_BYTES = 26
+MAX_EVENT_BYTES = 262_144 - EVENT_OVERHEAD_BYTES
+
+RETRYABLE_ERRORS = {
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "InternalFailure",
+    "RequestLimitExceeded",
+}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def truncate_message(message):
+    """
+    Cuts a message down to the largest size PutLogEvents accepts for one event.
+    """
+    encoded = message.encode("utf-8")
+    if len(encoded) <= MAX_EVENT_BYTES:
+        return message, len(encoded)
+    message = encoded[:MAX_EVENT_BYTES].decode("utf-8", errors="ignore")
+    return message, len(message.encode("utf-8"))
+
+
+def split_log_batches(events):
+    """
+    Sorts log events by timestamp and splits them into valid PutLogEvents batches.
+    A batch never exceeds 1 MB (including the per-event overhead), 10,000 events,
+    or a 24-hour span between its first and last event. Oversized messages are
+    truncated to the per-event limit instead of failing the whole batch.
+    :param events: Iterable of {"timestamp": epoch_ms, "message": str} dictionaries.
+    :return: List of batches, each a chronologically ordered list of events.
+    """
+    batches = []
+    batch, batch_bytes = [], 0
+    for event in sorted(events, key=lambda event: event["timestamp"]):
+        message, size = truncate_message(event["message"])
+        size += EVENT_OVERHEAD_BYTES
+        if batch and (
+            batch_bytes + size > MAX_BATCH_BYTES
+            or len(batch) >= MAX_BATCH_EVENTS
+            or event["timestamp"] - batch[0]["timestamp"] > MAX_BATCH_SPAN_MS
+        ):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append({"timestamp": event["timestamp"], "message": message})
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class LogShipper:
+    """
+    Buffers log records from any number of threads and ships them to CloudWatch
+    Logs in the background.
+
+    ``ship`` only appends to an in-memory buffer, so callers never wait on the
+    network. A flusher thread drains the buffers into valid batches, sends
+    different streams concurrently and keeps at most one send in flight per
+    stream so each stream is written in order.
+    """
+
+    def __init__(self, cloudwatch, flush_interval=1.0, max_workers=4, max_retries=5, create_missing_streams=True):
+        """
+        :param cloudwatch: CloudWatch wrapper whose logs client is used for sending.
+        :param flush_interval: Seconds between background flushes.
+        :param max_workers: Number of streams shipped concurrently.
+        :param max_retries: Attempts per batch on throttling and transient errors.
+        :param create_missing_streams: Create the log stream when it does not exist yet.
+        """
+        self.cloudwatch = cloudwatch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.create_missing_streams = create_missing_streams
+        self.stats = {"events_sent": 0, "batches_sent": 0, "events_rejected": 0, "events_failed": 0}
+        self._buffers = {}
+        self._in_flight = set()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+        self._thread.start()
+
+    def ship(self, log_group_name, log_stream_name, message, timestamp=None):
+        """
+        Queues one log record without blocking.
+        :param log_group_name: Name of the log group.
+        :param log_stream_name: Name of the log stream.
+        :param message: Log message.
+        :param timestamp: Event time in epoch milliseconds; defaults to now.
+        """
+        if timestamp is None:
+            timestamp = _now_ms()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("LogShipper is closed.")
+            self._buffers.setdefault((log_group_name, log_stream_name), []).append(
+                {"timestamp": timestamp, "message": message}
+            )
+
+    def flush(self, timeout=None):
+        """
+        Ships everything buffered so far and waits until it has been sent.
+        :param timeout: Maximum seconds to wait.
+        :return: True if all buffered records were sent before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._dispatch()
+            while self._buffers or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+                self._dispatch()
+        return True
+
+    def close(self, timeout=None):
+        """
+        Flushes buffered records and stops the background threads.
+        """
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=flushed)
+        return flushed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                self._dispatch()
+                self._condition.wait(self.flush_interval)
+
+    def _dispatch(self):
+        """
+        Hands every idle stream's buffer to the executor. Caller holds the lock.
+        """
+        for key in [key for key in self._buffers if key not in self._in_flight]:
+            events = self._buffers.pop(key)
+            self._in_flight.add(key)
+            self._executor.submit(self._ship_stream, key, events)
+
+    def _ship_stream(self, key, events):
+        try:
+            for batch in split_log_batches(events):
+                self._send_batch(key, batch)
+        finally:
+            with self._condition:
+                self._in_flight.discard(key)
+                self._condition.notify_all()
+
+    def _send_batch(self, key, batch):
+        log_group_name, log_stream_name = key
+        delay = 0.1
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = self.cloudwatch.logs.put_log_events(
+                    logGroupName=log_group_name,
+                    logStreamName=log_stream_name,
+                    logEvents=batch,
+                )
+            except ClientError as error:
+                code = error.response["Error"]["Code"]
+                if (
+                    code == "ResourceNotFoundException"
+                    and self.create_missing_streams
+                    and attempt == 1
+                    and self._create_stream(log_group_name, log_stream_name)
+                ):
+                    continue
+                if code in RETRYABLE_ERRORS and attempt < self.max_retries:
+                    time.sleep(random.uniform(0, delay))
+                    delay = min(delay * 2, 5.0)
+                    continue
+                self._fail_batch(batch)
+                return
+            except Exception:
+                # Connection errors and the like: the batch is lost, not the worker.
+                self._fail_batch(batch)
+                return
+            rejected = response.get("rejectedLogEventsInfo", {})
+            rejected_count = 0
+            if "tooOldLogEventEndIndex" in rejected:
+                rejected_count += rejected["tooOldLogEventEndIndex"]
+            if "expiredLogEventEndIndex" in rejected:
+                rejected_count = max(rejected_count, rejected["expiredLogEventEndIndex"])
+            if "tooNewLogEventStartIndex" in rejected:
+                rejected_count += len(batch) - rejected["tooNewLogEventStartIndex"]
+            with self._condition:
+                self.stats["events_sent"] += len(batch) - rejected_count
+                self.stats["events_rejected"] += rejected_count
+                self.stats["batches_sent"] += 1
+            return
+        # Every attempt was used up, e.g. by creating the stream when max_retries is 1.
+        self._fail_batch(batch)
+
+    def _fail_batch(self, batch):
+        with self._condition:
+            self.stats["events_failed"] += len(batch)
+
+    def _create_stream(self, log_group_name, log_stream_name):
+        try:
+            self.cloudwatch.logs.create_log_stream(logGroupName=log_group_name, logStreamName=log_stream_name)
+        except ClientError as error:
+            return error.response["Error"]["Code"] == "ResourceAlreadyExistsException"
+        return True
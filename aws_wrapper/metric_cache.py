@@ -0,0 +1,278 @@
+import base64
+import bisect
+import datetime
+import json
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# GetMetricStatistics returns at most this many datapoints per request.
+MAX_DATAPOINTS_PER_REQUEST = 1440
+
+
+def _to_epoch(value):
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def _to_datetime(epoch):
+    return datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+
+
+class _Segment:
+    """
+    A contiguous, fully fetched time range [start, end) of one series.
+    """
+
+    __slots__ = ("start", "end", "timestamps", "values")
+
+    def __init__(self, start, end, timestamps, values):
+        self.start = start
+        self.end = end
+        self.timestamps = timestamps
+        self.values = values
+
+
+class MetricCache:
+    """
+    Caches finalized CloudWatch datapoints so repeated range queries only fetch
+    the parts of the range that are missing or still mutable.
+
+    Series are keyed by (namespace, metric name, dimensions, statistic, period) and
+    stored as sorted array-backed segments. Datapoints newer than
+    ``mutable_window`` seconds are always re-fetched and never cached.
+    """
+
+    def __init__(self, cloudwatch, max_points=1_000_000, mutable_window=900, path=None):
+        """
+        :param cloudwatch: CloudWatch wrapper used to fetch datapoints.
+        :param max_points: Upper bound on cached datapoints; least recently used series are evicted
+            first, and a single series over the bound loses its oldest datapoints.
+        :param mutable_window: Age in seconds below which datapoints may still change.
+        :param path: Optional file the cache is loaded from and saved to.
+        """
+        self.cloudwatch = cloudwatch
+        self.max_points = max_points
+        self.mutable_window = mutable_window
+        self.path = path
+        self._series = OrderedDict()
+        self._points = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def _key(namespace, metric_name, dimensions, statistic, period):
+        dims = tuple(sorted((d["Name"], d["Value"]) for d in dimensions or []))
+        return (namespace, metric_name, dims, statistic, int(period))
+
+    def get_metric_statistics(self, namespace, metric_name, start_time, end_time, period, statistic, dimensions=None):
+        """
+        Returns datapoints for one statistic, serving finalized ranges from the cache.
+        :param namespace: Namespace of the metric.
+        :param metric_name: Name of the metric.
+        :param start_time: Start of the range (datetime or epoch seconds).
+        :param end_time: End of the range (datetime or epoch seconds).
+        :param period: Period in seconds.
+        :param statistic: Statistic to fetch (e.g., "Average").
+        :param dimensions: Dimensions for the metric (optional).
+        :return: Tuple of (timestamps, values) arrays sorted by timestamp, in epoch seconds.
+        """
+        key = self._key(namespace, metric_name, dimensions, statistic, period)
+        start = (_to_epoch(start_time) // period) * period
+        end = _to_epoch(end_time)
+        final_end = max(start, ((time.time() - self.mutable_window) // period) * period)
+        cached_end = min(end, final_end)
+
+        # The result is built from what was cached and what was fetched, not
+        # re-read after storing, since storing may evict points under max_points.
+        gaps, timestamps, values = self._lookup(key, start, cached_end)
+        if gaps:
+            points = dict(zip(timestamps, values))
+            for gap_start, gap_end in gaps:
+                gap_timestamps, gap_values = self._fetch(key, gap_start, gap_end)
+                points.update(zip(gap_timestamps, gap_values))
+                self._store(key, _Segment(gap_start, gap_end, gap_timestamps, gap_values))
+            ordered = sorted(points)
+            timestamps, values = array("d", ordered), array("d", (points[ts] for ts in ordered))
+        if end > cached_end:
+            tail_timestamps, tail_values = self._fetch(key, cached_end, end)
+            timestamps.extend(tail_timestamps)
+            values.extend(tail_values)
+        return timestamps, values
+
+    def _lookup(self, key, start, end):
+        """
+        Returns the cached datapoints in [start, end) and the sub-ranges of it not
+        covered by cached segments, as (gaps, timestamps, values).
+        """
+        gaps = []
+        timestamps, values = array("d"), array("d")
+        cursor = start
+        with self._lock:
+            segments = self._series.get(key, [])
+            if segments:
+                self._series.move_to_end(key)
+            for segment in segments:
+                if segment.end <= cursor:
+                    continue
+                if segment.start >= end:
+                    break
+                if segment.start > cursor:
+                    gaps.append((cursor, segment.start))
+                lo = bisect.bisect_left(segment.timestamps, start)
+                hi = bisect.bisect_left(segment.timestamps, end)
+                timestamps.extend(segment.timestamps[lo:hi])
+                values.extend(segment.values[lo:hi])
+                cursor = max(cursor, segment.end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps, timestamps, values
+
+    def _fetch(self, key, start, end):
+        namespace, metric_name, dims, statistic, period = key
+        dimensions = [{"Name": name, "Value": value} for name, value in dims]
+        points = {}
+        chunk = period * MAX_DATAPOINTS_PER_REQUEST
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(end, chunk_start + chunk)
+            datapoints = self.cloudwatch.get_metric_statistics(
+                namespace,
+                metric_name,
+                _to_datetime(chunk_start),
+                _to_datetime(chunk_end),
+                period,
+                [statistic],
+                dimensions=dimensions,
+            )
+            for datapoint in datapoints:
+                if statistic in datapoint:
+                    points[_to_epoch(datapoint["Timestamp"])] = datapoint[statistic]
+            chunk_start = chunk_end
+        ordered = sorted(points)
+        return array("d", ordered), array("d", (points[ts] for ts in ordered))
+
+    def _store(self, key, new_segment):
+        """
+        Inserts a segment and merges it with any overlapping or adjacent segments.
+        """
+        with self._lock:
+            segments = self._series.pop(key, [])
+            keep, merge = [], [new_segment]
+            for segment in segments:
+                if segment.end < new_segment.start or segment.start > new_segment.end:
+                    keep.append(segment)
+                else:
+                    merge.append(segment)
+                    self._points -= len(segment.timestamps)
+
+            points = {}
+            for segment in merge:
+                points.update(zip(segment.timestamps, segment.values))
+            ordered = sorted(points)
+            merged = _Segment(
+                min(segment.start for segment in merge),
+                max(segment.end for segment in merge),
+                array("d", ordered),
+                array("d", (points[ts] for ts in ordered)),
+            )
+            keep.append(merged)
+            keep.sort(key=lambda segment: segment.start)
+            self._series[key] = keep
+            self._points += len(merged.timestamps)
+            self._evict()
+
+    def _evict(self):
+        while self._points > self.max_points and len(self._series) > 1:
+            _, segments = self._series.popitem(last=False)
+            self._points -= sum(len(segment.timestamps) for segment in segments)
+        if self._points <= self.max_points or not self._series:
+            return
+        # A single series larger than the whole budget: drop its oldest points.
+        key, segments = next(iter(self._series.items()))
+        excess = self._points - self.max_points
+        while excess > 0 and segments:
+            segment = segments[0]
+            if len(segment.timestamps) <= excess:
+                segments.pop(0)
+                removed = len(segment.timestamps)
+            else:
+                del segment.timestamps[:excess]
+                del segment.values[:excess]
+                segment.start = segment.timestamps[0]
+                removed = excess
+            self._points -= removed
+            excess -= removed
+        if not segments:
+            del self._series[key]
+
+    def clear(self):
+        """
+        Drops every cached series.
+        """
+        with self._lock:
+            self._series.clear()
+            self._points = 0
+
+    def save(self, path=None):
+        """
+        Writes the cache to disk.
+        :param path: Destination file; defaults to the path given at construction.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given and the cache was created without one.")
+        with self._lock:
+            series = [
+                {
+                    "key": [namespace, metric_name, [list(d) for d in dims], statistic, period],
+                    "segments": [
+                        [
+                            segment.start,
+                            segment.end,
+                            base64.b64encode(segment.timestamps.tobytes()).decode(),
+                            base64.b64encode(segment.values.tobytes()).decode(),
+                        ]
+                        for segment in segments
+                    ],
+                }
+                for (namespace, metric_name, dims, statistic, period), segments in self._series.items()
+            ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "series": series}, f)
+        os.replace(tmp_path, path)
+        return f"Metric cache saved to '{path}'."
+
+    def load(self, path=None):
+        """
+        Replaces the cache contents with a file written by save().
+        :param path: Source file; defaults to the path given at construction.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given and the cache was created without one.")
+        with open(path) as f:
+            data = json.load(f)
+        with self._lock:
+            self._series.clear()
+            self._points = 0
+            for entry in data["series"]:
+                namespace, metric_name, dims, statistic, period = entry["key"]
+                key = (namespace, metric_name, tuple(tuple(d) for d in dims), statistic, period)
+                segments = []
+                for start, end, encoded_timestamps, encoded_values in entry["segments"]:
+                    timestamps, values = array("d"), array("d")
+                    timestamps.frombytes(base64.b64decode(encoded_timestamps))
+                    values.frombytes(base64.b64decode(encoded_values))
+                    segments.append(_Segment(start, end, timestamps, values))
+                    self._points += len(timestamps)
+                self._series[key] = segments
+            self._evict()
+        return f"Metric cache loaded from '{path}'."
@@ -1,12 +1,13 @@
-import boto3
 import json
 from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.instrumentation import instrumented
 
 
+@instrumented
 class Queue(AWSManager):
-    def __init__(self, region="us-east-1"):
-        super().__init__(region)
-        self.sqs = boto3.client("sqs", region_name=self.region)
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.sqs = self.create_client("sqs")
 
     # Queue Operations
     def create_queue(self, queue_name):
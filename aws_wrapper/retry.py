@@ -0,0 +1,271 @@
+import random
+import threading
+import time
+
+from botocore.exceptions import ConnectionError, HTTPClientError
+from aws_wrapper.concurrency import RateLimiter
+
+# Error codes services use to say "slow down".
+THROTTLING_ERRORS = frozenset({
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "ProvisionedThroughputExceededException", "TransactionInProgressException",
+    "RequestLimitExceeded", "BandwidthLimitExceeded", "RequestThrottled", "SlowDown",
+    "PriorRequestNotComplete", "EC2ThrottledException",
+})
+
+# Error codes and HTTP statuses for failures that are worth trying again.
+TRANSIENT_ERRORS = frozenset({
+    "InternalError", "InternalFailure", "InternalServerError", "InternalServiceError",
+    "ServiceUnavailable", "ServiceUnavailableException", "RequestTimeout", "RequestTimeoutException",
+})
+TRANSIENT_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Client-side rate limit for one operation that adjusts itself with AIMD.
+
+    The limiter lets calls through unthrottled until the service first throttles
+    one. The rate then drops to a fraction of the rate actually being sent, each
+    success raises it additively, and every further throttle cuts it again.
+    """
+
+    def __init__(self, min_rate=0.5, max_rate=1000.0, decrease_factor=0.7, increase=1.0):
+        """
+        :param min_rate: Lowest rate, in calls per second, the limiter will go to.
+        :param max_rate: Highest rate the limiter will climb back to.
+        :param decrease_factor: Multiplier applied to the sending rate on a throttle.
+        :param increase: Calls per second added over roughly one second of successes.
+        """
+        super().__init__(max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease_factor = decrease_factor
+        self.increase = increase
+        self.enabled = False
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._sent_rate = 0.0
+
+    def acquire(self, tokens=1):
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._window_start
+            if elapsed >= 1.0:
+                self._sent_rate = self._window_count / elapsed
+                self._window_start, self._window_count = now, 0
+            self._window_count += tokens
+        if self.enabled:
+            return super().acquire(tokens)
+        return 0.0
+
+    def _set_rate(self, rate):
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self._tokens = min(self._tokens, self.burst)
+
+    def on_throttle(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self._window_start, 1.0)
+            sending = max(self._sent_rate, self._window_count / elapsed)
+            basis = min(self.rate, sending) if self.enabled else sending
+            self._refill(time.monotonic())
+            self._set_rate(max(self.min_rate, basis * self.decrease_factor))
+            self.enabled = True
+
+    def on_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._set_rate(min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0)))
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of successful calls, so that when a service is
+    struggling, retries cannot multiply the load on it.
+
+    Each success deposits ``ratio`` tokens and each retry withdraws one. A small
+    steady refill keeps retries possible for callers with little traffic.
+    """
+
+    def __init__(self, ratio=0.1, capacity=100.0, min_per_second=1.0):
+        """
+        :param ratio: Tokens deposited per successful call.
+        :param capacity: Most tokens the budget can hold.
+        :param min_per_second: Tokens added per second regardless of traffic.
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.min_per_second = min_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """
+        Takes one retry from the budget.
+        :return: False if the budget is spent.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+def _event_key(event_name):
+    # "before-send.cloudwatch-logs.PutLogEvents" -> ("cloudwatch-logs", "PutLogEvents")
+    _, service, operation = event_name.split(".", 2)
+    return service, operation
+
+
+class RetryController:
+    """
+    Retry, backoff and client-side throttling shared by every wrapper.
+
+    attach() replaces a botocore client's own retry handler with this one:
+    - every attempt first waits on an AdaptiveRateLimiter for its service and
+      operation;
+    - throttles and transient errors are retried with decorrelated-jitter
+      backoff, up to ``max_attempts``, as long as the shared RetryBudget has room.
+    One controller is meant to be shared across clients, so that all calls to
+    an operation adapt to the same limit.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=0.05, max_delay=20.0, budget=None, min_rate=0.5, max_rate=1000.0):
+        """
+        :param max_attempts: Attempts per call, including the first.
+        :param base_delay: Smallest backoff delay, in seconds.
+        :param max_delay: Largest backoff delay, in seconds.
+        :param budget: RetryBudget shared by all operations (optional).
+        :param min_rate: Lowest rate an adaptive limiter will go to.
+        :param max_rate: Highest rate an adaptive limiter will climb back to.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.limiters = {}
+        self._lock = threading.Lock()
+        self.stats = {"attempts": 0, "retries": 0, "throttles": 0, "gave_up": 0, "budget_exhausted": 0}
+
+    def limiter(self, service, operation):
+        key = (service, operation)
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self.limiters.setdefault(key, AdaptiveRateLimiter(self.min_rate, self.max_rate))
+        return limiter
+
+    def attach(self, client):
+        """
+        Routes a botocore client's calls through this controller, in place of
+        botocore's own retry handler. Attaching the same client again has no
+        effect, and a client keeps the first controller it was attached to.
+        :return: The client.
+        """
+        service = client.meta.service_model.service_id.hyphenize()
+        events = client.meta.events
+        events.unregister(f"needs-retry.{service}", unique_id=f"retry-config-{service}")
+        events.register_first(f"before-send.{service}", self._before_send, unique_id=f"aws-wrapper-throttle-{service}")
+        events.register(f"needs-retry.{service}", self._needs_retry, unique_id=f"aws-wrapper-retry-{service}")
+        return client
+
+    def backoff(self, previous_delay=None):
+        """
+        Returns the next decorrelated-jitter delay: random between the base delay
+        and three times the previous delay, capped at ``max_delay``.
+        """
+        return min(self.max_delay, random.uniform(self.base_delay, (previous_delay or self.base_delay) * 3))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _before_send(self, event_name, **kwargs):
+        self._count("attempts")
+        self.limiter(*_event_key(event_name)).acquire()
+
+    def _needs_retry(self, event_name, response, attempts, caught_exception, request_dict, **kwargs):
+        limiter = self.limiter(*_event_key(event_name))
+        code, status = None, None
+        if response is not None:
+            status = response[0].status_code
+            code = response[1].get("Error", {}).get("Code")
+        if caught_exception is None and status is not None and status < 400:
+            limiter.on_success()
+            self.budget.deposit()
+            return None
+
+        throttled = code in THROTTLING_ERRORS or status == 429
+        if throttled:
+            self._count("throttles")
+            limiter.on_throttle()
+        transient = (
+            code in TRANSIENT_ERRORS
+            or status in TRANSIENT_STATUS_CODES
+            or isinstance(caught_exception, (ConnectionError, HTTPClientError))
+        )
+        if not (throttled or transient):
+            return None
+        if attempts >= self.max_attempts:
+            self._count("gave_up")
+            return None
+        if not self.budget.withdraw():
+            self._count("budget_exhausted")
+            return None
+
+        context = request_dict.setdefault("context", {})
+        delay = self.backoff(context.get("aws_wrapper_retry_delay"))
+        context["aws_wrapper_retry_delay"] = delay
+        self._count("retries")
+        return delay
+
+    def snapshot(self):
+        """
+        Returns the counters and the current rate of every operation that has
+        been throttled, e.g. {"rates": {"sqs.SendMessage": 12.5}, "retries": 3, ...}.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            limiters = list(self.limiters.items())
+        rates = {
+            f"{service}.{operation}": round(limiter.rate, 3)
+            for (service, operation), limiter in limiters if limiter.enabled
+        }
+        return {**stats, "budget": round(self.budget.available, 3), "rates": rates}
+
+
+_default_controller = None
+_default_controller_lock = threading.Lock()
+
+
+def default_controller():
+    """
+    Returns the process-wide RetryController shared by wrappers that are not
+    given their own.
+    """
+    global _default_controller
+    with _default_controller_lock:
+        if _default_controller is None:
+            _default_controller = RetryController()
+        return _default_controller
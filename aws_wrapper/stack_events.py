@@ -0,0 +1,125 @@
+import time
+
+NESTED_STACK_TYPE = "AWS::CloudFormation::Stack"
+
+
+def is_operation_start(event):
+    """
+    True for the stack-level event that opens a user-initiated create, update or delete.
+    """
+    return (
+        event.get("PhysicalResourceId") == event["StackId"]
+        and event["ResourceStatus"].endswith("_IN_PROGRESS")
+        and event.get("ResourceStatusReason") == "User Initiated"
+    )
+
+
+def _is_stack_level(event):
+    return event.get("PhysicalResourceId") == event["StackId"]
+
+
+class StackEventTailer:
+    """
+    Incremental reader of a stack's events.
+
+    describe_stack_events pages newest-first, so each poll reads pages only until
+    it reaches the newest event returned by the previous poll and hands back just
+    the new events, oldest first. Polling cost grows with the number of new
+    events, not with the length of the stack's history.
+
+    With ``follow_nested``, nested stacks that show up in the events get their own
+    tailers, and their events are merged into the same stream by timestamp. A
+    nested stack is no longer polled once it reaches a terminal status.
+    """
+
+    def __init__(self, cloudformation, stack_name, follow_nested=False, from_operation=True, since=None):
+        """
+        :param cloudformation: CloudFormation wrapper to read events through.
+        :param stack_name: Stack name or ID.
+        :param follow_nested: Also tail nested stacks created or updated by this one.
+        :param from_operation: Start from the most recent user-initiated operation
+            instead of the beginning of the stack's history.
+        :param since: Ignore events older than this datetime (optional).
+        """
+        self.cloudformation = cloudformation
+        self.stack_name = stack_name
+        self.follow_nested = follow_nested
+        self.from_operation = from_operation
+        self.since = since
+        self.last_event_id = None
+        self.status = None
+        self.nested = {}
+        self.stats = {"pages": 0, "events": 0}
+
+    @property
+    def complete(self):
+        """
+        True once the stack's latest status seen in its events is terminal.
+        """
+        return self.status is not None and not self.status.endswith("_IN_PROGRESS")
+
+    def poll(self):
+        """
+        Returns events that appeared since the previous poll, oldest first.
+        """
+        events = self._fetch()
+        if events:
+            self.last_event_id = events[-1]["EventId"]
+            self.stats["events"] += len(events)
+        for event in events:
+            if _is_stack_level(event):
+                self.status = event["ResourceStatus"]
+            elif self.follow_nested and event["ResourceType"] == NESTED_STACK_TYPE and event.get("PhysicalResourceId"):
+                self._follow(event)
+
+        active = [tailer for tailer in self.nested.values() if not tailer.complete]
+        if active:
+            for tailer in active:
+                events.extend(tailer.poll())
+            events.sort(key=lambda event: event["Timestamp"])
+        return events
+
+    def _follow(self, event):
+        stack_id = event["PhysicalResourceId"]
+        tailer = self.nested.get(stack_id)
+        if tailer is None:
+            self.nested[stack_id] = StackEventTailer(
+                self.cloudformation, stack_id, follow_nested=True, from_operation=False, since=event["Timestamp"]
+            )
+        elif tailer.complete and event["ResourceStatus"].endswith("_IN_PROGRESS"):
+            # Finished nested stacks are not polled; a new operation on one resumes it.
+            tailer.status = None
+
+    def _fetch(self):
+        events = []
+        params = {"StackName": self.stack_name}
+        while True:
+            response = self.cloudformation.cloudformation.describe_stack_events(**params)
+            self.stats["pages"] += 1
+            for event in response["StackEvents"]:
+                if event["EventId"] == self.last_event_id:
+                    return events[::-1]
+                if self.since is not None and event["Timestamp"] < self.since:
+                    return events[::-1]
+                events.append(event)
+                if self.last_event_id is None and self.from_operation and is_operation_start(event):
+                    return events[::-1]
+            if "NextToken" not in response:
+                return events[::-1]
+            params["NextToken"] = response["NextToken"]
+
+    def tail(self, poll_interval=5.0, until_complete=True, stop_event=None):
+        """
+        Yields new events as they arrive, oldest first.
+        :param poll_interval: Seconds between polls.
+        :param until_complete: Stop once the stack reaches a terminal status.
+        :param stop_event: threading.Event that ends the tail when set (optional).
+        """
+        while not (stop_event and stop_event.is_set()):
+            yield from self.poll()
+            if until_complete and self.complete:
+                return
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
@@ -0,0 +1,212 @@
+import threading
+import time
+
+from aws_wrapper.concurrency import run_graph
+from aws_wrapper.stack_waiter import LIVE_STATUSES
+
+DRIFT_DETECTION_TIMEOUT = 600
+
+
+def _pages(client, operation, key, **params):
+    """
+    Yields the items under ``key`` from every page of a call, through the client's
+    paginator where botocore has one and by following NextToken otherwise.
+    """
+    if client.can_paginate(operation):
+        for page in client.get_paginator(operation).paginate(**params):
+            yield from page.get(key, [])
+        return
+    while True:
+        response = getattr(client, operation)(**params)
+        yield from response.get(key, [])
+        if not response.get("NextToken"):
+            return
+        params["NextToken"] = response["NextToken"]
+
+
+def _version(summary):
+    """
+    Returns what changes whenever a stack's resources may have changed.
+    """
+    return summary["StackStatus"], summary.get("LastUpdatedTime") or summary["CreationTime"]
+
+
+class StackResourceIndex:
+    """
+    In-memory index of every live stack's resources.
+
+    Stacks are listed with a paged list_stacks call, and the resources of each
+    stack are loaded with paged list_stack_resources calls, several stacks at a
+    time. Physical resource IDs map straight to their owning stack, so "which
+    stack owns this resource" is a dictionary lookup. refresh() only reloads
+    stacks whose status or LastUpdatedTime changed since the previous refresh.
+    """
+
+    def __init__(self, cloudformation, max_workers=8, rate_limiter=None):
+        """
+        :param cloudformation: CloudFormation wrapper to read stacks through.
+        :param max_workers: Maximum number of stacks loaded at once.
+        :param rate_limiter: RateLimiter acquired before each stack is loaded (optional).
+        """
+        self.cloudformation = cloudformation
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.stacks = {}
+        self.resources = {}
+        self.by_physical_id = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.stats = {"refreshes": 0, "stacks_loaded": 0, "stacks_skipped": 0}
+
+    def refresh(self):
+        """
+        Brings the index up to date with the account's live stacks.
+        :return: Dictionary with "loaded" and "removed" stack names, and "errors"
+            mapping stack name to the error that kept it from loading.
+        """
+        client = self.cloudformation.cloudformation
+        summaries = {s["StackId"]: s for s in _pages(client, "list_stacks", "StackSummaries", StackStatusFilter=LIVE_STATUSES)}
+        stale = {stack_id: s for stack_id, s in summaries.items() if self._versions.get(stack_id) != _version(s)}
+        tasks = {stack_id: (lambda stack_id=stack_id: self._load(stack_id)) for stack_id in stale}
+        outcomes = run_graph(tasks, max_workers=self.max_workers, rate_limiter=self.rate_limiter)
+
+        report = {"loaded": [], "removed": [], "errors": {}}
+        with self._lock:
+            for stack_id in set(self.stacks) - set(summaries):
+                report["removed"].append(self.stacks[stack_id]["StackName"])
+                self._drop(stack_id)
+            for stack_id, outcome in outcomes.items():
+                name = summaries[stack_id]["StackName"]
+                if outcome["status"] != "succeeded":
+                    report["errors"][name] = str(outcome["error"])
+                    continue
+                self._drop(stack_id)
+                self.stacks[stack_id] = summaries[stack_id]
+                self.resources[stack_id] = outcome["result"]
+                self._versions[stack_id] = _version(summaries[stack_id])
+                for record in outcome["result"].values():
+                    if record.get("PhysicalResourceId"):
+                        self.by_physical_id[record["PhysicalResourceId"]] = record
+                report["loaded"].append(name)
+            for stack_id in summaries.keys() - stale.keys():
+                self.stacks[stack_id] = summaries[stack_id]
+            self.stats["refreshes"] += 1
+            self.stats["stacks_loaded"] += len(report["loaded"])
+            self.stats["stacks_skipped"] += len(summaries) - len(stale)
+        return report
+
+    def _load(self, stack_id):
+        client = self.cloudformation.cloudformation
+        stack_name = stack_id.split("/")[1]
+        records = {}
+        for summary in _pages(client, "list_stack_resources", "StackResourceSummaries", StackName=stack_id):
+            records[summary["LogicalResourceId"]] = {
+                "StackName": stack_name,
+                "StackId": stack_id,
+                "LogicalResourceId": summary["LogicalResourceId"],
+                "PhysicalResourceId": summary.get("PhysicalResourceId"),
+                "ResourceType": summary["ResourceType"],
+                "ResourceStatus": summary["ResourceStatus"],
+            }
+        return records
+
+    def _drop(self, stack_id):
+        for record in self.resources.pop(stack_id, {}).values():
+            if self.by_physical_id.get(record.get("PhysicalResourceId")) is record:
+                del self.by_physical_id[record["PhysicalResourceId"]]
+        self.stacks.pop(stack_id, None)
+        self._versions.pop(stack_id, None)
+
+    def _stack_id(self, stack_name):
+        for stack_id, summary in self.stacks.items():
+            if stack_name in (stack_id, summary["StackName"]):
+                return stack_id
+        return None
+
+    # Lookups
+    def owner(self, physical_id):
+        """
+        Returns {"StackName", "StackId", "LogicalResourceId", "PhysicalResourceId",
+        "ResourceType", "ResourceStatus"} for a physical resource ID, or None.
+        """
+        return self.by_physical_id.get(physical_id)
+
+    def stack_resources(self, stack_name):
+        """
+        Returns the indexed resources of a stack, by logical ID.
+        """
+        return dict(self.resources.get(self._stack_id(stack_name), {}))
+
+    def resources_of_type(self, resource_type):
+        """
+        Returns every indexed resource of the given type, e.g. "AWS::SQS::Queue".
+        """
+        with self._lock:
+            return [
+                record for records in self.resources.values()
+                for record in records.values() if record["ResourceType"] == resource_type
+            ]
+
+    # Drift Detection
+    def detect_drift(self, stack_names=None, poll_interval=2.0, timeout=DRIFT_DETECTION_TIMEOUT):
+        """
+        Runs drift detection on many stacks at once: detection is started on
+        every stack, then all of them are polled until they finish.
+        :param stack_names: Stacks to check (defaults to every indexed stack).
+        :param poll_interval: Seconds between detection status polls.
+        :param timeout: Seconds to wait before giving up on unfinished detections.
+        :return: Dictionary mapping stack name to {"StackDriftStatus",
+            "DriftedResources": [...]} or {"error": ...}.
+        """
+        client = self.cloudformation.cloudformation
+        if stack_names is None:
+            stack_names = [summary["StackName"] for summary in self.stacks.values()]
+
+        def start(name):
+            return client.detect_stack_drift(StackName=name)["StackDriftDetectionId"]
+
+        started = run_graph({name: (lambda name=name: start(name)) for name in stack_names},
+                            max_workers=self.max_workers, rate_limiter=self.rate_limiter)
+        results = {name: {"error": str(outcome["error"])} for name, outcome in started.items() if outcome["status"] != "succeeded"}
+        pending = {name: outcome["result"] for name, outcome in started.items() if outcome["status"] == "succeeded"}
+
+        deadline = time.monotonic() + timeout
+        while pending:
+            for name, detection_id in list(pending.items()):
+                try:
+                    status = client.describe_stack_drift_detection_status(StackDriftDetectionId=detection_id)
+                except Exception as e:
+                    # Record the error for this stack and keep polling the others.
+                    del pending[name]
+                    results[name] = {"error": str(e)}
+                    continue
+                if status["DetectionStatus"] == "DETECTION_IN_PROGRESS":
+                    continue
+                del pending[name]
+                if status["DetectionStatus"] == "DETECTION_FAILED":
+                    results[name] = {"error": status.get("DetectionStatusReason", "Drift detection failed.")}
+                else:
+                    results[name] = {"StackDriftStatus": status["StackDriftStatus"], "DriftedResources": []}
+            if pending and time.monotonic() >= deadline:
+                for name in pending:
+                    results[name] = {"error": f"Drift detection did not finish within {timeout} seconds."}
+                break
+            if pending:
+                time.sleep(poll_interval)
+
+        drifted = [name for name, result in results.items() if result.get("StackDriftStatus") == "DRIFTED"]
+        fetched = run_graph({name: (lambda name=name: self._drifted_resources(name)) for name in drifted},
+                            max_workers=self.max_workers, rate_limiter=self.rate_limiter)
+        for name, outcome in fetched.items():
+            if outcome["status"] == "succeeded":
+                results[name]["DriftedResources"] = outcome["result"]
+            else:
+                results[name]["error"] = str(outcome["error"])
+        return results
+
+    def _drifted_resources(self, stack_name):
+        client = self.cloudformation.cloudformation
+        return list(_pages(
+            client, "describe_stack_resource_drifts", "StackResourceDrifts", StackName=stack_name,
+            StackResourceDriftStatusFilters=["MODIFIED", "DELETED"],
+        ))
@@ -0,0 +1,200 @@
+import re
+
+from aws_wrapper.concurrency import run_graph
+from aws_wrapper.stack_waiter import StackWaiter
+from aws_wrapper.template import load_template
+
+
+class StackOutput:
+    """
+    Parameter value that is filled in with another stack's output once that stack
+    has been deployed. Using one also makes the stack depend on the other.
+    """
+
+    __slots__ = ("stack_name", "output_key")
+
+    def __init__(self, stack_name, output_key):
+        self.stack_name = stack_name
+        self.output_key = output_key
+
+    def __repr__(self):
+        return f"StackOutput({self.stack_name!r}, {self.output_key!r})"
+
+
+def _load_template(template):
+    if isinstance(template, dict):
+        return template
+    try:
+        return load_template(template).document
+    except (ImportError, ValueError):
+        return None
+
+
+def _walk(node):
+    yield node
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def _literal(value, stack_name):
+    """
+    Resolves an export or import name that is a plain string or an Fn::Sub over
+    AWS::StackName only; anything else cannot be known before deployment.
+    """
+    if isinstance(value, dict) and list(value) == ["Fn::Sub"] and isinstance(value["Fn::Sub"], str):
+        value = value["Fn::Sub"].replace("${AWS::StackName}", stack_name)
+    if isinstance(value, str) and not re.search(r"\$\{", value):
+        return value
+    return None
+
+
+def template_exports(template, stack_name):
+    """
+    Returns the export names a template declares that can be resolved statically.
+    """
+    document = _load_template(template) or {}
+    exports = set()
+    for output in (document.get("Outputs") or {}).values():
+        name = _literal((output.get("Export") or {}).get("Name"), stack_name)
+        if name:
+            exports.add(name)
+    return exports
+
+
+def template_imports(template, stack_name):
+    """
+    Returns the Fn::ImportValue names a template uses that can be resolved statically.
+    """
+    document = _load_template(template) or {}
+    imports = set()
+    for section in ("Resources", "Outputs"):
+        for item in _walk(document.get(section) or {}):
+            if isinstance(item, dict) and "Fn::ImportValue" in item:
+                name = _literal(item["Fn::ImportValue"], stack_name)
+                if name:
+                    imports.add(name)
+    return imports
+
+
+class StackOrchestrator:
+    """
+    Deploys a set of interdependent stacks as a dependency graph.
+
+    Dependencies come from each stack's ``depends_on`` list, from StackOutput
+    parameter values, and from Fn::ImportValue names matched against other
+    stacks' exports. Independent stacks are created or updated concurrently,
+    all in-flight stacks are watched by a single StackWaiter, and when a stack
+    fails everything downstream of it is skipped. Each stack goes through
+    CloudFormation.deploy_stack, so stacks whose template and parameters are
+    unchanged are not touched.
+    """
+
+    def __init__(self, cloudformation, max_concurrency=8, poll_interval=5.0, on_event=None):
+        """
+        :param cloudformation: CloudFormation wrapper to deploy through.
+        :param max_concurrency: Maximum number of stacks deploying at once.
+        :param poll_interval: Seconds between status polls.
+        :param on_event: Callback(stack_name, event) for stack events (optional).
+        """
+        self.cloudformation = cloudformation
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self.on_event = on_event
+        self.outputs = {}
+
+    @staticmethod
+    def dependencies(stacks):
+        """
+        Returns a dictionary mapping each stack name to the stack names it depends on.
+        :param stacks: Stack definitions (see deploy()).
+        """
+        names = {stack["name"] for stack in stacks}
+        exporters = {}
+        for stack in stacks:
+            for export in template_exports(stack["template"], stack["name"]):
+                exporters[export] = stack["name"]
+
+        dependencies = {}
+        for stack in stacks:
+            deps = set(stack.get("depends_on", ()))
+            for value in (stack.get("parameters") or {}).values():
+                if isinstance(value, StackOutput):
+                    deps.add(value.stack_name)
+            for name in template_imports(stack["template"], stack["name"]):
+                if name in exporters:
+                    deps.add(exporters[name])
+            deps.discard(stack["name"])
+            unknown = deps - names
+            if unknown:
+                raise ValueError(f"Stack '{stack['name']}' depends on unknown stacks: {', '.join(sorted(unknown))}.")
+            dependencies[stack["name"]] = deps
+        return dependencies
+
+    def deploy(self, stacks):
+        """
+        Creates or updates every stack in dependency order.
+        :param stacks: List of stack definitions, each a dictionary with "name",
+            "template" (JSON string or dict), and optionally "parameters" (dict of
+            parameter name to a value or StackOutput), "depends_on" (stack names)
+            and "capabilities".
+        :return: Dictionary mapping stack name to {"status": "succeeded" | "failed" |
+            "skipped", "Action", "StackStatus", "Outputs", "error"}. Stacks skipped as
+            unchanged report the outputs recorded with their hash and a StackStatus
+            of None, without describing the stack.
+        """
+        dependencies = self.dependencies(stacks)
+        waiter = StackWaiter(self.cloudformation, poll_interval=self.poll_interval, on_event=self.on_event)
+        tasks = {stack["name"]: (lambda stack=stack: self._deploy_stack(stack, waiter)) for stack in stacks}
+        try:
+            outcomes = run_graph(tasks, dependencies, max_workers=self.max_concurrency)
+        finally:
+            waiter.close()
+
+        report = {}
+        for name, outcome in outcomes.items():
+            entry = {"status": outcome["status"]}
+            if outcome["status"] == "succeeded":
+                entry.update(outcome["result"])
+            else:
+                entry["error"] = str(outcome["error"])
+            report[name] = entry
+        return report
+
+    def _deploy_stack(self, stack, waiter):
+        name = stack["name"]
+        parameters = {key: self._resolve(value) for key, value in (stack.get("parameters") or {}).items()}
+        hashes = self.cloudformation.template_hashes
+        result = self.cloudformation.deploy_stack(
+            name, stack["template"], parameters, stack.get("capabilities"), waiter=waiter
+        )
+        described = None
+        if result["action"] == "skipped":
+            outputs = hashes.outputs(name)
+            if outputs is not None:
+                # Unchanged since its outputs were recorded, so there is nothing to describe.
+                self.outputs[name] = outputs
+                return {"Action": result["action"], "StackStatus": None, "Outputs": outputs}
+            described = self.cloudformation.find_stack(name)
+            if described is None:
+                # The recorded hash outlived the stack (deleted out-of-band): deploy it again.
+                hashes.discard(name)
+                result = self.cloudformation.deploy_stack(
+                    name, stack["template"], parameters, stack.get("capabilities"), waiter=waiter
+                )
+        described = described or self.cloudformation.describe_stack(name)
+        outputs = {output["OutputKey"]: output["OutputValue"] for output in described.get("Outputs", [])}
+        hashes.set_outputs(name, outputs)
+        self.outputs[name] = outputs
+        return {"Action": result["action"], "StackStatus": described["StackStatus"], "Outputs": outputs}
+
+    def _resolve(self, value):
+        if isinstance(value, StackOutput):
+            outputs = self.outputs.get(value.stack_name, {})
+            if value.output_key not in outputs:
+                raise KeyError(f"Stack '{value.stack_name}' has no output '{value.output_key}'.")
+            return outputs[value.output_key]
+        return str(value)
@@ -0,0 +1,230 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from botocore.exceptions import ClientError
+from aws_wrapper.stack_events import StackEventTailer
+
+SUCCESS_STATUSES = {"CREATE_COMPLETE", "UPDATE_COMPLETE", "DELETE_COMPLETE", "IMPORT_COMPLETE"}
+
+# Every stack status except DELETE_COMPLETE. Filtering deleted stacks out keeps
+# list_stacks to a page or two in accounts with a long deletion history.
+LIVE_STATUSES = [
+    "CREATE_IN_PROGRESS", "CREATE_FAILED", "CREATE_COMPLETE",
+    "ROLLBACK_IN_PROGRESS", "ROLLBACK_FAILED", "ROLLBACK_COMPLETE",
+    "DELETE_IN_PROGRESS", "DELETE_FAILED",
+    "UPDATE_IN_PROGRESS", "UPDATE_COMPLETE_CLEANUP_IN_PROGRESS", "UPDATE_COMPLETE",
+    "UPDATE_FAILED", "UPDATE_ROLLBACK_IN_PROGRESS", "UPDATE_ROLLBACK_FAILED",
+    "UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS", "UPDATE_ROLLBACK_COMPLETE",
+    "REVIEW_IN_PROGRESS",
+    "IMPORT_IN_PROGRESS", "IMPORT_COMPLETE", "IMPORT_ROLLBACK_IN_PROGRESS",
+    "IMPORT_ROLLBACK_FAILED", "IMPORT_ROLLBACK_COMPLETE",
+]
+
+THROTTLING_ERRORS = {"Throttling", "ThrottlingException", "RequestLimitExceeded"}
+
+
+class StackDeploymentError(Exception):
+    """
+    Raised when a stack operation ends in a failed or rolled-back state.
+    """
+
+
+def is_terminal(status):
+    return not status.endswith("_IN_PROGRESS")
+
+
+class _Watch:
+    __slots__ = ("stack_name", "stack_id", "future", "on_event", "events", "status")
+
+    def __init__(self, stack_name, stack_id, on_event, events):
+        self.stack_name = stack_name
+        self.stack_id = stack_id
+        self.future = Future()
+        self.on_event = on_event
+        self.events = events
+        self.status = None
+
+
+class StackWaiter:
+    """
+    Waits on many CloudFormation stacks at once from a single background thread.
+
+    Each poll makes one paginated list_stacks call for the status of every
+    watched stack, plus describe_stack_events calls only for stacks that have an
+    event callback and are still moving. Events are read incrementally through a
+    StackEventTailer and handed to the callback oldest-first. Throttling doubles
+    the poll interval.
+    """
+
+    def __init__(self, cloudformation, poll_interval=5.0, max_poll_interval=60.0, on_event=None):
+        """
+        :param cloudformation: CloudFormation wrapper to poll through.
+        :param poll_interval: Seconds between polls.
+        :param max_poll_interval: Upper bound for the interval after throttling.
+        :param on_event: Default callback(stack_name, event) for new stack events (optional).
+        """
+        self.cloudformation = cloudformation
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.on_event = on_event
+        self._interval = poll_interval
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {"polls": 0, "list_stacks_calls": 0, "describe_stack_events_calls": 0, "throttled": 0}
+
+    def watch(self, stack_name, on_event=None):
+        """
+        Starts tracking a stack whose create, update or delete has just been initiated.
+        :param stack_name: Stack name or ID.
+        :param on_event: Callback(stack_name, event) for this stack's events (optional).
+        :return: Future resolving to {"StackName", "StackId", "StackStatus",
+            "StackStatusReason", "Succeeded"} once the stack reaches a terminal state.
+        """
+        try:
+            stack = self.cloudformation.describe_stack(stack_name)
+        except ClientError as e:
+            # A stack whose deletion already finished can only be found by ID.
+            stack = self._find_deleted(stack_name)
+            if stack is None:
+                raise e
+        events = StackEventTailer(self.cloudformation, stack["StackId"])
+        watch = _Watch(stack["StackName"], stack["StackId"], on_event or self.on_event, events)
+        with self._lock:
+            existing = self._watches.get(watch.stack_id)
+            if existing is not None:
+                return existing.future
+            self._watches[watch.stack_id] = watch
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return watch.future
+
+    def wait(self, stack_names, timeout=None, on_event=None):
+        """
+        Watches several stacks and blocks until all of them finish.
+        :return: Dictionary mapping stack name to its final status dictionary.
+        """
+        futures = {name: self.watch(name, on_event) for name in stack_names}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = {}
+        for name, future in futures.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            results[name] = future.result(timeout=remaining)
+        return results
+
+    def _find_deleted(self, stack_name):
+        paginator = self.cloudformation.cloudformation.get_paginator("list_stacks")
+        deleted = [
+            summary
+            for page in paginator.paginate(StackStatusFilter=["DELETE_COMPLETE"])
+            for summary in page.get("StackSummaries", [])
+            if summary["StackName"] == stack_name
+        ]
+        return max(deleted, key=lambda summary: summary.get("DeletionTime") or summary["CreationTime"], default=None)
+
+    def close(self):
+        """
+        Stops polling and cancels every pending future.
+        """
+        with self._lock:
+            watches, self._watches = list(self._watches.values()), {}
+        for watch in watches:
+            watch.future.cancel()
+        self._wakeup.set()
+
+    # Polling
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._watches:
+                        return
+                    watches = list(self._watches.values())
+                try:
+                    self._poll(watches)
+                    self._interval = self.poll_interval
+                except ClientError as e:
+                    if e.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                        self._fail_all(watches, e)
+                        continue
+                    self.stats["throttled"] += 1
+                    self._interval = min(self._interval * 2, self.max_poll_interval)
+                except Exception as e:
+                    # Connection errors, timeouts, malformed responses: fail the
+                    # watches rather than leave their futures pending forever.
+                    self._fail_all(watches, e)
+                    continue
+                self._wakeup.wait(self._interval)
+                self._wakeup.clear()
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _poll(self, watches):
+        self.stats["polls"] += 1
+        statuses = self._list_statuses()
+        for watch in watches:
+            try:
+                self._poll_stack(watch, statuses.get(watch.stack_id))
+            except ClientError as e:
+                if e.response["Error"]["Code"] in THROTTLING_ERRORS:
+                    raise
+                self._fail_all([watch], e)
+            except (KeyError, TypeError) as e:
+                self._fail_all([watch], e)
+
+    def _poll_stack(self, watch, summary):
+        if summary is None:
+            # Deleted stacks drop out of the filtered listing; confirm by ID.
+            summary = self.cloudformation.describe_stack(watch.stack_id)
+        status = summary["StackStatus"]
+        if watch.on_event is not None and (status != watch.status or not is_terminal(status)):
+            self._deliver_events(watch)
+        watch.status = status
+        if is_terminal(status):
+            self._resolve(watch, summary)
+
+    def _list_statuses(self):
+        statuses = {}
+        paginator = self.cloudformation.cloudformation.get_paginator("list_stacks")
+        for page in paginator.paginate(StackStatusFilter=LIVE_STATUSES):
+            self.stats["list_stacks_calls"] += 1
+            for summary in page.get("StackSummaries", []):
+                statuses[summary["StackId"]] = summary
+        return statuses
+
+    def _deliver_events(self, watch):
+        pages = watch.events.stats["pages"]
+        events = watch.events.poll()
+        self.stats["describe_stack_events_calls"] += watch.events.stats["pages"] - pages
+        for event in events:
+            try:
+                watch.on_event(watch.stack_name, event)
+            except Exception:
+                pass
+
+    def _resolve(self, watch, summary):
+        with self._lock:
+            self._watches.pop(watch.stack_id, None)
+        if watch.future.done():
+            return
+        watch.future.set_result({
+            "StackName": watch.stack_name,
+            "StackId": watch.stack_id,
+            "StackStatus": summary["StackStatus"],
+            "StackStatusReason": summary.get("StackStatusReason"),
+            "Succeeded": summary["StackStatus"] in SUCCESS_STATUSES,
+        })
+
+    def _fail_all(self, watches, error):
+        with self._lock:
+            for watch in watches:
+                self._watches.pop(watch.stack_id, None)
+        for watch in watches:
+            if not watch.future.done():
+                watch.future.set_exception(error)
@@ -1,10 +1,12 @@
-import boto3
+from botocore.exceptions import ClientError
 from aws_wrapper.aws_manager import AWSManager
+from aws_wrapper.instrumentation import instrumented
 
+@instrumented
 class Storage(AWSManager):
-    def __init__(self, region="us-east-1"):
-        super().__init__(region)
-        self.s3 = boto3.client("s3", region_name=self.region)
+    def __init__(self, region="us-east-1", role_arn=None, session_policy=None, credential_cache=None, retry_controller=None):
+        super().__init__(region, role_arn, session_policy, credential_cache, retry_controller)
+        self.s3 = self.create_client("s3")
 
     def create_bucket(self, bucket_name):
         self.s3.create_bucket(Bucket=bucket_name)
@@ -14,6 +16,18 @@ class Storage(AWSManager):
         self.s3.put_object(Bucket=bucket_name, Key=key, Body=content)
         return f"File '{key}' uploaded to bucket '{bucket_name}'."
 
+    def download_file(self, bucket_name, key):
+        return self.s3.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+
+    def object_exists(self, bucket_name, key):
+        try:
+            self.s3.head_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
     def list_buckets(self):
         return self.s3.list_buckets()["Buckets"]
 
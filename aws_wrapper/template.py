@@ -0,0 +1,385 @@
+import functools
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+PSEUDO_PARAMETERS = frozenset({
+    "AWS::AccountId", "AWS::NotificationARNs", "AWS::NoValue", "AWS::Partition",
+    "AWS::Region", "AWS::StackId", "AWS::StackName", "AWS::URLSuffix",
+})
+
+TEMPLATE_SECTIONS = frozenset({
+    "AWSTemplateFormatVersion", "Description", "Metadata", "Parameters", "Rules", "Mappings",
+    "Conditions", "Transform", "Resources", "Outputs",
+})
+
+PARAMETER_TYPES = frozenset({"String", "Number", "List<Number>", "CommaDelimitedList"})
+
+# YAML short forms and the intrinsic function each one expands to.
+SHORT_TAGS = {
+    "Ref": "Ref", "Condition": "Condition", "GetAtt": "Fn::GetAtt", "Sub": "Fn::Sub",
+    "Join": "Fn::Join", "Select": "Fn::Select", "Split": "Fn::Split", "FindInMap": "Fn::FindInMap",
+    "GetAZs": "Fn::GetAZs", "ImportValue": "Fn::ImportValue", "Base64": "Fn::Base64", "Cidr": "Fn::Cidr",
+    "If": "Fn::If", "Equals": "Fn::Equals", "And": "Fn::And", "Or": "Fn::Or", "Not": "Fn::Not",
+    "Transform": "Fn::Transform", "Length": "Fn::Length", "ToJsonString": "Fn::ToJsonString",
+}
+
+_SUB_VARIABLE = re.compile(r"\$\{([^!}][^}]*)\}")
+
+# Parsed templates kept in memory, keyed by the SHA-256 of their source.
+TEMPLATE_CACHE_SIZE = 256
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_loader():
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("PyYAML is required to parse YAML templates (pip install pyyaml).") from None
+
+    class TemplateLoader(yaml.SafeLoader):
+        pass
+
+    # Dates like AWSTemplateFormatVersion: 2010-09-09 must stay strings.
+    TemplateLoader.yaml_implicit_resolvers = {
+        first: [(tag, regexp) for tag, regexp in resolvers if tag != "tag:yaml.org,2002:timestamp"]
+        for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+    }
+
+    def construct(function):
+        def constructor(loader, node):
+            if isinstance(node, yaml.ScalarNode):
+                value = loader.construct_scalar(node)
+                if function == "Fn::GetAtt":
+                    value = value.split(".", 1)
+            elif isinstance(node, yaml.SequenceNode):
+                value = loader.construct_sequence(node, deep=True)
+            else:
+                value = loader.construct_mapping(node, deep=True)
+            return {function: value}
+        return constructor
+
+    for tag, function in SHORT_TAGS.items():
+        TemplateLoader.add_constructor(f"!{tag}", construct(function))
+    return TemplateLoader
+
+
+def parse_template(template_body):
+    """
+    Parses a JSON or YAML template body into a dictionary. YAML short tags such as
+    !Ref and !GetAtt are expanded to their full intrinsic function form.
+    """
+    if isinstance(template_body, dict):
+        return template_body
+    try:
+        document = json.loads(template_body)
+    except ValueError:
+        loader = _yaml_loader()
+        import yaml
+
+        try:
+            document = yaml.load(template_body, Loader=loader)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Template is neither valid JSON nor valid YAML: {e}") from None
+    if not isinstance(document, dict):
+        raise ValueError("Template must be a JSON object or YAML mapping.")
+    return document
+
+
+def load_template(template_body):
+    """
+    Returns the Template for a body, parsing it only the first time a body with the
+    same content is seen.
+    :param template_body: Template as a JSON or YAML string, or a dictionary.
+    """
+    if isinstance(template_body, dict):
+        source = json.dumps(template_body, sort_keys=True, separators=(",", ":"))
+    else:
+        source = template_body
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+    template = Template(parse_template(source), digest)
+    with _cache_lock:
+        _cache[digest] = template
+        while len(_cache) > TEMPLATE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return template
+
+
+def clear_template_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _walk(node):
+    yield node
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def _sub_variables(value):
+    """
+    Returns the names an Fn::Sub string refers to, minus its own local variables.
+    """
+    local = {}
+    if isinstance(value, list) and value:
+        value, local = value[0], (value[1] if len(value) > 1 and isinstance(value[1], dict) else {})
+    if not isinstance(value, str):
+        return []
+    return [name.strip() for name in _SUB_VARIABLE.findall(value) if name.strip() not in local]
+
+
+def _references(node):
+    """
+    Yields (kind, name, attribute) for every Ref, Fn::GetAtt and Fn::Sub variable in
+    a template fragment; kind is "Ref" or "GetAtt".
+    """
+    for item in _walk(node):
+        if not isinstance(item, dict) or len(item) != 1:
+            continue
+        (key, value), = item.items()
+        if key == "Ref" and isinstance(value, str):
+            yield "Ref", value, None
+        elif key == "Fn::GetAtt":
+            if isinstance(value, str):
+                value = value.split(".", 1)
+            if isinstance(value, list) and len(value) == 2 and isinstance(value[0], str):
+                yield "GetAtt", value[0], value[1]
+            else:
+                yield "GetAtt", None, None
+        elif key == "Fn::Sub":
+            for name in _sub_variables(value):
+                if "." in name and name not in PSEUDO_PARAMETERS:
+                    resource, attribute = name.split(".", 1)
+                    yield "GetAtt", resource, attribute
+                else:
+                    yield "Ref", name, None
+
+
+def _depends_on(resource):
+    depends_on = resource.get("DependsOn") or []
+    return [depends_on] if isinstance(depends_on, str) else list(depends_on)
+
+
+class Template:
+    """
+    A parsed template with its offline validation results and resource dependency
+    graph, both computed once on first use. Templates come from load_template(),
+    which shares one instance per distinct body, so treat ``document`` as read-only.
+    """
+
+    def __init__(self, document, digest=None):
+        """
+        :param document: Parsed template dictionary.
+        :param digest: SHA-256 of the template's source (optional).
+        """
+        self.document = document
+        self.digest = digest
+
+    @property
+    def parameters(self):
+        return self.document.get("Parameters") or {}
+
+    @property
+    def resources(self):
+        return self.document.get("Resources") or {}
+
+    @property
+    def conditions(self):
+        return self.document.get("Conditions") or {}
+
+    @property
+    def outputs(self):
+        return self.document.get("Outputs") or {}
+
+    @functools.cached_property
+    def dependencies(self):
+        """
+        Dictionary mapping each resource's logical ID to the resources it depends on,
+        through Ref, Fn::GetAtt, Fn::Sub and DependsOn.
+        """
+        graph = {}
+        for name, resource in self.resources.items():
+            if not isinstance(resource, dict):
+                graph[name] = set()
+                continue
+            deps = {dep for dep in _depends_on(resource) if dep in self.resources}
+            for section in ("Properties", "Metadata", "UpdatePolicy", "CreationPolicy"):
+                for _, target, _ in _references(resource.get(section)):
+                    if target in self.resources:
+                        deps.add(target)
+            deps.discard(name)
+            graph[name] = deps
+        return graph
+
+    def creation_order(self):
+        """
+        Returns the resources grouped into waves: each wave depends only on earlier
+        waves, so resources within a wave can be created in parallel.
+        :raises ValueError: If the dependency graph has a cycle.
+        """
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        waves = []
+        while remaining:
+            wave = sorted(name for name, deps in remaining.items() if not deps)
+            if not wave:
+                raise ValueError(f"Resource dependencies contain a cycle involving: {', '.join(sorted(remaining))}.")
+            waves.append(wave)
+            for name in wave:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(wave)
+        return waves
+
+    @functools.cached_property
+    def errors(self):
+        """
+        List of problems found by static validation; empty when the template is valid.
+        """
+        errors = []
+        unknown = sorted(set(self.document) - TEMPLATE_SECTIONS)
+        if unknown:
+            errors.append(f"Unknown top-level sections: {', '.join(unknown)}.")
+        if not isinstance(self.document.get("Resources"), dict) or not self.document["Resources"]:
+            errors.append("Template must declare at least one resource in 'Resources'.")
+            return errors
+        errors.extend(self._parameter_errors())
+        errors.extend(self._condition_errors())
+        errors.extend(self._resource_errors())
+        errors.extend(self._output_errors())
+        try:
+            self.creation_order()
+        except ValueError as e:
+            errors.append(str(e))
+        return errors
+
+    @property
+    def valid(self):
+        return not self.errors
+
+    def _parameter_errors(self):
+        errors = []
+        for name, parameter in self.parameters.items():
+            if not isinstance(parameter, dict) or "Type" not in parameter:
+                errors.append(f"Parameter '{name}' must declare a Type.")
+                continue
+            kind = parameter["Type"]
+            if not isinstance(kind, str):
+                errors.append(f"Parameter '{name}' Type must be a string.")
+                continue
+            if kind not in PARAMETER_TYPES and not kind.startswith(("AWS::", "List<AWS::")):
+                errors.append(f"Parameter '{name}' has unsupported Type '{kind}'.")
+                continue
+            bounds, valid = {}, True
+            for key, convert in (("MinValue", float), ("MaxValue", float), ("MinLength", int), ("MaxLength", int)):
+                if key not in parameter:
+                    continue
+                try:
+                    bounds[key] = convert(parameter[key])
+                except (TypeError, ValueError):
+                    errors.append(f"Parameter '{name}' {key} '{parameter[key]}' is not a number.")
+                    valid = False
+            if "Default" not in parameter or not valid:
+                continue
+            default = parameter["Default"]
+            if kind == "Number" or kind == "List<Number>":
+                values = str(default).split(",") if kind == "List<Number>" else [default]
+                try:
+                    numbers = [float(value) for value in values]
+                except (TypeError, ValueError):
+                    errors.append(f"Parameter '{name}' Default '{default}' is not a {kind}.")
+                    continue
+                low, high = bounds.get("MinValue"), bounds.get("MaxValue")
+                if any((low is not None and n < low) or (high is not None and n > high) for n in numbers):
+                    errors.append(f"Parameter '{name}' Default '{default}' is outside MinValue/MaxValue.")
+            elif kind == "String":
+                pattern = parameter.get("AllowedPattern")
+                if pattern is not None:
+                    try:
+                        if not re.fullmatch(pattern, str(default)):
+                            errors.append(f"Parameter '{name}' Default does not match AllowedPattern.")
+                    except re.error:
+                        errors.append(f"Parameter '{name}' AllowedPattern is not a valid regular expression.")
+                if not bounds.get("MinLength", 0) <= len(str(default)) <= bounds.get("MaxLength", float("inf")):
+                    errors.append(f"Parameter '{name}' Default is outside MinLength/MaxLength.")
+            allowed = parameter.get("AllowedValues")
+            if allowed is not None and str(default) not in {str(value) for value in allowed}:
+                errors.append(f"Parameter '{name}' Default '{default}' is not in AllowedValues.")
+        return errors
+
+    def _condition_errors(self):
+        errors = []
+        for name, condition in self.conditions.items():
+            for item in _walk(condition):
+                if isinstance(item, dict) and "Condition" in item and item["Condition"] not in self.conditions:
+                    errors.append(f"Condition '{name}' uses undefined condition '{item['Condition']}'.")
+            for kind, target, _ in _references(condition):
+                if kind == "GetAtt" or (target not in self.parameters and target not in PSEUDO_PARAMETERS):
+                    errors.append(f"Condition '{name}' may only reference parameters, not '{target}'.")
+        return errors
+
+    def _resource_errors(self):
+        errors = []
+        for name, resource in self.resources.items():
+            if not isinstance(resource, dict) or not isinstance(resource.get("Type"), str):
+                errors.append(f"Resource '{name}' must declare a Type.")
+                continue
+            condition = resource.get("Condition")
+            if condition is not None and condition not in self.conditions:
+                errors.append(f"Resource '{name}' uses undefined condition '{condition}'.")
+            for dep in _depends_on(resource):
+                if dep not in self.resources:
+                    errors.append(f"Resource '{name}' DependsOn undefined resource '{dep}'.")
+                elif self._condition_of(dep) not in (None, condition):
+                    errors.append(f"Resource '{name}' DependsOn '{dep}', which is created only under "
+                                  f"condition '{self._condition_of(dep)}'.")
+            errors.extend(self._reference_errors(f"Resource '{name}'", {k: v for k, v in resource.items() if k != "Condition"}))
+        return errors
+
+    def _condition_of(self, name):
+        resource = self.resources.get(name)
+        return resource.get("Condition") if isinstance(resource, dict) else None
+
+    def _output_errors(self):
+        errors = []
+        for name, output in self.outputs.items():
+            if not isinstance(output, dict) or "Value" not in output:
+                errors.append(f"Output '{name}' must declare a Value.")
+                continue
+            condition = output.get("Condition")
+            if condition is not None and condition not in self.conditions:
+                errors.append(f"Output '{name}' uses undefined condition '{condition}'.")
+            errors.extend(self._reference_errors(f"Output '{name}'", output))
+        return errors
+
+    def _reference_errors(self, owner, node):
+        errors = []
+        for kind, target, attribute in _references(node):
+            if kind == "Ref":
+                if target not in self.parameters and target not in self.resources and target not in PSEUDO_PARAMETERS:
+                    errors.append(f"{owner} references undefined '{target}'.")
+            elif target is None:
+                errors.append(f"{owner} has a malformed Fn::GetAtt.")
+            elif target not in self.resources:
+                errors.append(f"{owner} gets attribute '{attribute}' of undefined resource '{target}'.")
+        for item in _walk(node):
+            if isinstance(item, dict) and isinstance(item.get("Fn::If"), list) and item["Fn::If"]:
+                condition = item["Fn::If"][0]
+                if condition not in self.conditions:
+                    errors.append(f"{owner} uses undefined condition '{condition}' in Fn::If.")
+            elif isinstance(item, dict) and isinstance(item.get("Fn::FindInMap"), list) and item["Fn::FindInMap"]:
+                mapping = item["Fn::FindInMap"][0]
+                if isinstance(mapping, str) and mapping not in (self.document.get("Mappings") or {}):
+                    errors.append(f"{owner} uses undefined mapping '{mapping}'.")
+        return errors
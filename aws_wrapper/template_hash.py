@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def parameter_dict(parameters):
+    """
+    Returns parameters as {key: value}, accepting either a dictionary or a list of
+    {"ParameterKey", "ParameterValue"} entries.
+    """
+    if not parameters:
+        return {}
+    if isinstance(parameters, dict):
+        return {key: str(value) for key, value in parameters.items()}
+    return {p["ParameterKey"]: str(p["ParameterValue"]) for p in parameters if "ParameterValue" in p}
+
+
+def normalize_template(template):
+    """
+    Returns a canonical string for a template so that formatting-only edits hash
+    the same: JSON templates are re-serialized with sorted keys and no whitespace;
+    other templates (YAML) have trailing whitespace and blank edges stripped.
+    """
+    if isinstance(template, dict):
+        return json.dumps(template, sort_keys=True, separators=(",", ":"))
+    try:
+        return json.dumps(json.loads(template), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return "\n".join(line.rstrip() for line in template.strip().splitlines())
+
+
+def deployment_hash(template, parameters=None, capabilities=None):
+    """
+    Returns the SHA-256 of a normalized template together with its parameter values
+    and, when given, its capabilities.
+    """
+    digest = hashlib.sha256(normalize_template(template).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(parameter_dict(parameters), sort_keys=True).encode("utf-8"))
+    if capabilities:
+        # Only hashed when given, so digests recorded without capabilities stay valid.
+        digest.update(b"\0")
+        digest.update(json.dumps(sorted(capabilities)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class StackHashCache:
+    """
+    Thread-safe record of the deployment hash last applied to each stack, and of
+    the stack's outputs once they are known, kept in memory and optionally
+    persisted to a JSON file so later runs start warm.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: JSON file to load from and save to (optional).
+        """
+        self.path = path
+        self._hashes = {}
+        self._outputs = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            for stack_name, entry in saved.items():
+                # Files written before outputs were cached hold the bare digest.
+                if isinstance(entry, str):
+                    entry = {"hash": entry}
+                self._hashes[stack_name] = entry["hash"]
+                if entry.get("outputs") is not None:
+                    self._outputs[stack_name] = entry["outputs"]
+
+    def get(self, stack_name):
+        return self._hashes.get(stack_name)
+
+    def outputs(self, stack_name):
+        """
+        Returns the outputs recorded for the stack's current deployment, or None.
+        """
+        return self._outputs.get(stack_name)
+
+    def set(self, stack_name, digest):
+        with self._lock:
+            if self._hashes.get(stack_name) != digest:
+                self._outputs.pop(stack_name, None)
+            self._hashes[stack_name] = digest
+            if self.path:
+                self._save()
+
+    def set_outputs(self, stack_name, outputs):
+        """
+        Records the outputs of the stack's current deployment; ignored when no
+        deployment hash is recorded for it.
+        """
+        with self._lock:
+            if stack_name not in self._hashes:
+                return
+            self._outputs[stack_name] = dict(outputs)
+            if self.path:
+                self._save()
+
+    def discard(self, stack_name):
+        with self._lock:
+            self._hashes.pop(stack_name, None)
+            self._outputs.pop(stack_name, None)
+            if self.path:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            entries = {
+                stack_name: {"hash": digest, "outputs": self._outputs.get(stack_name)}
+                for stack_name, digest in self._hashes.items()
+            }
+            json.dump(entries, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
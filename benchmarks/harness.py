@@ -0,0 +1,260 @@
+import contextlib
+import datetime
+import json
+import os
+import platform
+import socket
+import threading
+import time
+import tracemalloc
+
+from aws_wrapper.batch import latency_summary
+
+# A benchmark regresses when its throughput drops, or its p50/p99 latency
+# grows, by more than these fractions of the baseline.
+MAX_THROUGHPUT_DROP = 0.15
+MAX_LATENCY_INCREASE = 0.25
+
+
+def current_rss_mb():
+    """
+    Returns the resident set size of this process in MiB, or None where it cannot
+    be read without extra dependencies (only Linux's /proc is supported).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RssSampler:
+    """
+    Samples the process's RSS on a background thread while the block runs, so each
+    benchmark gets its own peak and growth rather than the process-wide high-water mark.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb or 0, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = current_rss_mb()
+        if self.start_mb is not None:
+            self.peak_mb = self.start_mb
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    @property
+    def growth_mb(self):
+        return None if self.start_mb is None else self.peak_mb - self.start_mb
+
+
+def traced_peak_mb(operation, indexes):
+    """
+    Calls ``operation(i)`` for each index with tracemalloc on and returns the
+    peak of Python allocations made during those calls, in MiB.
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        for i in indexes:
+            operation(i)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return round(max(peak - baseline, 0) / (1024 * 1024), 3)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def moto_backend(mode="inprocess"):
+    """
+    Runs the enclosed block against moto.
+    :param mode: "inprocess" patches botocore in this process (mock_aws); "server"
+        starts a moto server on a local port and points the SDK at it, so requests
+        go over HTTP like they would to AWS (needs moto[server]).
+    """
+    if mode == "inprocess":
+        from moto import mock_aws
+
+        with mock_aws():
+            yield
+        return
+    if mode != "server":
+        raise ValueError(f"Unknown mode '{mode}'; expected 'inprocess' or 'server'.")
+
+    from moto.server import ThreadedMotoServer
+
+    port = _free_port()
+    server = ThreadedMotoServer(port=port, verbose=False)
+    server.start()
+    environment = {
+        "AWS_ENDPOINT_URL": f"http://127.0.0.1:{port}",
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }
+    previous = {key: os.environ.get(key) for key in environment}
+    os.environ.update(environment)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        server.stop()
+
+
+class BenchmarkRun:
+    """
+    Times benchmark cases and collects their results.
+    """
+
+    def __init__(self, mode="inprocess", warmup=3):
+        """
+        :param mode: moto mode the run uses, recorded with the results.
+        :param warmup: Untimed calls made before each case.
+        """
+        self.mode = mode
+        self.warmup = warmup
+        self.results = {}
+
+    def measure(self, name, operation, iterations, items_per_call=1):
+        """
+        Calls ``operation(i)`` for i in range(iterations) and records its throughput
+        and latency.
+        :param name: Benchmark name, e.g. "s3_upload_64KB".
+        :param operation: Callable taking the iteration number.
+        :param iterations: Number of timed calls.
+        :param items_per_call: Items each call handles (e.g. 25 for a BatchWriteItem),
+            so ops_per_second counts items rather than calls.
+        :return: The benchmark's result dictionary.
+        """
+        # RSS, which includes native memory, is sampled over the timed calls. Python
+        # allocations are traced over the warmup calls only, since tracemalloc slows
+        # down every allocation and would skew the timings.
+        alloc_mb = traced_peak_mb(operation, range(iterations, iterations + self.warmup)) if self.warmup else None
+        latencies = []
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            for i in range(iterations):
+                call_started = time.perf_counter()
+                operation(i)
+                latencies.append(time.perf_counter() - call_started)
+            elapsed = time.perf_counter() - started
+
+        summary = latency_summary(latencies)
+        self.results[name] = {
+            "iterations": iterations,
+            "ops": iterations * items_per_call,
+            "elapsed": round(elapsed, 4),
+            "ops_per_second": round(iterations * items_per_call / elapsed, 2) if elapsed > 0 else None,
+            "p50_ms": round(summary["p50"] * 1000, 3),
+            "p99_ms": round(summary["p99"] * 1000, 3),
+            "mean_ms": round(summary["mean"] * 1000, 3),
+            "peak_rss_mb": None if rss.peak_mb is None else round(rss.peak_mb, 1),
+            "rss_growth_mb": None if rss.growth_mb is None else round(rss.growth_mb, 1),
+            "peak_alloc_mb": alloc_mb,
+        }
+        return self.results[name]
+
+    def report(self):
+        """
+        Returns the run as a JSON-serializable dictionary.
+        """
+        import moto
+
+        return {
+            "meta": {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "mode": self.mode,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "moto": getattr(moto, "__version__", None),
+            },
+            "results": self.results,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+        return f"Results written to '{path}'."
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current, baseline, max_throughput_drop=MAX_THROUGHPUT_DROP, max_latency_increase=MAX_LATENCY_INCREASE):
+    """
+    Compares two reports benchmark by benchmark.
+    :param current: Report of the run being checked, as returned by BenchmarkRun.report().
+    :param baseline: Report to compare against.
+    :return: List of regressions, {"benchmark", "metric", "baseline", "current", "change"},
+        with change as a signed fraction of the baseline.
+    """
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        checks = [("ops_per_second", -max_throughput_drop), ("p50_ms", max_latency_increase), ("p99_ms", max_latency_increase)]
+        for metric, threshold in checks:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (threshold < 0 and change < threshold) or (threshold > 0 and change > threshold):
+                regressions.append({
+                    "benchmark": name, "metric": metric, "baseline": old, "current": new, "change": round(change, 4),
+                })
+    return regressions
+
+
+def format_results(current, baseline=None):
+    """
+    Renders a report as a text table, with the change against a baseline if given.
+    """
+    header = f"{'benchmark':<28}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'rss MiB':>10}{'+rss MiB':>10}{'alloc MiB':>11}"
+    lines = [header + ("   vs baseline (ops/s)" if baseline else ""), "-" * len(header)]
+    for name, result in sorted(current["results"].items()):
+        line = (f"{name:<28}{result['ops_per_second'] or 0:>12.1f}{result['p50_ms']:>10.3f}"
+                f"{result['p99_ms']:>10.3f}{result.get('peak_rss_mb') or 0:>10.1f}{result.get('rss_growth_mb') or 0:>10.1f}"
+                f"{result.get('peak_alloc_mb') or 0:>11.3f}")
+        before = (baseline or {}).get("results", {}).get(name)
+        if before and before.get("ops_per_second") and result["ops_per_second"]:
+            line += f"   {(result['ops_per_second'] - before['ops_per_second']) / before['ops_per_second']:+.1%}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,177 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_wrapper import instrumentation
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.database import Database
+from aws_wrapper.queue import Queue
+from aws_wrapper.storage import Storage
+from benchmarks.harness import (
+    MAX_LATENCY_INCREASE,
+    MAX_THROUGHPUT_DROP,
+    BenchmarkRun,
+    compare,
+    format_results,
+    load_results,
+    moto_backend,
+)
+
+OBJECT_SIZES = {"1KB": 1024, "64KB": 64 * 1024, "1MB": 1024 * 1024}
+
+
+def _iterations(base, scale):
+    return max(3, int(base * scale))
+
+
+def bench_storage(run, scale):
+    storage = Storage()
+    storage.create_bucket("benchmark-bucket")
+    for label, size in OBJECT_SIZES.items():
+        payload = os.urandom(size)
+        # Fewer calls for larger objects, so every size moves a similar amount of data.
+        iterations = _iterations(max(10, 200 * 1024 // max(size, 1024) // 4), scale)
+        run.measure(f"s3_upload_{label}", lambda i: storage.upload_file("benchmark-bucket", f"{label}/{i}", payload), iterations)
+        run.measure(f"s3_download_{label}", lambda i: storage.download_file("benchmark-bucket", f"{label}/{i}"), iterations)
+
+
+def bench_queue(run, scale):
+    queue = Queue()
+    queue_url = queue.create_queue("benchmark-queue")
+    iterations = _iterations(200, scale)
+    run.measure("sqs_send", lambda i: queue.send_message(queue_url, f"message {i}"), iterations)
+
+    def send_batch(i):
+        queue.send_message_batch(queue_url, [{"Id": str(n), "MessageBody": f"batch {i}/{n}"} for n in range(10)])
+
+    run.measure("sqs_send_batch", send_batch, _iterations(50, scale), items_per_call=10)
+
+    def consume(i):
+        messages = queue.receive_messages(queue_url, max_number=10)
+        queue.delete_messages_batch(queue_url, [message["ReceiptHandle"] for message in messages])
+
+    # Everything sent above, less the warmup calls' share, is still there to consume.
+    run.measure("sqs_receive_delete", consume, _iterations(20, scale), items_per_call=10)
+
+
+def bench_database(run, scale):
+    database = Database()
+    database.create_table(
+        "benchmark-table",
+        key_schema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        attribute_definitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        provisioned_throughput={"ReadCapacityUnits": 1000, "WriteCapacityUnits": 1000},
+    )
+    payload = "x" * 200
+
+    def batch_write(i):
+        items = [{"id": {"S": f"{i}-{n}"}, "payload": {"S": payload}} for n in range(25)]
+        database.batch_write_items("benchmark-table", items)
+
+    iterations = _iterations(40, scale)
+    run.measure("dynamodb_batch_write", batch_write, iterations, items_per_call=25)
+
+    def batch_read(i):
+        database.batch_get_items("benchmark-table", [{"id": {"S": f"{i % iterations}-{n}"}} for n in range(25)])
+
+    run.measure("dynamodb_batch_read", batch_read, iterations, items_per_call=25)
+    table_size = len(database.scan_table("benchmark-table"))
+    run.measure("dynamodb_scan", lambda i: database.scan_table("benchmark-table"), _iterations(5, scale), items_per_call=table_size)
+
+
+def bench_cloudwatch(run, scale):
+    cloudwatch = CloudWatch()
+    run.measure(
+        "cloudwatch_put_metric",
+        lambda i: cloudwatch.put_metric_data("Benchmark", "Latency", float(i), "Milliseconds"),
+        _iterations(200, scale),
+    )
+    cloudwatch.create_log_group("benchmark-group")
+    cloudwatch.create_log_stream("benchmark-group", "benchmark-stream")
+
+    def put_logs(i):
+        now = int(time.time() * 1000)
+        cloudwatch.put_log_events("benchmark-group", "benchmark-stream", [{"timestamp": now, "message": f"{i}/{n}"} for n in range(100)])
+
+    run.measure("logs_put_events", put_logs, _iterations(50, scale), items_per_call=100)
+
+
+@instrumentation.instrumented
+class _Noop:
+    def call(self):
+        return None
+
+
+def bench_instrumentation(run, scale):
+    # Cost of the @instrumented wrapper alone while recording is off.
+    noop = _Noop()
+    calls = 1000
+
+    def call_many(i):
+        for _ in range(calls):
+            noop.call()
+
+    previous = instrumentation.current()
+    instrumentation.disable()
+    try:
+        run.measure("instrumentation_disabled", call_many, _iterations(200, scale), items_per_call=calls)
+    finally:
+        if previous is not None:
+            instrumentation.enable(previous)
+
+
+BENCHMARKS = {
+    "s3": bench_storage,
+    "sqs": bench_queue,
+    "dynamodb": bench_database,
+    "cloudwatch": bench_cloudwatch,
+    "instrumentation": bench_instrumentation,
+}
+
+
+def run_benchmarks(mode="inprocess", scale=1.0, only=None, warmup=3):
+    """
+    Runs the benchmark groups against moto.
+    :param mode: "inprocess" or "server"; see moto_backend().
+    :param scale: Multiplier applied to every benchmark's number of calls.
+    :param only: Names of the groups to run (all of BENCHMARKS by default).
+    :return: BenchmarkRun holding the results.
+    """
+    run = BenchmarkRun(mode, warmup)
+    for name in only or BENCHMARKS:
+        with moto_backend(mode):
+            BENCHMARKS[name](run, scale)
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark aws_wrapper against moto.")
+    parser.add_argument("--mode", choices=["inprocess", "server"], default="inprocess")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the number of calls per benchmark.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmark groups to run.")
+    parser.add_argument("--output", default="benchmark-results.json", help="File to write the results to.")
+    parser.add_argument("--baseline", help="Results file to compare against.")
+    parser.add_argument("--max-throughput-drop", type=float, default=MAX_THROUGHPUT_DROP)
+    parser.add_argument("--max-latency-increase", type=float, default=MAX_LATENCY_INCREASE)
+    args = parser.parse_args(argv)
+
+    run = run_benchmarks(args.mode, args.scale, args.only)
+    report = run.report()
+    print(run.save(args.output))
+    baseline = load_results(args.baseline) if args.baseline else None
+    print(format_results(report, baseline))
+    if baseline is None:
+        return 0
+
+    regressions = compare(report, baseline, args.max_throughput_drop, args.max_latency_increase)
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import importlib.util
+import json
+import os
+import socket
+import time
+import unittest
+from unittest import mock
+
+HAS_AIO = all(importlib.util.find_spec(name) for name in ("aiobotocore", "flask"))
+
+if HAS_AIO:
+    from moto.server import ThreadedMotoServer
+
+    from aws_wrapper.aio import (
+        AsyncClientPool,
+        AsyncCloudFormation,
+        AsyncCloudWatch,
+        AsyncDatabase,
+        AsyncIAM,
+        AsyncQueue,
+        AsyncStorage,
+    )
+    from aws_wrapper.credentials import RoleSessionCache
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@unittest.skipUnless(HAS_AIO, "aiobotocore and moto[server] are required")
+class TestAsyncWrappers(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        port = free_port()
+        cls.server = ThreadedMotoServer(port=port, verbose=False)
+        cls.server.start()
+        cls.env = mock.patch.dict(os.environ, {
+            "AWS_ENDPOINT_URL": f"http://127.0.0.1:{port}",
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+        })
+        cls.env.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.env.stop()
+        cls.server.stop()
+
+    async def asyncSetUp(self):
+        self.pool = AsyncClientPool(max_pool_connections=50)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_storage_and_queue_share_one_pool(self):
+        storage = await AsyncStorage(client_pool=self.pool).open()
+        queue = await AsyncQueue(client_pool=self.pool).open()
+
+        self.assertEqual(await storage.create_bucket("async-bucket"), "Bucket 'async-bucket' created successfully.")
+        await asyncio.gather(*(storage.upload_file("async-bucket", f"key-{i}", b"x") for i in range(50)))
+        self.assertEqual(len(await storage.list_objects("async-bucket")), 50)
+        self.assertTrue(await storage.object_exists("async-bucket", "key-0"))
+        self.assertFalse(await storage.object_exists("async-bucket", "missing"))
+        self.assertEqual(await storage.download_file("async-bucket", "key-0"), b"x")
+
+        queue_url = await queue.create_queue("async-queue")
+        message_ids = await asyncio.gather(*(queue.send_message(queue_url, f"message {i}") for i in range(20)))
+        self.assertEqual(len(set(message_ids)), 20)
+        self.assertEqual(await queue.monitor_message_count(queue_url), 20)
+        self.assertIs(await AsyncStorage(client_pool=self.pool).create_client("s3"), storage.s3)
+
+    async def test_database_and_logs(self):
+        async with AsyncDatabase(client_pool=self.pool) as database:
+            await database.create_table(
+                "AsyncTable",
+                key_schema=[{"AttributeName": "id", "KeyType": "HASH"}],
+                attribute_definitions=[{"AttributeName": "id", "AttributeType": "S"}],
+                provisioned_throughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+            )
+            await asyncio.gather(*(database.put_item("AsyncTable", {"id": {"S": str(i)}}) for i in range(10)))
+            self.assertEqual(len(await database.scan_table("AsyncTable")), 10)
+            await database.batch_write_items("AsyncTable", [{"id": {"S": f"batch-{i}"}} for i in range(30)])
+            self.assertEqual(len(await database.batch_get_items("AsyncTable", [{"id": {"S": f"batch-{i}"}} for i in range(30)])), 30)
+
+        async with AsyncCloudWatch(client_pool=self.pool) as cloudwatch:
+            await cloudwatch.create_log_group("async-group")
+            await cloudwatch.create_log_stream("async-group", "a")
+            await cloudwatch.create_log_stream("async-group", "b")
+            now = int(time.time() * 1000)
+            await cloudwatch.put_log_events("async-group", "a", [{"timestamp": now, "message": "a1"}, {"timestamp": now + 2, "message": "a2"}])
+            await cloudwatch.put_log_events("async-group", "b", [{"timestamp": now + 1, "message": "b1"}])
+            self.assertEqual([e["message"] for e in await cloudwatch.get_log_events("async-group", "a")], ["a1", "a2"])
+            merged = [e["message"] async for e in cloudwatch.iter_filtered_log_events("async-group", ["a", "b"])]
+            self.assertEqual(merged, ["a1", "b1", "a2"])
+            self.assertEqual(await cloudwatch.list_log_groups(), ["async-group"])
+
+            await cloudwatch.put_metric_data("Async", "Requests", 5.0, "Count")
+            end = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=1)
+            queries = [
+                {"id": "requests", "namespace": "Async", "metric_name": "Requests", "stat": "Sum", "period": 60},
+                {"id": "doubled", "expression": "requests * 2"},
+            ]
+            data = await cloudwatch.get_metric_data(queries, end - datetime.timedelta(hours=1), end)
+            self.assertEqual(sorted(data["Values"]), ["doubled", "requests"])
+            self.assertEqual(len(data["Values"]["requests"]), len(data["Timestamps"]))
+
+    async def test_control_plane_wrappers(self):
+        async with AsyncIAM(client_pool=self.pool) as iam:
+            await asyncio.gather(*(iam.create_iam_user(f"user-{i}") for i in range(5)))
+            self.assertEqual(sorted(await iam.list_iam_users()), [f"user-{i}" for i in range(5)])
+            # Compound operations run on the synchronous wrapper in a worker thread.
+            summary = await iam.bulk_create(groups=["async-devs"], memberships={"async-devs": ["user-0"]})
+            self.assertEqual(summary["failed"], {})
+
+        async with AsyncCloudFormation(client_pool=self.pool) as cloudformation:
+            template = json.dumps({"Resources": {"Queue": {"Type": "AWS::SQS::Queue"}}})
+            await cloudformation.create_stack("async-stack", template)
+            self.assertEqual((await cloudformation.describe_stack("async-stack"))["StackName"], "async-stack")
+            self.assertIsNone(await cloudformation.find_stack("missing-stack"))
+            self.assertIn("async-stack", await cloudformation.list_stacks())
+            self.assertEqual(len(await cloudformation.list_stack_resources("async-stack")), 1)
+
+    async def test_role_credentials_come_from_the_cache(self):
+        cache = RoleSessionCache()
+        async with AsyncStorage(role_arn="arn:aws:iam::123456789012:role/async", credential_cache=cache) as storage:
+            await storage.create_bucket("async-role-bucket")
+            await asyncio.gather(*(storage.upload_file("async-role-bucket", f"key-{i}", b"x") for i in range(10)))
+        self.assertEqual(cache.stats["assume_role_calls"], 1)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+from moto import mock_aws
+import boto3
+import datetime
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.alarm_evaluator import AlarmEvaluator, replay_alarm
+
+
+ALARM_DEFINITION = {
+    "alarm_name": "HighLatency",
+    "metric_name": "Latency",
+    "namespace": "TestNamespace",
+    "threshold": 100,
+    "comparison_operator": "GreaterThanThreshold",
+    "evaluation_periods": 2,
+    "period": 60,
+    "statistic": "Average",
+}
+
+
+class TestReplayAlarm(unittest.TestCase):
+    def test_transitions_need_consecutive_breaches(self):
+        timestamps = [60 * i for i in range(8)]
+        values = [10, 150, 20, 150, 160, 170, 10, 10]
+        transitions = replay_alarm(ALARM_DEFINITION, timestamps, values, 60, 480)
+        self.assertEqual(
+            [(t["NewState"], t["Timestamp"].timestamp()) for t in transitions],
+            [("OK", 60), ("ALARM", 240), ("OK", 360)],
+        )
+
+    def test_missing_data_policies(self):
+        timestamps = [0, 60]
+        values = [150, 150]
+        transitions = replay_alarm(ALARM_DEFINITION, timestamps, values, 60, 300)
+        self.assertEqual([t["NewState"] for t in transitions], ["ALARM", "OK", "INSUFFICIENT_DATA"])
+
+        breaching = dict(ALARM_DEFINITION, treat_missing_data="breaching")
+        transitions = replay_alarm(breaching, timestamps, values, 60, 300)
+        self.assertEqual([t["NewState"] for t in transitions], ["ALARM"])
+
+        ignore = dict(ALARM_DEFINITION, treat_missing_data="ignore")
+        transitions = replay_alarm(ignore, timestamps, values, 60, 300)
+        self.assertEqual([t["NewState"] for t in transitions], ["ALARM"])
+
+    def test_unsupported_operator(self):
+        with self.assertRaises(ValueError):
+            replay_alarm(dict(ALARM_DEFINITION, comparison_operator="LessThanLowerThreshold"), [], [], 0, 60)
+
+
+class TestAlarmEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.cloudwatch = CloudWatch(region="us-east-1")
+        self.evaluator = AlarmEvaluator(self.cloudwatch)
+
+    @mock_aws
+    def test_backtest_alarms_sharing_a_metric(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+        now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+        start = now - datetime.timedelta(minutes=60)
+        for minute, value in enumerate([10, 150, 160, 10, 10, 10]):
+            self.cloudwatch.cloudwatch.put_metric_data(
+                Namespace="TestNamespace",
+                MetricData=[{"MetricName": "Latency", "Value": value, "Timestamp": start + datetime.timedelta(minutes=minute)}],
+            )
+
+        strict = ALARM_DEFINITION
+        loose = dict(ALARM_DEFINITION, alarm_name="AnyHighLatency", evaluation_periods=1)
+        with mock.patch.object(self.cloudwatch, "get_metric_statistics", wraps=self.cloudwatch.get_metric_statistics) as fetch:
+            results = self.evaluator.evaluate_many([strict, loose], start, start + datetime.timedelta(minutes=6))
+        self.assertEqual(fetch.call_count, 1)
+
+        self.assertEqual([t["NewState"] for t in results["HighLatency"]], ["OK", "ALARM", "OK"])
+        self.assertEqual(results["HighLatency"][1]["Value"], 160)
+        self.assertEqual([t["NewState"] for t in results["AnyHighLatency"]], ["OK", "ALARM", "OK"])
+        self.assertEqual(results["AnyHighLatency"][1]["Timestamp"], start + datetime.timedelta(minutes=1))
@@ -0,0 +1,116 @@
+import threading
+import time
+import unittest
+
+import boto3
+from moto import mock_aws
+
+from aws_wrapper.batch import BatchExecutor, Operation, percentile, run_batch
+from aws_wrapper.storage import Storage
+
+
+class TestBatchExecutor(unittest.TestCase):
+    @mock_aws
+    def test_wrapper_calls(self):
+        storage = Storage(region="us-east-1")
+        storage.s3 = boto3.client("s3", region_name="us-east-1")
+        storage.create_bucket("batch-bucket")
+
+        uploads = (Operation(storage.upload_file, ("batch-bucket", f"key-{i}", b"data"), key=f"key-{i}") for i in range(40))
+        report = BatchExecutor(max_workers=8, rate_limits={"Storage": 1000}).run(uploads)
+        self.assertEqual(len(report["results"]), 40)
+        self.assertEqual(report["errors"], {})
+        summary = report["summary"]
+        self.assertEqual(summary["succeeded"], 40)
+        self.assertEqual(summary["services"]["Storage"]["succeeded"], 40)
+        self.assertLessEqual(summary["latency"]["p50"], summary["latency"]["p99"])
+        self.assertEqual(len(storage.list_objects("batch-bucket")), 40)
+
+    def test_input_is_read_lazily(self):
+        produced = []
+
+        def operations():
+            for i in range(1000):
+                produced.append(i)
+                yield (time.sleep, 0.001)
+
+        executor = BatchExecutor(max_workers=4, max_pending=8)
+        stream = executor.stream(operations())
+        for _ in range(5):
+            next(stream)
+        self.assertLess(len(produced), 20)
+        stream.close()
+
+    def test_results_arrive_in_completion_order(self):
+        def sleep_then_return(seconds):
+            time.sleep(seconds)
+            return seconds
+
+        outcomes = list(BatchExecutor(max_workers=3).stream([(sleep_then_return, 0.2), (sleep_then_return, 0.1), (sleep_then_return, 0.0)]))
+        self.assertEqual([outcome["key"] for outcome in outcomes], [2, 1, 0])
+
+    def test_errors_and_stop_on_error(self):
+        def fail(i):
+            raise ValueError(f"operation {i} failed")
+
+        report = run_batch([(fail, 1), (abs, -2)], max_workers=2)
+        self.assertEqual(report["results"], {1: 2})
+        self.assertEqual(report["errors"], {0: "operation 1 failed"})
+
+        report = run_batch(((fail, i) for i in range(100)), max_workers=1, stop_on_error=True)
+        # Only the operations already submitted when the first one failed are reported.
+        self.assertGreaterEqual(len(report["errors"]), 1)
+        self.assertLessEqual(len(report["errors"]) + len(report["cancelled"]), 3)
+
+    def test_cancel(self):
+        executor = BatchExecutor(max_workers=1, max_pending=4)
+        gate = threading.Event()
+        operations = [(abs, 1)] + [(gate.wait, 5) for _ in range(49)]
+        outcomes = []
+        for outcome in executor.stream(operations):
+            outcomes.append(outcome)
+            if len(outcomes) == 1:
+                executor.cancel()
+                gate.set()
+        # Operations already submitted are reported, queued ones as cancelled; nothing more is read.
+        self.assertEqual(len(outcomes), 4)
+        self.assertEqual(outcomes[0]["status"], "succeeded")
+        self.assertGreaterEqual(executor.summary()["cancelled"], 2)
+
+    def test_rate_limit_per_service(self):
+        executor = BatchExecutor(max_workers=8, rate_limits={"slow": 20})
+        operations = [Operation(abs, (i,), service="slow") for i in range(10)]
+        operations += [Operation(abs, (i,), service="fast") for i in range(100)]
+        started = time.monotonic()
+        summary = executor.run(operations)["summary"]
+        # The burst of 20 covers all ten slow calls; the fast calls are never limited.
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual((summary["services"]["slow"]["succeeded"], summary["services"]["fast"]["succeeded"]), (10, 100))
+
+        executor = BatchExecutor(max_workers=8, rate_limits={"slow": 20})
+        executor.rate_limits["slow"].try_acquire(20)
+        started = time.monotonic()
+        executor.run(Operation(abs, (i,), service="slow") for i in range(5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_rate_limited_service_does_not_hold_workers(self):
+        executor = BatchExecutor(max_workers=4, rate_limits={"slow": 2})
+        executor.rate_limits["slow"].try_acquire(2)
+        finished = {}
+        operations = [Operation(abs, (i,), key=f"slow-{i}", service="slow") for i in range(4)]
+        operations += [Operation(abs, (i,), key=f"fast-{i}", service="fast") for i in range(4)]
+        started = time.monotonic()
+        for outcome in executor.stream(operations):
+            finished[outcome["key"]] = time.monotonic() - started
+        # The fast calls are submitted while the slow ones wait for tokens.
+        self.assertLess(max(finished[f"fast-{i}"] for i in range(4)), 0.3)
+        self.assertGreaterEqual(max(finished[f"slow-{i}"] for i in range(4)), 1.0)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.99), percentile(values, 1.0)), (50, 99, 100))
+        self.assertIsNone(percentile([], 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.harness import BenchmarkRun, compare, current_rss_mb, format_results, load_results
+from benchmarks.run_benchmarks import run_benchmarks
+
+
+def report(**results):
+    return {"meta": {}, "results": {
+        name: {"ops_per_second": ops, "p50_ms": p50, "p99_ms": p99, "peak_rss_mb": 100.0, "rss_growth_mb": 0.5, "peak_alloc_mb": 1.5}
+        for name, (ops, p50, p99) in results.items()
+    }}
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_measure(self):
+        run = BenchmarkRun(warmup=2)
+        calls = []
+        result = run.measure("append", calls.append, 10, items_per_call=5)
+        self.assertEqual(len(calls), 12)
+        self.assertEqual(result["ops"], 50)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertGreaterEqual(result["peak_alloc_mb"], 0)
+        if result["peak_rss_mb"] is not None:
+            self.assertGreaterEqual(result["rss_growth_mb"], 0)
+            self.assertGreaterEqual(result["peak_rss_mb"], result["rss_growth_mb"])
+        self.assertIsNone(BenchmarkRun(warmup=0).measure("none", calls.append, 1)["peak_alloc_mb"])
+
+    @unittest.skipIf(current_rss_mb() is None, "RSS is only read from /proc")
+    def test_rss_growth_is_per_benchmark(self):
+        run = BenchmarkRun(warmup=0)
+        held = []
+        grown = run.measure("grow", lambda i: held.append(bytearray(8 * 1024 * 1024)), 4)
+        flat = run.measure("flat", lambda i: None, 4)
+        self.assertGreaterEqual(grown["rss_growth_mb"], 16)
+        self.assertLess(flat["rss_growth_mb"], 8)
+
+    def test_compare_against_baseline(self):
+        baseline = report(upload=(1000, 2.0, 5.0), download=(2000, 1.0, 3.0), removed=(10, 1.0, 1.0))
+        current = report(upload=(800, 2.1, 5.0), download=(1950, 1.5, 3.2), added=(5, 1.0, 1.0))
+
+        regressions = compare(current, baseline, max_throughput_drop=0.15, max_latency_increase=0.25)
+        self.assertEqual(
+            [(r["benchmark"], r["metric"], r["change"]) for r in regressions],
+            [("download", "p50_ms", 0.5), ("upload", "ops_per_second", -0.2)],
+        )
+        self.assertEqual(compare(current, baseline, max_throughput_drop=0.5, max_latency_increase=0.6), [])
+        self.assertIn("-20.0%", format_results(current, baseline))
+
+    def test_run_against_moto(self):
+        run = run_benchmarks(scale=0.01, only=["s3", "dynamodb"], warmup=1)
+        results = run.report()["results"]
+        self.assertIn("s3_download_1MB", results)
+        self.assertEqual(results["dynamodb_batch_write"]["ops"], 75)
+        self.assertGreater(results["dynamodb_scan"]["ops_per_second"], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            run.save(path)
+            saved = load_results(path)
+        self.assertEqual(saved["meta"]["mode"], "inprocess")
+        self.assertEqual(saved["results"], json.loads(json.dumps(results)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
+import json
+import os
+import tempfile
 import unittest
+from unittest import mock
 from moto import mock_aws
 import boto3
-from aws_wrapper.cloudformation import CloudFormation
+from aws_wrapper.cloudformation import CloudFormation, TEMPLATE_BODY_LIMIT
+from aws_wrapper.storage import Storage
+from aws_wrapper.template_hash import StackHashCache, deployment_hash
 
 
 class TestCloudFormation(unittest.TestCase):
@@ -81,6 +87,8 @@ class TestCloudFormation(unittest.TestCase):
         # Test describing stack
         stack = self.cloudformation.describe_stack("TestStack")
         self.assertEqual(stack["StackName"], "TestStack")
+        self.assertEqual(self.cloudformation.find_stack("TestStack")["StackName"], "TestStack")
+        self.assertIsNone(self.cloudformation.find_stack("MissingStack"))
 
     @mock_aws
     def test_describe_stack_resources(self):
@@ -144,5 +152,138 @@ class TestCloudFormation(unittest.TestCase):
         self.assertIn("Deny", policy)
 
 
+class TestCloudFormationDeployStack(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+        self.template = {
+            "Parameters": {"Env": {"Type": "String", "Default": "dev"}, "Size": {"Type": "String"}},
+            "Resources": {"Queue": {"Type": "AWS::SQS::Queue"}},
+        }
+
+    def test_hash_ignores_formatting(self):
+        compact = json.dumps(self.template)
+        pretty = json.dumps(self.template, indent=4)
+        self.assertEqual(deployment_hash(compact, {"Size": "1"}), deployment_hash(pretty, [{"ParameterKey": "Size", "ParameterValue": "1"}]))
+        self.assertNotEqual(deployment_hash(compact, {"Size": "1"}), deployment_hash(compact, {"Size": "2"}))
+        self.assertNotEqual(deployment_hash(compact, {"Size": "1"}), deployment_hash(compact, {"Size": "1"}, ["CAPABILITY_IAM"]))
+
+    @mock_aws
+    def test_create_skip_and_update(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        result = self.cloudformation.deploy_stack("app", self.template, {"Size": "1"}, poll_interval=0.01)
+        self.assertEqual(result["action"], "created")
+        self.assertEqual(result["stack_status"], "CREATE_COMPLETE")
+
+        # Unchanged: answered from the hash cache without touching the API.
+        with mock.patch.object(self.cloudformation, "cloudformation") as client:
+            result = self.cloudformation.deploy_stack("app", json.dumps(self.template, indent=2), {"Size": "1"})
+        self.assertEqual(result["action"], "skipped")
+        self.assertEqual(client.method_calls, [])
+
+        result = self.cloudformation.deploy_stack("app", self.template, {"Size": "2"}, poll_interval=0.01)
+        self.assertEqual(result["action"], "updated")
+        self.assertTrue(result["change_set_name"].startswith("deploy-"))
+        self.assertEqual(result["stack_status"], "UPDATE_COMPLETE")
+
+        # Deleted out-of-band: the stale hash is dropped and the stack created again.
+        self.cloudformation.template_hashes.set_outputs("app", {"QueueUrl": "stale"})
+        self.cloudformation.cloudformation.delete_stack(StackName="app")
+        result = self.cloudformation.deploy_stack("app", self.template, {"Size": "1"}, poll_interval=0.01)
+        self.assertEqual(result["action"], "created")
+        self.assertIsNone(self.cloudformation.template_hashes.outputs("app"))
+
+    def test_hash_cache_keeps_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hashes.json")
+            with open(path, "w") as f:
+                json.dump({"legacy": "abc"}, f)
+            cache = StackHashCache(path)
+            self.assertEqual((cache.get("legacy"), cache.outputs("legacy")), ("abc", None))
+
+            cache.set_outputs("unknown", {"Key": "value"})
+            cache.set("app", "digest-1")
+            cache.set_outputs("app", {"Key": "value"})
+            self.assertEqual(StackHashCache(path).outputs("app"), {"Key": "value"})
+            self.assertIsNone(StackHashCache(path).outputs("unknown"))
+
+            # A new deployment's outputs are unknown until recorded again.
+            cache.set("app", "digest-2")
+            self.assertIsNone(StackHashCache(path).outputs("app"))
+
+    @mock_aws
+    def test_cold_cache_checks_deployed_template(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", json.dumps(self.template), [{"ParameterKey": "Size", "ParameterValue": "1"}])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hashes.json")
+            self.cloudformation.template_hashes = StackHashCache(path)
+            result = self.cloudformation.deploy_stack("app", self.template, {"Size": "1"})
+            self.assertEqual(result["action"], "unchanged")
+            self.assertEqual(StackHashCache(path).get("app"), deployment_hash(self.template, {"Size": "1"}))
+
+        # Overriding a parameter that was left at its default is a change.
+        self.cloudformation.template_hashes = StackHashCache()
+        result = self.cloudformation.deploy_stack("app", self.template, {"Size": "1", "Env": "prod"}, poll_interval=0.01)
+        self.assertEqual(result["action"], "updated")
+
+    @mock_aws
+    def test_change_set_without_changes_is_discarded(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", json.dumps(self.template), [{"ParameterKey": "Size", "ParameterValue": "1"}])
+
+        # The deployed template differs only in a way CloudFormation ignores.
+        with mock.patch.object(self.cloudformation, "_deployed_matches", return_value=False):
+            result = self.cloudformation.deploy_stack("app", self.template, {"Size": "1"})
+        self.assertEqual(result["action"], "unchanged")
+        change_sets = self.cloudformation.cloudformation.list_change_sets(StackName="app")["Summaries"]
+        self.assertEqual(change_sets, [])
+
+
+class TestCloudFormationTemplateStaging(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+        resources = {
+            f"Queue{i}": {
+                "Type": "AWS::SQS::Queue",
+                "Properties": {"QueueName": f"staged-queue-{i:03d}", "Tags": [{"Key": "purpose", "Value": "x" * 100}]},
+            }
+            for i in range(300)
+        }
+        self.template = json.dumps({"Resources": resources}, indent=2)
+        self.assertGreater(len(self.template), TEMPLATE_BODY_LIMIT)
+
+    @mock_aws
+    def test_large_template_requires_bucket(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        with self.assertRaises(ValueError):
+            self.cloudformation.validate_template(self.template)
+
+    @mock_aws
+    def test_large_templates_are_staged_once(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        storage = Storage(region="us-east-1")
+        storage.s3 = boto3.client("s3", region_name="us-east-1")
+        storage.create_bucket("templates")
+        self.cloudformation.use_template_bucket("templates", storage=storage)
+
+        with mock.patch.object(storage, "upload_file", wraps=storage.upload_file) as upload:
+            self.cloudformation.validate_template(self.template)
+            self.cloudformation.create_stack("big-stack", self.template)
+            self.assertEqual(upload.call_count, 1)
+
+            # A fresh wrapper finds the content-addressed key already in the bucket.
+            other = CloudFormation(region="us-east-1")
+            other.cloudformation = self.cloudformation.cloudformation
+            other.use_template_bucket("templates", storage=storage)
+            url = other.stage_template(self.template)
+            self.assertEqual(upload.call_count, 1)
+
+        self.assertTrue(url.startswith("https://templates.s3.us-east-1.amazonaws.com/cloudformation-templates/"))
+        self.assertEqual(len(storage.list_objects("templates")), 1)
+        resources = self.cloudformation.describe_stack_resources("big-stack")
+        self.assertEqual(len(resources), 300)
+
+
 if __name__ == "__main__":
     unittest.main()
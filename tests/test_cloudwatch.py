@@ -3,6 +3,11 @@ from moto import mock_aws
 import boto3
 from aws_wrapper.cloudwatch import CloudWatch
 import os
+import datetime
+import math
+import threading
+import time
+from unittest import mock
 
 class TestCloudWatch(unittest.TestCase):
     def setUp(self):
@@ -178,4 +183,224 @@ class TestCloudWatch(unittest.TestCase):
         )
         alarms = self.cloudwatch.list_alarms()
         self.assertTrue(any(alarm["AlarmName"] == alarm_name for alarm in alarms))
-        self.cloudwatch.delete_alarm(alarm_name)
\ No newline at end of file
+        self.cloudwatch.delete_alarm(alarm_name)
+
+    @mock_aws
+    def test_get_metric_data_aligns_columns(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+        now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+        for minutes_ago, value in [(3, 1.0), (2, 2.0), (1, 3.0)]:
+            self.cloudwatch.cloudwatch.put_metric_data(
+                Namespace="TestNamespace",
+                MetricData=[{
+                    "MetricName": "Requests",
+                    "Value": value,
+                    "Timestamp": now - datetime.timedelta(minutes=minutes_ago),
+                }],
+            )
+        self.cloudwatch.cloudwatch.put_metric_data(
+            Namespace="TestNamespace",
+            MetricData=[{"MetricName": "Errors", "Value": 5.0, "Timestamp": now - datetime.timedelta(minutes=2)}],
+        )
+
+        result = self.cloudwatch.get_metric_data(
+            [
+                {"id": "requests", "namespace": "TestNamespace", "metric_name": "Requests", "stat": "Sum", "period": 60},
+                {"id": "errors", "namespace": "TestNamespace", "metric_name": "Errors", "stat": "Sum", "period": 60},
+            ],
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(minutes=1),
+        )
+
+        self.assertEqual(len(result["Timestamps"]), 3)
+        self.assertEqual(list(result["Timestamps"]), sorted(result["Timestamps"]))
+        self.assertEqual(list(result["Values"]["requests"]), [1.0, 2.0, 3.0])
+        errors = result["Values"]["errors"]
+        self.assertTrue(math.isnan(errors[0]))
+        self.assertEqual(errors[1], 5.0)
+        self.assertTrue(math.isnan(errors[2]))
+
+    def test_pack_metric_data_queries_keeps_expressions_with_inputs(self):
+        queries = [
+            {"id": f"m{i}", "namespace": "TestNamespace", "metric_name": f"Metric{i}", "stat": "Sum", "period": 60}
+            for i in range(600)
+        ]
+        queries.append({"id": "total", "expression": "m0 + m599"})
+
+        batches = self.cloudwatch._pack_metric_data_queries(queries)
+
+        self.assertEqual(len(batches), 2)
+        self.assertTrue(all(len(batch) <= 500 for batch in batches))
+        for batch in batches:
+            ids = {query["Id"] for query in batch}
+            if "total" in ids:
+                self.assertTrue({"m0", "m599"} <= ids)
+
+    def test_iter_log_events_follows_forward_token(self):
+        self.cloudwatch.logs = mock.Mock()
+        self.cloudwatch.logs.get_log_events.side_effect = [
+            {"events": [{"message": "1"}, {"message": "2"}], "nextForwardToken": "f/1"},
+            {"events": [{"message": "3"}], "nextForwardToken": "f/2"},
+            {"events": [], "nextForwardToken": "f/2"},
+        ]
+        events = self.cloudwatch.get_log_events("TestLogGroup", "TestLogStream")
+        self.assertEqual([event["message"] for event in events], ["1", "2", "3"])
+        self.assertEqual(self.cloudwatch.logs.get_log_events.call_args.kwargs["nextToken"], "f/2")
+
+    @mock_aws
+    def test_iter_filtered_log_events_interleaves_streams(self):
+        self.cloudwatch.logs = boto3.client("logs", region_name="us-east-1")
+        self.cloudwatch.create_log_group("TestLogGroup")
+        now = int(time.time() * 1000) - 60_000
+        for stream, offsets in [("a", [0, 2, 4]), ("b", [1, 3, 5])]:
+            self.cloudwatch.create_log_stream("TestLogGroup", stream)
+            self.cloudwatch.put_log_events(
+                "TestLogGroup", stream,
+                [{"timestamp": now + offset, "message": f"{stream}{offset}"} for offset in offsets],
+            )
+
+        events = list(self.cloudwatch.iter_filtered_log_events("TestLogGroup", log_stream_names=["a", "b"]))
+        self.assertEqual([event["message"] for event in events], ["a0", "b1", "a2", "b3", "a4", "b5"])
+
+    @mock_aws
+    def test_tail_log_stream(self):
+        self.cloudwatch.logs = boto3.client("logs", region_name="us-east-1")
+        self.cloudwatch.create_log_group("TestLogGroup")
+        self.cloudwatch.create_log_stream("TestLogGroup", "TestLogStream")
+        start = int(time.time() * 1000) - 60_000
+        self.cloudwatch.put_log_events(
+            "TestLogGroup", "TestLogStream",
+            [{"timestamp": start + i, "message": f"line {i}"} for i in range(3)],
+        )
+
+        stop = threading.Event()
+        received = []
+        for event in self.cloudwatch.tail("TestLogGroup", "TestLogStream", start_time=start, poll_interval=0.01, stop_event=stop):
+            received.append(event["message"])
+            if len(received) == 3:
+                stop.set()
+        self.assertEqual(received, ["line 0", "line 1", "line 2"])
+
+    @mock_aws
+    def test_tail_log_group_yields_late_events(self):
+        self.cloudwatch.logs = boto3.client("logs", region_name="us-east-1")
+        self.cloudwatch.create_log_group("TestLogGroup")
+        for stream in ["fast", "batched"]:
+            self.cloudwatch.create_log_stream("TestLogGroup", stream)
+        start = int(time.time() * 1000) - 60_000
+        self.cloudwatch.put_log_events("TestLogGroup", "fast", [{"timestamp": start + 5000, "message": "newer"}])
+
+        stop = threading.Event()
+        timer = threading.Timer(0.5, stop.set)
+        received = []
+        for event in self.cloudwatch.tail("TestLogGroup", start_time=start, poll_interval=0.01, max_poll_interval=0.05, stop_event=stop):
+            received.append(event["message"])
+            if len(received) == 1:
+                # Ingested after "newer" was tailed, but with an earlier timestamp.
+                self.cloudwatch.put_log_events("TestLogGroup", "batched", [{"timestamp": start + 1000, "message": "older"}])
+                timer.start()
+        self.assertEqual(received, ["newer", "older"])
+
+    @mock_aws
+    def test_run_insights_query_across_groups_and_slices(self):
+        self.cloudwatch.logs = boto3.client("logs", region_name="us-east-1")
+        now = int(time.time() * 1000) - 60_000
+        for group in ["group-a", "group-b"]:
+            self.cloudwatch.create_log_group(group)
+            self.cloudwatch.create_log_stream(group, "stream")
+            self.cloudwatch.put_log_events(
+                group, "stream",
+                [{"timestamp": now + i, "message": f"{group} ERROR {i}"} for i in range(3)],
+            )
+
+        rows = list(self.cloudwatch.run_insights_query(
+            "fields @timestamp, @message | filter @message like /ERROR/",
+            ["group-a", "group-b"],
+            start_time=now // 1000 - 300,
+            end_time=now // 1000 + 300,
+            slices=3,
+            poll_interval=0.01,
+        ))
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(all("ERROR" in row["@message"] for row in rows))
+
+    def test_run_insights_query_respects_concurrency_limit(self):
+        self.cloudwatch.logs = mock.Mock()
+        started = []
+        running = set()
+        peak = []
+
+        def start_query(**params):
+            query_id = f"q{len(started)}"
+            started.append(query_id)
+            running.add(query_id)
+            peak.append(len(running))
+            return {"queryId": query_id}
+
+        def get_query_results(queryId):
+            running.discard(queryId)
+            return {"status": "Complete", "results": [[{"field": "@ptr", "value": queryId}]]}
+
+        self.cloudwatch.logs.start_query.side_effect = start_query
+        self.cloudwatch.logs.get_query_results.side_effect = get_query_results
+
+        rows = list(self.cloudwatch.run_insights_query(
+            "fields @message", [f"group-{i}" for i in range(120)], 0, 3600, slices=4, max_concurrent=5,
+        ))
+        self.assertEqual(len(started), 12)
+        self.assertEqual(len(rows), 12)
+        self.assertLessEqual(max(peak), 5)
+
+    @mock_aws
+    def test_reconcile_alarms(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+
+        def alarm(name, threshold):
+            return {
+                "alarm_name": name,
+                "metric_name": "CPUUtilization",
+                "namespace": "AWS/EC2",
+                "threshold": threshold,
+                "comparison_operator": "GreaterThanThreshold",
+                "evaluation_periods": 2,
+                "period": 60,
+                "statistic": "Average",
+                "dimensions": [{"Name": "InstanceId", "Value": name}],
+            }
+
+        for name in ["app-unchanged", "app-changed", "app-stale"]:
+            self.cloudwatch.create_alarm(**alarm(name, 50))
+        self.cloudwatch.create_alarm(**alarm("other-team", 50))
+
+        summary = self.cloudwatch.reconcile_alarms(
+            [alarm("app-unchanged", 50), alarm("app-changed", 90), alarm("app-new", 70)],
+            prefix="app-",
+        )
+
+        self.assertEqual(summary["unchanged"], ["app-unchanged"])
+        self.assertEqual(summary["updated"], ["app-changed"])
+        self.assertEqual(summary["created"], ["app-new"])
+        self.assertEqual(summary["deleted"], ["app-stale"])
+        alarms = {alarm["AlarmName"]: alarm for alarm in self.cloudwatch.list_alarms()}
+        self.assertEqual(set(alarms), {"app-unchanged", "app-changed", "app-new", "other-team"})
+        self.assertEqual(alarms["app-changed"]["Threshold"], 90)
+
+        summary = self.cloudwatch.reconcile_alarms(
+            [alarm("app-unchanged", 50), alarm("app-changed", 90), alarm("app-new", 70)],
+            prefix="app-",
+        )
+        self.assertEqual(len(summary["unchanged"]), 3)
+        self.assertEqual(summary["created"] + summary["updated"] + summary["deleted"], [])
+
+        # A description set on the live alarm but no longer requested is removed.
+        described = dict(alarm("described", 50), alarm_description="old")
+        self.cloudwatch.reconcile_alarms([described], prefix="described")
+        summary = self.cloudwatch.reconcile_alarms([alarm("described", 50)], prefix="described")
+        self.assertEqual(summary["updated"], ["described"])
+
+        # Without a prefix, nothing outside the desired set may be deleted.
+        with self.assertRaises(ValueError):
+            self.cloudwatch.reconcile_alarms([alarm("app-new", 70)])
+        summary = self.cloudwatch.reconcile_alarms([alarm("app-new", 70)], delete_stale=False)
+        self.assertEqual(summary["deleted"], [])
+        self.assertIn("other-team", {alarm["AlarmName"] for alarm in self.cloudwatch.list_alarms()})
@@ -0,0 +1,44 @@
+import unittest
+import time
+from aws_wrapper.concurrency import RateLimiter, run_graph
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_sustained_rate(self):
+        limiter = RateLimiter(rate=50, burst=5)
+        self.assertTrue(all(limiter.try_acquire() for _ in range(5)))
+        self.assertFalse(limiter.try_acquire())
+
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+
+class TestRunGraph(unittest.TestCase):
+    def test_dependency_order_and_failure_propagation(self):
+        order = []
+
+        def task(name, fail=False):
+            def run():
+                order.append(name)
+                if fail:
+                    raise RuntimeError(name)
+                return name
+            return run
+
+        outcomes = run_graph(
+            {"a": task("a"), "b": task("b"), "c": task("c", fail=True), "d": task("d"), "e": task("e")},
+            {"b": ["a"], "d": ["b", "c"], "e": ["d"]},
+            max_workers=4,
+        )
+        self.assertLess(order.index("a"), order.index("b"))
+        self.assertEqual(outcomes["b"], {"status": "succeeded", "result": "b"})
+        self.assertEqual(outcomes["c"]["status"], "failed")
+        self.assertEqual(outcomes["d"]["status"], "skipped")
+        self.assertEqual(outcomes["e"]["status"], "skipped")
+        self.assertNotIn("d", order)
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            run_graph({"a": lambda: 1, "b": lambda: 2}, {"a": ["b"], "b": ["a"]})
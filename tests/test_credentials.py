@@ -0,0 +1,107 @@
+import datetime
+import threading
+import time
+import unittest
+from unittest import mock
+
+import boto3
+from moto import mock_aws
+
+from aws_wrapper.credentials import RoleSessionCache
+from aws_wrapper.queue import Queue
+
+ROLE_ARN = "arn:aws:iam::123456789012:role/deployer"
+
+
+class TestRoleSessionCache(unittest.TestCase):
+    def slow_sts(self, lifetime=None):
+        """
+        Wraps a moto STS client so AssumeRole is slow and counted, optionally
+        shortening the credential lifetime.
+        """
+        sts = boto3.client("sts", region_name="us-east-1")
+        real_assume_role = sts.assume_role
+
+        def assume_role(**kwargs):
+            time.sleep(0.05)
+            response = real_assume_role(**kwargs)
+            if lifetime is not None:
+                expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=lifetime)
+                response["Credentials"]["Expiration"] = expiration
+            return response
+
+        sts.assume_role = mock.Mock(side_effect=assume_role)
+        return sts
+
+    @mock_aws
+    def test_concurrent_requests_share_one_assume_role(self):
+        sts = self.slow_sts()
+        cache = RoleSessionCache(sts_client=sts)
+        self.assertIsNone(cache.peek(ROLE_ARN))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_credentials(ROLE_ARN))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sts.assume_role.call_count, 1)
+        self.assertEqual(len({credentials.access_key for credentials in results}), 1)
+        self.assertEqual(results[0].account_id, "123456789012")
+        self.assertEqual(cache.peek(ROLE_ARN), results[0])
+        cache.close()
+
+    @mock_aws
+    def test_keys_include_session_policy(self):
+        sts = self.slow_sts()
+        cache = RoleSessionCache(sts_client=sts)
+        policy = {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}]}
+        cache.get_credentials(ROLE_ARN)
+        cache.get_credentials(ROLE_ARN, session_policy=policy)
+        cache.get_credentials(ROLE_ARN, session_policy=policy)
+        self.assertEqual(sts.assume_role.call_count, 2)
+        self.assertIn("Policy", sts.assume_role.call_args.kwargs)
+        cache.close()
+
+    @mock_aws
+    def test_background_refresh_before_expiry(self):
+        sts = self.slow_sts(lifetime=62)
+        cache = RoleSessionCache(sts_client=sts, duration_seconds=900, refresh_margin=61.7)
+        first = cache.get_credentials(ROLE_ARN)
+
+        deadline = time.time() + 5
+        while cache.stats["background_refreshes"] < 1 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertGreaterEqual(cache.stats["background_refreshes"], 1)
+        self.assertGreaterEqual(sts.assume_role.call_count, 2)
+        self.assertNotEqual(cache.get_credentials(ROLE_ARN).access_key, first.access_key)
+        cache.close()
+
+    @mock_aws
+    def test_invalidate_during_assume_role_is_not_undone(self):
+        sts = self.slow_sts()
+        cache = RoleSessionCache(sts_client=sts)
+        fetch = threading.Thread(target=cache.get_credentials, args=(ROLE_ARN,))
+        fetch.start()
+        time.sleep(0.02)
+        cache.invalidate(ROLE_ARN)
+        fetch.join()
+        self.assertIsNone(cache.peek(ROLE_ARN))
+        cache.close()
+
+    @mock_aws
+    def test_wrappers_share_cached_clients(self):
+        cache = RoleSessionCache(sts_client=self.slow_sts())
+        producer = Queue(role_arn=ROLE_ARN, credential_cache=cache)
+        consumer = Queue(role_arn=ROLE_ARN, credential_cache=cache)
+        self.assertIs(producer.sqs, consumer.sqs)
+
+        queue_url = producer.create_queue("cross-account-queue")
+        producer.send_message(queue_url, "hello")
+        self.assertEqual(consumer.receive_messages(queue_url)[0]["Body"], "hello")
+        self.assertEqual(cache._sts_client.assume_role.call_count, 1)
+        self.assertEqual(cache.invalidate(ROLE_ARN), "Invalidated 1 cached role session(s).")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+from moto import mock_aws
+import boto3
+import json
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.dashboard import Dashboard, body_hash, canonical_json
+
+
+def cpu_dashboard(instance_id):
+    return Dashboard().add_metric_widget(
+        [["AWS/EC2", "CPUUtilization", "InstanceId", instance_id]], title="CPU", region="us-east-1"
+    )
+
+
+class TestDashboardModel(unittest.TestCase):
+    def test_canonical_json_ignores_formatting_and_key_order(self):
+        a = '{"widgets": [{"type": "text", "properties": {"markdown": "hi"}, "x": 0}]}'
+        b = '{ "widgets":[ {"x":0, "properties":{"markdown":"hi"}, "type":"text"} ] }'
+        self.assertEqual(canonical_json(a), canonical_json(b))
+        self.assertEqual(body_hash(a), body_hash(b))
+
+    def test_widgets_flow_across_the_grid(self):
+        dashboard = Dashboard()
+        for i in range(5):
+            dashboard.add_text_widget(f"widget {i}", width=8, height=3)
+        positions = [(widget["x"], widget["y"]) for widget in dashboard.widgets]
+        self.assertEqual(positions, [(0, 0), (8, 0), (16, 0), (0, 3), (8, 3)])
+
+    def test_round_trip(self):
+        dashboard = cpu_dashboard("i-123").add_log_widget("fields @message", ["app-logs"], width=24)
+        restored = Dashboard.from_json(dashboard.to_json())
+        self.assertEqual(restored.to_json(), dashboard.to_json())
+        self.assertIn("SOURCE 'app-logs'", json.loads(dashboard.to_json())["widgets"][1]["properties"]["query"])
+
+
+class TestSyncDashboards(unittest.TestCase):
+    def setUp(self):
+        self.cloudwatch = CloudWatch(region="us-east-1")
+
+    @mock_aws
+    def test_sync_pushes_only_changed_dashboards(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+        self.cloudwatch.create_dashboard("team-same", cpu_dashboard("i-1").to_dict())
+        self.cloudwatch.create_dashboard("team-changed", cpu_dashboard("i-2"))
+        self.cloudwatch.create_dashboard("team-stale", cpu_dashboard("i-3"))
+
+        with mock.patch.object(self.cloudwatch.cloudwatch, "put_dashboard", wraps=self.cloudwatch.cloudwatch.put_dashboard) as put:
+            summary = self.cloudwatch.sync_dashboards(
+                {
+                    "team-same": cpu_dashboard("i-1"),
+                    "team-changed": cpu_dashboard("i-22"),
+                    "team-new": cpu_dashboard("i-4"),
+                },
+                prefix="team-",
+                delete_missing=True,
+            )
+
+        self.assertEqual(summary["unchanged"], ["team-same"])
+        self.assertEqual(summary["updated"], ["team-changed"])
+        self.assertEqual(summary["created"], ["team-new"])
+        self.assertEqual(summary["deleted"], ["team-stale"])
+        self.assertEqual(sorted(call.kwargs["DashboardName"] for call in put.call_args_list), ["team-changed", "team-new"])
+        self.assertEqual(sorted(self.cloudwatch.list_dashboards()), ["team-changed", "team-new", "team-same"])
+
+        with self.assertRaises(ValueError):
+            self.cloudwatch.sync_dashboards({"other-team": cpu_dashboard("i-5")}, prefix="team-")
+        self.assertNotIn("other-team", self.cloudwatch.list_dashboards())
@@ -38,6 +38,25 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(items), 1)
         self.assertEqual(items[0]["name"]["S"], "Alice")
 
+    @mock_aws
+    def test_batch_write_and_get_items(self):
+        table_name = "test-table"
+        self.database.dynamodb = boto3.client("dynamodb", region_name="us-east-1")
+
+        self.database.create_table(
+            table_name,
+            key_schema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            attribute_definitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            provisioned_throughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+        )
+        items = [{"id": {"S": str(i)}, "value": {"N": str(i)}} for i in range(60)]
+        self.assertEqual(self.database.batch_write_items(table_name, items), f"60 items added to table '{table_name}'.")
+        self.assertEqual(len(self.database.scan_table(table_name)), 60)
+
+        keys = [{"id": {"S": str(i)}} for i in range(0, 120, 2)]
+        found = self.database.batch_get_items(table_name, keys)
+        self.assertEqual(sorted(int(item["id"]["S"]) for item in found), list(range(0, 60, 2)))
+
     @mock_aws
     def test_update_and_delete_item(self):
         table_name = "test-table"
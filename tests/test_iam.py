@@ -1,6 +1,7 @@
 import unittest
 from moto import mock_aws
 import boto3
+import json
 from aws_wrapper.iam import IAM
 
 
@@ -144,6 +145,88 @@ class TestIAM(unittest.TestCase):
         response = self.iam.detach_user_policy("test-user", policy_arn)
         self.assertEqual(response, f"Policy '{policy_arn}' detached from user 'test-user'.")
 
+    @mock_aws
+    def test_optimize_policy_before_create(self):
+        self.iam.iam = boto3.client("iam", region_name="us-east-1")
+        policy_document = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {"Sid": "Send", "Effect": "Allow", "Action": "sqs:SendMessage", "Resource": "arn:aws:sqs:us-east-1:123456789012:q"},
+                {"Sid": "Url", "Effect": "Allow", "Action": "sqs:GetQueueUrl", "Resource": "arn:aws:sqs:us-east-1:123456789012:q"},
+            ],
+        }
+
+        optimized, report = self.iam.optimize_policy(policy_document)
+        self.assertEqual(report["statements_after"], 1)
+        self.assertGreater(report["saved_bytes"], 0)
+
+        policy_arn = self.iam.create_policy("optimized-policy", optimized)
+        version = self.iam.iam.get_policy_version(PolicyArn=policy_arn, VersionId="v1")["PolicyVersion"]
+        statement = version["Document"]["Statement"][0]
+        self.assertEqual(statement["Action"], ["sqs:GetQueueUrl", "sqs:SendMessage"])
+
+
+class TestIAMBulkOperations(unittest.TestCase):
+    def setUp(self):
+        self.iam = IAM(region="us-east-1")
+
+    @mock_aws
+    def test_bulk_create_and_delete(self):
+        self.iam.iam = boto3.client("iam", region_name="us-east-1")
+        policy_document = json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [{"Effect": "Allow", "Action": "s3:ListBucket", "Resource": "*"}],
+        })
+        trust_document = json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [{"Effect": "Allow", "Principal": {"Service": "ec2.amazonaws.com"}, "Action": "sts:AssumeRole"}],
+        })
+
+        summary = self.iam.bulk_create(
+            users=["alice", "bob"],
+            groups=["devs"],
+            roles={"app": trust_document},
+            policies={"list-buckets": policy_document},
+            memberships={"devs": ["alice", "bob"]},
+            attachments=[("group", "devs", "list-buckets"), ("role", "app", "list-buckets"), ("user", "alice", "list-buckets")],
+        )
+        self.assertEqual(summary["failed"], {})
+        self.assertEqual(summary["skipped"], [])
+        policy_arn = summary["policy_arns"]["list-buckets"]
+        self.assertEqual(sorted(self.iam.list_iam_users()), ["alice", "bob"])
+
+        self.iam.iam.put_user_policy(UserName="bob", PolicyName="inline", PolicyDocument=policy_document)
+        self.iam.iam.create_access_key(UserName="bob")
+        self.iam.iam.create_policy_version(PolicyArn=policy_arn, PolicyDocument=policy_document, SetAsDefault=True)
+
+        summary = self.iam.bulk_delete(
+            users=["alice", "bob"], groups=["devs"], roles=["app"], policies=[policy_arn], rate_limit=100,
+        )
+        self.assertEqual(summary["failed"], {})
+        self.assertIn("delete-policy-version:" + policy_arn + ":v1", summary["succeeded"])
+        self.assertEqual(self.iam.list_iam_users(), [])
+        self.assertEqual(self.iam.list_groups(), [])
+        self.assertNotIn("app", self.iam.list_roles())
+        self.assertNotIn("list-buckets", self.iam.list_policies(scope="Local"))
+
+    @mock_aws
+    def test_bulk_create_skips_dependents_of_failures(self):
+        self.iam.iam = boto3.client("iam", region_name="us-east-1")
+        self.iam.create_iam_user("alice")
+        summary = self.iam.bulk_create(users=["alice"], groups=["devs"], memberships={"devs": ["alice"]})
+        self.assertIn("create-user:alice", summary["failed"])
+        self.assertEqual(summary["skipped"], ["add-user-to-group:alice:devs"])
+        self.assertEqual(summary["succeeded"], ["create-group:devs"])
+
+    @mock_aws
+    def test_bulk_delete_reports_missing_items(self):
+        self.iam.iam = boto3.client("iam", region_name="us-east-1")
+        self.iam.create_iam_user("alice")
+        summary = self.iam.bulk_delete(users=["alice", "ghost"], roles=["missing-role"], rate_limit=100)
+        self.assertEqual(sorted(summary["failed"]), ["delete-role:missing-role", "delete-user:ghost"])
+        self.assertIn("NoSuchEntity", summary["failed"]["delete-user:ghost"])
+        self.assertEqual(summary["succeeded"], ["delete-user:alice"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest import mock
+from moto import mock_aws
+import boto3
+import json
+import os
+import tempfile
+from botocore.exceptions import ClientError
+from aws_wrapper.iam import IAM
+from aws_wrapper.iam_inventory import IAMInventory, GROUP, POLICY, ROLE, USER
+
+
+S3_READ = json.dumps({
+    "Version": "2012-10-17",
+    "Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}],
+})
+DENY_DELETE = json.dumps({
+    "Version": "2012-10-17",
+    "Statement": [{"Effect": "Deny", "Action": "s3:DeleteObject", "Resource": "*"}],
+})
+TRUST = json.dumps({
+    "Version": "2012-10-17",
+    "Statement": [{"Effect": "Allow", "Principal": {"Service": "ec2.amazonaws.com"}, "Action": "sts:AssumeRole"}],
+})
+
+
+class TestIAMInventory(unittest.TestCase):
+    def setUp(self):
+        self.iam = IAM(region="us-east-1")
+
+    def _create_fixture(self):
+        self.iam.iam = boto3.client("iam", region_name="us-east-1")
+        self.iam.create_iam_user("alice")
+        self.iam.create_group("readers")
+        self.iam.add_user_to_group("alice", "readers")
+        self.iam.create_role("app-role", TRUST)
+        self.policy_arn = self.iam.create_policy("s3-read", S3_READ)
+        self.iam.attach_group_policy("readers", self.policy_arn)
+        self.iam.attach_role_policy("app-role", self.policy_arn)
+        self.iam.iam.put_user_policy(UserName="alice", PolicyName="no-delete", PolicyDocument=DENY_DELETE)
+
+    def _assert_graph(self, inventory):
+        alice = inventory.arn(USER, "alice")
+        readers = inventory.arn(GROUP, "readers")
+        role = inventory.arn(ROLE, "app-role")
+        self.assertEqual(inventory.arn(POLICY, "s3-read"), self.policy_arn)
+        self.assertEqual(inventory.principals_for(self.policy_arn), {readers, role})
+        self.assertEqual(inventory.principals_for(self.policy_arn, expand_groups=True), {readers, role, alice})
+        self.assertEqual(inventory.policies_for(alice), {self.policy_arn})
+        self.assertEqual(inventory.policies_for(alice, include_groups=False), set())
+        effects = sorted(doc["Statement"][0]["Effect"] for doc in inventory.documents_for(alice))
+        self.assertEqual(effects, ["Allow", "Deny"])
+
+    @mock_aws
+    def test_load_inventory_from_authorization_details(self):
+        self._create_fixture()
+        self._assert_graph(self.iam.load_inventory())
+
+    @mock_aws
+    def test_load_inventory_falls_back_to_per_entity_calls(self):
+        self._create_fixture()
+        denied = ClientError({"Error": {"Code": "AccessDenied", "Message": "denied"}}, "GetAccountAuthorizationDetails")
+        get_paginator = self.iam.iam.get_paginator
+
+        def paginator(operation):
+            if operation == "get_account_authorization_details":
+                raise denied
+            return get_paginator(operation)
+
+        with mock.patch.object(self.iam.iam, "get_paginator", side_effect=paginator):
+            inventory = self.iam.load_inventory()
+        self._assert_graph(inventory)
+
+    def test_policy_names_shared_across_paths(self):
+        inventory = IAMInventory()
+        managed = "arn:aws:iam::aws:policy/ReadOnlyAccess"
+        custom = "arn:aws:iam::123456789012:policy/team/ReadOnlyAccess"
+        inventory.add_policy({"Arn": managed, "PolicyName": "ReadOnlyAccess"})
+        inventory.add_policy({"Arn": custom, "PolicyName": "ReadOnlyAccess"})
+        self.assertEqual(set(inventory.entities), {managed, custom})
+        self.assertEqual(inventory.names(POLICY), ["ReadOnlyAccess"])
+        with self.assertRaises(ValueError):
+            inventory.arn(POLICY, "ReadOnlyAccess")
+
+    @mock_aws
+    def test_snapshot_round_trip(self):
+        self._create_fixture()
+        inventory = self.iam.load_inventory()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.json")
+            inventory.save(path)
+            restored = IAMInventory.load(path)
+        self._assert_graph(restored)
+        self.assertEqual(restored.entities, json.loads(json.dumps(inventory.entities, default=str)))
@@ -0,0 +1,94 @@
+import unittest
+from moto import mock_aws
+import boto3
+import json
+from aws_wrapper.iam import IAM
+from aws_wrapper.iam_inventory import USER
+from aws_wrapper.iam_policy import PatternTrie, PolicyEvaluator, ALLOW, EXPLICIT_DENY, IMPLICIT_DENY
+
+
+class TestPatternTrie(unittest.TestCase):
+    def test_wildcards(self):
+        trie = PatternTrie(case_sensitive=False)
+        trie.add("s3:Get*", "get")
+        trie.add("s3:*", "all-s3")
+        trie.add("s3:?etObject", "one-char")
+        trie.add("*", "everything")
+        trie.add("ec2:Describe*Status", "status")
+        self.assertEqual(trie.match("s3:GetObject"), {"get", "all-s3", "one-char", "everything"})
+        self.assertEqual(trie.match("S3:PUTOBJECT"), {"all-s3", "everything"})
+        self.assertEqual(trie.match("ec2:DescribeInstanceStatus"), {"status", "everything"})
+        self.assertEqual(trie.match("ec2:DescribeInstances"), {"everything"})
+
+
+class TestPolicyEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = PolicyEvaluator([
+            {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {"Effect": "Allow", "Action": ["s3:Get*", "s3:List*"], "Resource": "arn:aws:s3:::data/*"},
+                    {"Effect": "Allow", "Action": "s3:PutObject", "Resource": "arn:aws:s3:::data/${aws:username}/*"},
+                    {
+                        "Effect": "Allow",
+                        "Action": "ec2:*",
+                        "Resource": "*",
+                        "Condition": {"IpAddress": {"aws:SourceIp": "10.0.0.0/8"}, "Bool": {"aws:MultiFactorAuthPresent": "true"}},
+                    },
+                ],
+            },
+            json.dumps({
+                "Version": "2012-10-17",
+                "Statement": [
+                    {"Effect": "Deny", "Action": "s3:GetObject", "Resource": "arn:aws:s3:::data/secret/*"},
+                    {"Effect": "Deny", "NotAction": ["s3:*", "ec2:*"], "Resource": "*"},
+                ],
+            }),
+        ])
+
+    def test_allow_and_explicit_deny_precedence(self):
+        self.assertEqual(self.evaluator.evaluate("s3:GetObject", "arn:aws:s3:::data/report.csv"), ALLOW)
+        self.assertEqual(self.evaluator.evaluate("s3:GetObject", "arn:aws:s3:::data/secret/key"), EXPLICIT_DENY)
+        self.assertEqual(self.evaluator.evaluate("s3:DeleteObject", "arn:aws:s3:::data/report.csv"), IMPLICIT_DENY)
+        self.assertEqual(self.evaluator.evaluate("iam:CreateUser", "*"), EXPLICIT_DENY)
+
+    def test_policy_variables(self):
+        context = {"aws:username": "alice"}
+        self.assertTrue(self.evaluator.is_allowed("s3:PutObject", "arn:aws:s3:::data/alice/file", context))
+        self.assertFalse(self.evaluator.is_allowed("s3:PutObject", "arn:aws:s3:::data/bob/file", context))
+
+    def test_conditions(self):
+        good = {"aws:SourceIp": "10.1.2.3", "aws:MultiFactorAuthPresent": "true"}
+        self.assertTrue(self.evaluator.is_allowed("ec2:StartInstances", "*", good))
+        self.assertFalse(self.evaluator.is_allowed("ec2:StartInstances", "*", dict(good, **{"aws:SourceIp": "192.168.0.1"})))
+        self.assertFalse(self.evaluator.is_allowed("ec2:StartInstances", "*", {"aws:SourceIp": "10.1.2.3"}))
+
+    def test_for_any_value_with_negated_operator(self):
+        evaluator = PolicyEvaluator([{"Statement": [{
+            "Effect": "Allow", "Action": "s3:GetObject", "Resource": "*",
+            "Condition": {"ForAnyValue:StringNotEquals": {"aws:TagKeys": ["a"]}},
+        }]}])
+        self.assertTrue(evaluator.is_allowed("s3:GetObject", "*", {"aws:TagKeys": ["a", "b"]}))
+        self.assertFalse(evaluator.is_allowed("s3:GetObject", "*", {"aws:TagKeys": ["a"]}))
+
+    def test_unsupported_condition_operator(self):
+        with self.assertRaises(ValueError):
+            PolicyEvaluator([{"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*", "Condition": {"Magic": {"a": "b"}}}]}])
+
+    @mock_aws
+    def test_evaluate_principal_from_inventory(self):
+        iam = IAM(region="us-east-1")
+        iam.iam = boto3.client("iam", region_name="us-east-1")
+        iam.create_iam_user("alice")
+        iam.create_group("readers")
+        iam.add_user_to_group("alice", "readers")
+        policy_arn = iam.create_policy("s3-read", json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}],
+        }))
+        iam.attach_group_policy("readers", policy_arn)
+
+        inventory = iam.load_inventory(include_aws_managed=False)
+        evaluator = PolicyEvaluator.for_principal(inventory, inventory.arn(USER, "alice"))
+        self.assertTrue(evaluator.is_allowed("s3:GetObject", "arn:aws:s3:::bucket/key"))
+        self.assertFalse(evaluator.is_allowed("s3:PutObject", "arn:aws:s3:::bucket/key"))
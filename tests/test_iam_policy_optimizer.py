@@ -0,0 +1,78 @@
+import json
+import unittest
+
+from aws_wrapper.iam_policy import PolicyEvaluator
+from aws_wrapper.iam_policy_optimizer import collapse_actions, load_action_catalog, optimize_policy_document
+
+CATALOG = {"sqs": ["GetQueueAttributes", "GetQueueUrl", "ListQueues", "ListQueueTags", "SendMessage"]}
+
+
+class TestCollapseActions(unittest.TestCase):
+    def test_collapses_only_fully_covered_prefixes(self):
+        actions = collapse_actions(["sqs:GetQueueUrl", "sqs:getqueueattributes", "sqs:ListQueues"], CATALOG)
+        self.assertEqual(actions, ["sqs:Get*", "sqs:ListQueues"])
+
+    def test_whole_service_and_unknown_actions(self):
+        actions = collapse_actions([f"sqs:{name}" for name in CATALOG["sqs"]] + ["s3:GetObject", "sqs:NewAction"], CATALOG)
+        self.assertEqual(actions, ["s3:GetObject", "sqs:*", "sqs:NewAction"])
+
+    def test_bundled_catalog(self):
+        catalog = load_action_catalog()
+        self.assertIn("SendMessage", catalog["sqs"])
+        self.assertEqual(collapse_actions(["dynamodb:BatchGetItem", "dynamodb:BatchWriteItem"]), ["dynamodb:Batch*"])
+
+
+class TestOptimizePolicyDocument(unittest.TestCase):
+    def setUp(self):
+        self.queue = "arn:aws:sqs:us-east-1:123456789012:orders"
+        self.document = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {"Sid": "Read", "Effect": "Allow", "Action": ["sqs:GetQueueUrl", "sqs:GetQueueAttributes"], "Resource": self.queue},
+                {"Sid": "Write", "Effect": "Allow", "Action": ["sqs:SendMessage", "sqs:GetQueueUrl"], "Resource": self.queue},
+                {"Effect": "Allow", "Action": "s3:GetObject", "Resource": ["arn:aws:s3:::logs/*", "arn:aws:s3:::logs/app.log"]},
+                {"Effect": "Allow", "Action": "s3:GetObject", "Resource": "arn:aws:s3:::audit/*"},
+                {"Effect": "Deny", "Action": "s3:GetObject", "Resource": "arn:aws:s3:::audit/secret",
+                 "Condition": {"Bool": {"aws:SecureTransport": "false"}}},
+            ],
+        }
+
+    def test_merges_and_minifies(self):
+        optimized_json, report = optimize_policy_document(json.dumps(self.document, indent=4), catalog=CATALOG)
+        optimized = json.loads(optimized_json)
+        self.assertNotIn(" ", optimized_json)
+        self.assertEqual(report["statements_before"], 5)
+        self.assertEqual(report["statements_after"], 3)
+        self.assertEqual(optimized["Statement"][0]["Action"], ["sqs:Get*", "sqs:SendMessage"])
+        self.assertEqual(optimized["Statement"][1]["Resource"], ["arn:aws:s3:::logs/*", "arn:aws:s3:::audit/*"])
+        self.assertEqual(report["saved_bytes"], report["original_bytes"] - report["optimized_bytes"])
+        self.assertGreater(report["saved_bytes"], 0)
+        self.assertTrue(report["fits"])
+
+    def test_does_not_change_decisions(self):
+        optimized_json, _ = optimize_policy_document(self.document, catalog=CATALOG)
+        before, after = PolicyEvaluator([self.document]), PolicyEvaluator([optimized_json])
+        requests = [
+            ("sqs:GetQueueAttributes", self.queue, {}),
+            ("sqs:ListQueues", self.queue, {}),
+            ("sqs:SendMessage", "arn:aws:sqs:us-east-1:123456789012:other", {}),
+            ("s3:GetObject", "arn:aws:s3:::logs/app.log", {}),
+            ("s3:GetObject", "arn:aws:s3:::audit/secret", {"aws:SecureTransport": "false"}),
+            ("s3:GetObject", "arn:aws:s3:::audit/secret", {"aws:SecureTransport": "true"}),
+            ("s3:PutObject", "arn:aws:s3:::logs/app.log", {}),
+        ]
+        for action, resource, context in requests:
+            self.assertEqual(before.evaluate(action, resource, context), after.evaluate(action, resource, context))
+
+    def test_does_not_cross_merge_actions_and_resources(self):
+        document = {"Statement": [
+            {"Effect": "Allow", "Action": "sqs:SendMessage", "Resource": "arn:a"},
+            {"Effect": "Allow", "Action": "sqs:ListQueues", "Resource": "arn:b"},
+        ]}
+        optimized_json, report = optimize_policy_document(document, catalog=CATALOG)
+        self.assertEqual(report["statements_after"], 2)
+        self.assertFalse(PolicyEvaluator([optimized_json]).is_allowed("sqs:SendMessage", "arn:b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
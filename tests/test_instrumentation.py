@@ -0,0 +1,138 @@
+import timeit
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from aws_wrapper import instrumentation
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.database import Database
+from aws_wrapper.instrumentation import (
+    CloudWatchExporter,
+    InMemoryExporter,
+    Instrumentation,
+    LatencyHistogram,
+    PrometheusExporter,
+    instrumented,
+)
+from aws_wrapper.retry import RetryController
+from aws_wrapper.storage import Storage
+from tests.test_retry import FailingResponses, create_table
+
+
+@instrumented
+class Echo:
+    def call(self, value):
+        return value
+
+
+class RawEcho:
+    def call(self, value):
+        return value
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_precision(self):
+        histogram = LatencyHistogram()
+        for micros in range(1, 100_001):
+            histogram.record(micros / 1_000_000)
+        for fraction in (0.5, 0.9, 0.99):
+            self.assertAlmostEqual(histogram.percentile(fraction), fraction * 0.1, delta=fraction * 0.1 * 0.02)
+        self.assertEqual(histogram.percentile(1.0), 0.1)
+        self.assertEqual(histogram.count, 100_000)
+        self.assertLess(len(histogram.counts), 1000)
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.metrics = instrumentation.enable(Instrumentation())
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    @mock_aws
+    def test_wrapper_calls_are_recorded(self):
+        storage = Storage()
+        storage.create_bucket("metrics-bucket")
+        for i in range(3):
+            storage.upload_file("metrics-bucket", f"key-{i}", b"x" * 1000)
+        storage.list_objects("metrics-bucket")
+        with self.assertRaises(ClientError):
+            storage.upload_file("missing-bucket", "key", b"x")
+
+        snapshot = self.metrics.snapshot()
+        uploads = snapshot["Storage.upload_file"]
+        self.assertEqual(uploads["calls"], 4)
+        self.assertEqual(uploads["requests"], 4)
+        self.assertEqual(uploads["errors"], {"NoSuchBucket": 1})
+        self.assertGreaterEqual(uploads["bytes_out"], 3000)
+        self.assertGreater(snapshot["Storage.list_objects"]["bytes_in"], 0)
+        latency = uploads["latency"]
+        self.assertLessEqual(latency["min"], latency["p50"])
+        self.assertLessEqual(latency["p50"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+
+    @mock_aws
+    def test_retries_are_counted(self):
+        database = Database(retry_controller=RetryController(base_delay=0.001, max_delay=0.01, min_rate=50))
+        create_table(database)
+        FailingResponses(database.dynamodb, times=2)
+        database.put_item("Items", {"id": {"S": "1"}})
+        self.assertEqual(self.metrics.snapshot()["Database.put_item"]["retries"], 2)
+
+    @mock_aws
+    def test_lazy_methods_are_recorded_once_consumed(self):
+        cloudwatch = CloudWatch()
+        for i in range(3):
+            cloudwatch.create_log_group(f"group-{i}")
+        groups = cloudwatch.iter_log_groups()
+        self.assertNotIn("CloudWatch.iter_log_groups", self.metrics.snapshot())
+        self.assertEqual(len(list(groups)), 3)
+        self.assertEqual(self.metrics.snapshot()["CloudWatch.iter_log_groups"]["calls"], 1)
+
+    @mock_aws
+    def test_exporters(self):
+        cloudwatch = CloudWatch()
+        memory, prometheus = InMemoryExporter(), PrometheusExporter()
+        publisher = CloudWatchExporter(cloudwatch, namespace="Wrapper", batch_size=2)
+        self.metrics.exporters = [memory, prometheus, publisher]
+        for i in range(5):
+            cloudwatch.create_log_group(f"group-{i}")
+
+        results = self.metrics.export()
+        self.assertEqual(memory.latest["CloudWatch.create_log_group"]["calls"], 5)
+        self.assertIn('aws_wrapper_calls_total{operation="CloudWatch.create_log_group"} 5', prometheus.text)
+        self.assertIn('aws_wrapper_latency_seconds_count{operation="CloudWatch.create_log_group"} 5', prometheus.text)
+        self.assertIn("in 2 request(s)", results[2])
+        metric_names = {metric["MetricName"] for metric in cloudwatch.cloudwatch.list_metrics(Namespace="Wrapper")["Metrics"]}
+        self.assertTrue({"Calls", "Latency", "BytesOut"} <= metric_names)
+
+        # Only what was recorded since the last export is published.
+        self.assertIn("Published 0 metric data item(s)", publisher.export(self.metrics))
+
+        # After a reset the new totals are published as they are, not as negative deltas.
+        self.metrics.reset()
+        cloudwatch.create_log_group("group-after-reset")
+        with mock.patch.object(cloudwatch.cloudwatch, "put_metric_data") as put_metric_data:
+            publisher.export(self.metrics)
+        data = [item for call in put_metric_data.call_args_list for item in call.kwargs["MetricData"]]
+        calls = [item for item in data if item["MetricName"] == "Calls"]
+        self.assertEqual([item["Value"] for item in calls], [1])
+        self.assertTrue(all(item.get("Value", 0) >= 0 for item in data))
+
+    def test_overhead_when_disabled(self):
+        instrumentation.disable()
+        echo, raw = Echo(), RawEcho()
+        calls = 200_000
+        wrapped = min(timeit.repeat(lambda: echo.call(1), number=calls, repeat=5))
+        plain = min(timeit.repeat(lambda: raw.call(1), number=calls, repeat=5))
+        # A ratio rather than a wall-clock bound, with room for noisy machines; the
+        # absolute per-call cost is tracked by the benchmarks' "instrumentation" group.
+        self.assertLess(wrapped / plain, 10)
+        self.assertEqual(self.metrics.snapshot(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+from moto import mock_aws
+import boto3
+from botocore.exceptions import EndpointConnectionError
+import threading
+import time
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.log_shipper import (
+    LogShipper,
+    MAX_BATCH_BYTES,
+    MAX_BATCH_EVENTS,
+    MAX_BATCH_SPAN_MS,
+    MAX_EVENT_BYTES,
+    split_log_batches,
+)
+
+
+class TestSplitLogBatches(unittest.TestCase):
+    def test_batches_are_sorted_and_capped_by_count(self):
+        events = [{"timestamp": 1000 + (i * 7919) % 20001, "message": "x"} for i in range(20001)]
+        batches = split_log_batches(events)
+        self.assertEqual([len(batch) for batch in batches], [MAX_BATCH_EVENTS, MAX_BATCH_EVENTS, 1])
+        flattened = [event["timestamp"] for batch in batches for event in batch]
+        self.assertEqual(flattened, sorted(flattened))
+
+    def test_batches_are_capped_by_size_and_span(self):
+        big = "a" * 200_000
+        batches = split_log_batches([{"timestamp": i, "message": big} for i in range(10)])
+        self.assertTrue(all(sum(len(e["message"]) + 26 for e in batch) <= MAX_BATCH_BYTES for batch in batches))
+        self.assertEqual(sum(len(batch) for batch in batches), 10)
+
+        batches = split_log_batches([
+            {"timestamp": 0, "message": "first"},
+            {"timestamp": MAX_BATCH_SPAN_MS + 1, "message": "next day"},
+        ])
+        self.assertEqual(len(batches), 2)
+
+    def test_oversized_message_is_truncated(self):
+        batches = split_log_batches([{"timestamp": 0, "message": "é" * MAX_EVENT_BYTES}])
+        self.assertLessEqual(len(batches[0][0]["message"].encode("utf-8")), MAX_EVENT_BYTES)
+
+
+class TestLogShipper(unittest.TestCase):
+    def setUp(self):
+        self.cloudwatch = CloudWatch(region="us-east-1")
+
+    @mock_aws
+    def test_ship_from_many_threads(self):
+        self.cloudwatch.logs = boto3.client("logs", region_name="us-east-1")
+        self.cloudwatch.create_log_group("TestLogGroup")
+        self.cloudwatch.create_log_stream("TestLogGroup", "stream-a")
+
+        now = int(time.time() * 1000) - 60_000
+        with LogShipper(self.cloudwatch, flush_interval=0.05) as shipper:
+            def produce(stream, offset):
+                for i in range(50):
+                    shipper.ship("TestLogGroup", stream, f"{stream} {i}", timestamp=now + offset + i)
+
+            threads = [
+                threading.Thread(target=produce, args=("stream-a", 0)),
+                threading.Thread(target=produce, args=("stream-b", 0)),
+                threading.Thread(target=produce, args=("stream-a", 100)),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertTrue(shipper.flush(timeout=10))
+            self.assertEqual(shipper.stats["events_sent"], 150)
+
+        events_a = self.cloudwatch.logs.get_log_events(
+            logGroupName="TestLogGroup", logStreamName="stream-a", startFromHead=True
+        )["events"]
+        self.assertEqual(len(events_a), 100)
+        events_b = self.cloudwatch.logs.get_log_events(
+            logGroupName="TestLogGroup", logStreamName="stream-b", startFromHead=True
+        )["events"]
+        self.assertEqual(len(events_b), 50)
+
+    @mock_aws
+    def test_failed_batches_are_counted(self):
+        self.cloudwatch.logs = boto3.client("logs", region_name="us-east-1")
+        self.cloudwatch.create_log_group("TestLogGroup")
+        now = int(time.time() * 1000) - 60_000
+
+        # With one attempt, creating the missing stream uses it up.
+        with LogShipper(self.cloudwatch, flush_interval=0.05, max_retries=1) as shipper:
+            shipper.ship("TestLogGroup", "new-stream", "lost", timestamp=now)
+            self.assertTrue(shipper.flush(timeout=10))
+            self.assertEqual(shipper.stats["events_failed"], 1)
+
+        # Errors other than ClientError fail the batch instead of killing the worker.
+        self.cloudwatch.logs.put_log_events = mock.Mock(side_effect=EndpointConnectionError(endpoint_url="https://logs"))
+        with LogShipper(self.cloudwatch, flush_interval=0.05) as shipper:
+            shipper.ship("TestLogGroup", "new-stream", "unreachable", timestamp=now)
+            self.assertTrue(shipper.flush(timeout=10))
+            self.assertEqual((shipper.stats["events_sent"], shipper.stats["events_failed"]), (0, 1))
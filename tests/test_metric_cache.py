@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+from moto import mock_aws
+import boto3
+import datetime
+import os
+import tempfile
+from array import array
+from aws_wrapper.cloudwatch import CloudWatch
+from aws_wrapper.metric_cache import MetricCache
+
+
+class TestMetricCache(unittest.TestCase):
+    def setUp(self):
+        self.cloudwatch = CloudWatch(region="us-east-1")
+        self.cache = MetricCache(self.cloudwatch, mutable_window=600)
+        self.now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+
+    def _put_points(self, minutes_ago_values):
+        for minutes_ago, value in minutes_ago_values:
+            self.cloudwatch.cloudwatch.put_metric_data(
+                Namespace="TestNamespace",
+                MetricData=[{
+                    "MetricName": "Latency",
+                    "Value": value,
+                    "Timestamp": self.now - datetime.timedelta(minutes=minutes_ago),
+                }],
+            )
+
+    @mock_aws
+    def test_repeated_range_is_served_from_cache(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+        self._put_points([(60, 1.0), (50, 2.0), (40, 3.0)])
+        start = self.now - datetime.timedelta(minutes=90)
+        end = self.now - datetime.timedelta(minutes=30)
+
+        with mock.patch.object(self.cloudwatch, "get_metric_statistics", wraps=self.cloudwatch.get_metric_statistics) as fetch:
+            timestamps, values = self.cache.get_metric_statistics("TestNamespace", "Latency", start, end, 60, "Average")
+            self.assertEqual(list(values), [1.0, 2.0, 3.0])
+            self.assertEqual(list(timestamps), sorted(timestamps))
+            calls = fetch.call_count
+
+            timestamps, values = self.cache.get_metric_statistics("TestNamespace", "Latency", start, end, 60, "Average")
+            self.assertEqual(list(values), [1.0, 2.0, 3.0])
+            self.assertEqual(fetch.call_count, calls)
+
+    @mock_aws
+    def test_only_missing_and_mutable_ranges_are_fetched(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+        self._put_points([(60, 1.0), (20, 2.0), (2, 3.0)])
+        self.cache.get_metric_statistics(
+            "TestNamespace", "Latency",
+            self.now - datetime.timedelta(minutes=90), self.now - datetime.timedelta(minutes=30),
+            60, "Average",
+        )
+
+        with mock.patch.object(self.cloudwatch, "get_metric_statistics", wraps=self.cloudwatch.get_metric_statistics) as fetch:
+            timestamps, values = self.cache.get_metric_statistics(
+                "TestNamespace", "Latency",
+                self.now - datetime.timedelta(minutes=90), self.now + datetime.timedelta(minutes=1),
+                60, "Average",
+            )
+        self.assertEqual(list(values), [1.0, 2.0, 3.0])
+        fetched_starts = [call.args[2] for call in fetch.call_args_list]
+        self.assertTrue(all(ts >= self.now - datetime.timedelta(minutes=30) for ts in fetched_starts))
+
+    @mock_aws
+    def test_save_and_load(self):
+        self.cloudwatch.cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+        self._put_points([(60, 1.0), (50, 2.0)])
+        start = self.now - datetime.timedelta(minutes=90)
+        end = self.now - datetime.timedelta(minutes=30)
+        self.cache.get_metric_statistics("TestNamespace", "Latency", start, end, 60, "Average")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.json")
+            self.cache.save(path)
+            restored = MetricCache(self.cloudwatch, mutable_window=600, path=path)
+
+        with mock.patch.object(self.cloudwatch, "get_metric_statistics") as fetch:
+            timestamps, values = restored.get_metric_statistics("TestNamespace", "Latency", start, end, 60, "Average")
+        fetch.assert_not_called()
+        self.assertEqual(list(values), [1.0, 2.0])
+
+    def test_least_recently_used_series_are_evicted(self):
+        cache = MetricCache(self.cloudwatch, max_points=3)
+        key_a = cache._key("TestNamespace", "A", None, "Sum", 60)
+        key_b = cache._key("TestNamespace", "B", None, "Sum", 60)
+        with mock.patch.object(cache, "_fetch", side_effect=[
+            (array("d", [0, 60]), array("d", [1, 2])),
+            (array("d", [0, 60]), array("d", [3, 4])),
+        ]):
+            cache.get_metric_statistics("TestNamespace", "A", 0, 120, 60, "Sum")
+            cache.get_metric_statistics("TestNamespace", "B", 0, 120, 60, "Sum")
+        self.assertNotIn(key_a, cache._series)
+        self.assertIn(key_b, cache._series)
+
+    def test_budget_does_not_truncate_results(self):
+        cache = MetricCache(self.cloudwatch, max_points=2)
+        key = cache._key("TestNamespace", "A", None, "Sum", 60)
+        with mock.patch.object(cache, "_fetch", return_value=(array("d", [0, 60, 120, 180]), array("d", [1, 2, 3, 4]))):
+            timestamps, values = cache.get_metric_statistics("TestNamespace", "A", 0, 240, 60, "Sum")
+        self.assertEqual(list(timestamps), [0, 60, 120, 180])
+        self.assertEqual(list(values), [1, 2, 3, 4])
+        self.assertLessEqual(cache._points, 2)
+
+        # The trimmed part is fetched again; the rest still comes from the cache.
+        with mock.patch.object(cache, "_fetch", return_value=(array("d", [0, 60]), array("d", [1, 2]))) as fetch:
+            timestamps, values = cache.get_metric_statistics("TestNamespace", "A", 0, 240, 60, "Sum")
+        fetch.assert_called_once_with(key, 0, 120)
+        self.assertEqual(list(values), [1, 2, 3, 4])
+
+    def test_save_without_path(self):
+        with self.assertRaises(ValueError):
+            self.cache.save()
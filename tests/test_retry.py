@@ -0,0 +1,137 @@
+import json
+import random
+import unittest
+
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from aws_wrapper.database import Database
+from aws_wrapper.retry import AdaptiveRateLimiter, RetryBudget, RetryController
+
+
+class FailingResponses:
+    """
+    Answers the first ``times`` PutItem attempts with an error instead of sending them.
+    """
+
+    def __init__(self, client, times, code="ProvisionedThroughputExceededException", status=400):
+        self.times = times
+        self.code = code
+        self.status = status
+        self.attempts = 0
+        client.meta.events.register("before-send.dynamodb.PutItem", self)
+
+    def __call__(self, request, **kwargs):
+        self.attempts += 1
+        if self.attempts > self.times:
+            return None
+        body = json.dumps({"__type": self.code, "message": "Rate exceeded"}).encode()
+        return AWSResponse(request.url, self.status, {}, _Raw(body))
+
+
+class _Raw:
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def create_table(database):
+    database.create_table(
+        "Items",
+        key_schema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        attribute_definitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        provisioned_throughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+    )
+
+
+class TestRetryController(unittest.TestCase):
+    def setUp(self):
+        self.controller = RetryController(max_attempts=4, base_delay=0.001, max_delay=0.01, min_rate=50)
+
+    @mock_aws
+    def test_throttled_calls_are_retried(self):
+        database = Database(retry_controller=self.controller)
+        create_table(database)
+        failures = FailingResponses(database.dynamodb, times=3)
+
+        self.assertEqual(database.put_item("Items", {"id": {"S": "1"}}), "Item added to table 'Items'.")
+        self.assertEqual(failures.attempts, 4)
+        snapshot = self.controller.snapshot()
+        self.assertEqual((snapshot["retries"], snapshot["throttles"]), (3, 3))
+        # Only the throttled operation is rate-limited.
+        self.assertEqual(list(snapshot["rates"]), ["dynamodb.PutItem"])
+        self.assertEqual(len(database.scan_table("Items")), 1)
+
+    @mock_aws
+    def test_gives_up_after_max_attempts(self):
+        database = Database(retry_controller=self.controller)
+        create_table(database)
+        failures = FailingResponses(database.dynamodb, times=10, code="InternalServerError", status=500)
+
+        with self.assertRaises(ClientError):
+            database.put_item("Items", {"id": {"S": "1"}})
+        self.assertEqual(failures.attempts, 4)
+        self.assertEqual(self.controller.stats["gave_up"], 1)
+        self.assertEqual(self.controller.stats["throttles"], 0)
+
+    @mock_aws
+    def test_other_errors_are_not_retried(self):
+        database = Database(retry_controller=self.controller)
+        create_table(database)
+        failures = FailingResponses(database.dynamodb, times=1, code="ValidationException")
+
+        with self.assertRaises(ClientError):
+            database.put_item("Items", {"id": {"S": "1"}})
+        self.assertEqual(failures.attempts, 1)
+        self.assertEqual(self.controller.stats["retries"], 0)
+
+    @mock_aws
+    def test_retry_budget_caps_retries(self):
+        controller = RetryController(max_attempts=10, base_delay=0.001, max_delay=0.01, min_rate=50,
+                                     budget=RetryBudget(capacity=2, min_per_second=0))
+        database = Database(retry_controller=controller)
+        create_table(database)
+        failures = FailingResponses(database.dynamodb, times=10)
+
+        with self.assertRaises(ClientError):
+            database.put_item("Items", {"id": {"S": "1"}})
+        self.assertEqual(failures.attempts, 3)
+        self.assertEqual(controller.stats["budget_exhausted"], 1)
+
+    def test_backoff_uses_decorrelated_jitter(self):
+        random.seed(7)
+        controller = RetryController(base_delay=0.1, max_delay=2.0)
+        delay = None
+        for _ in range(50):
+            previous = delay or 0.1
+            delay = controller.backoff(delay)
+            self.assertGreaterEqual(delay, 0.1)
+            self.assertLessEqual(delay, min(2.0, previous * 3))
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    def test_aimd(self):
+        limiter = AdaptiveRateLimiter(min_rate=1.0, max_rate=100.0)
+        for _ in range(20):
+            self.assertEqual(limiter.acquire(), 0.0)
+        self.assertFalse(limiter.enabled)
+
+        # Multiplicative decrease from the rate actually being sent...
+        limiter.on_throttle()
+        self.assertTrue(limiter.enabled)
+        self.assertAlmostEqual(limiter.rate, 14.0)
+        # ...additive increase on success...
+        for _ in range(14):
+            limiter.on_success()
+        self.assertAlmostEqual(limiter.rate, 15.0, delta=0.05)
+        # ...and never below the floor.
+        for _ in range(20):
+            limiter.on_throttle()
+        self.assertEqual(limiter.rate, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import datetime
+import json
+import unittest
+from types import SimpleNamespace
+
+import boto3
+from moto import mock_aws
+
+from aws_wrapper.cloudformation import CloudFormation
+from aws_wrapper.stack_events import StackEventTailer
+
+ROOT_ID = "arn:aws:cloudformation:us-east-1:123456789012:stack/root/1"
+CHILD_ID = "arn:aws:cloudformation:us-east-1:123456789012:stack/root-Child/2"
+START = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_event(number, stack_id, logical_id, status, resource_type="AWS::SQS::Queue", physical_id=None, reason=None):
+    return {
+        "EventId": f"{stack_id}-{number}",
+        "StackId": stack_id,
+        "StackName": stack_id.split("/")[1],
+        "LogicalResourceId": logical_id,
+        "PhysicalResourceId": physical_id or f"{logical_id}-physical",
+        "ResourceType": resource_type,
+        "ResourceStatus": status,
+        "ResourceStatusReason": reason,
+        "Timestamp": START + datetime.timedelta(seconds=number),
+    }
+
+
+class FakeEventsClient:
+    """
+    Serves appended events newest-first in pages, like describe_stack_events.
+    """
+
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.events = {}
+        self.calls = 0
+        self.calls_by_stack = {}
+
+    def add(self, event):
+        self.events.setdefault(event["StackId"], []).append(event)
+
+    def describe_stack_events(self, StackName, NextToken=None):
+        self.calls += 1
+        self.calls_by_stack[StackName] = self.calls_by_stack.get(StackName, 0) + 1
+        events = self.events[StackName][::-1]
+        start = int(NextToken or 0)
+        response = {"StackEvents": events[start:start + self.page_size]}
+        if start + self.page_size < len(events):
+            response["NextToken"] = str(start + self.page_size)
+        return response
+
+
+class TestStackEventTailer(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeEventsClient()
+        self.wrapper = SimpleNamespace(cloudformation=self.client)
+
+    def test_history_and_incremental_polls(self):
+        self.client.add(make_event(1, ROOT_ID, "root", "CREATE_IN_PROGRESS", "AWS::CloudFormation::Stack", ROOT_ID, "User Initiated"))
+        for number in range(2, 12):
+            self.client.add(make_event(number, ROOT_ID, f"Queue{number}", "CREATE_COMPLETE"))
+        tailer = StackEventTailer(self.wrapper, ROOT_ID)
+
+        events = tailer.poll()
+        self.assertEqual([event["EventId"] for event in events], [f"{ROOT_ID}-{n}" for n in range(1, 12)])
+        self.assertEqual(tailer.stats["pages"], 6)
+        self.assertFalse(tailer.complete)
+
+        self.assertEqual(tailer.poll(), [])
+        self.client.add(make_event(12, ROOT_ID, "root", "CREATE_COMPLETE", "AWS::CloudFormation::Stack", ROOT_ID))
+        pages = tailer.stats["pages"]
+        self.assertEqual([event["EventId"] for event in tailer.poll()], [f"{ROOT_ID}-12"])
+        self.assertEqual(tailer.stats["pages"] - pages, 1)
+        self.assertTrue(tailer.complete)
+
+    def test_starts_from_latest_operation(self):
+        self.client.add(make_event(1, ROOT_ID, "root", "CREATE_IN_PROGRESS", "AWS::CloudFormation::Stack", ROOT_ID, "User Initiated"))
+        self.client.add(make_event(2, ROOT_ID, "root", "CREATE_COMPLETE", "AWS::CloudFormation::Stack", ROOT_ID))
+        self.client.add(make_event(3, ROOT_ID, "root", "UPDATE_IN_PROGRESS", "AWS::CloudFormation::Stack", ROOT_ID, "User Initiated"))
+        self.client.add(make_event(4, ROOT_ID, "Queue", "UPDATE_COMPLETE"))
+
+        events = StackEventTailer(self.wrapper, ROOT_ID).poll()
+        self.assertEqual([event["ResourceStatus"] for event in events], ["UPDATE_IN_PROGRESS", "UPDATE_COMPLETE"])
+        self.assertEqual(len(StackEventTailer(self.wrapper, ROOT_ID, from_operation=False).poll()), 4)
+
+    def test_follows_nested_stacks(self):
+        self.client.add(make_event(1, ROOT_ID, "root", "CREATE_IN_PROGRESS", "AWS::CloudFormation::Stack", ROOT_ID, "User Initiated"))
+        self.client.add(make_event(2, ROOT_ID, "Child", "CREATE_IN_PROGRESS", "AWS::CloudFormation::Stack", CHILD_ID))
+        self.client.add(make_event(3, CHILD_ID, "ChildQueue", "CREATE_COMPLETE"))
+        tailer = StackEventTailer(self.wrapper, ROOT_ID, follow_nested=True)
+
+        first = tailer.poll()
+        self.assertEqual([event["EventId"] for event in first], [f"{ROOT_ID}-1", f"{ROOT_ID}-2", f"{CHILD_ID}-3"])
+
+        self.client.add(make_event(4, CHILD_ID, "ChildTopic", "CREATE_COMPLETE"))
+        self.client.add(make_event(5, CHILD_ID, "root-Child", "CREATE_COMPLETE", "AWS::CloudFormation::Stack", CHILD_ID))
+        self.client.add(make_event(6, ROOT_ID, "Child", "CREATE_COMPLETE", "AWS::CloudFormation::Stack", CHILD_ID))
+        self.assertEqual([event["EventId"] for event in tailer.poll()], [f"{CHILD_ID}-4", f"{CHILD_ID}-5", f"{ROOT_ID}-6"])
+
+        # The finished nested stack is no longer polled...
+        child_calls = self.client.calls_by_stack[CHILD_ID]
+        self.assertEqual(tailer.poll(), [])
+        self.assertEqual(self.client.calls_by_stack[CHILD_ID], child_calls)
+
+        # ...until the parent starts another operation on it.
+        self.client.add(make_event(7, ROOT_ID, "Child", "UPDATE_IN_PROGRESS", "AWS::CloudFormation::Stack", CHILD_ID))
+        self.client.add(make_event(8, CHILD_ID, "ChildQueue", "UPDATE_COMPLETE"))
+        self.assertEqual([event["EventId"] for event in tailer.poll()], [f"{ROOT_ID}-7", f"{CHILD_ID}-8"])
+
+
+class TestCloudFormationStackEvents(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+
+    @mock_aws
+    def test_tail_stack_events_until_complete(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        template = json.dumps({"Resources": {"Queue": {"Type": "AWS::SQS::Queue"}}})
+        self.cloudformation.create_stack("app", template)
+
+        events = list(self.cloudformation.tail_stack_events("app", poll_interval=0.01))
+        self.assertEqual([event["ResourceStatus"] for event in events], ["CREATE_IN_PROGRESS", "CREATE_COMPLETE"])
+        self.assertEqual(len(self.cloudformation.describe_stack_events("app")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
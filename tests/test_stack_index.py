@@ -0,0 +1,122 @@
+import json
+import unittest
+from unittest import mock
+from types import SimpleNamespace
+
+import boto3
+from moto import mock_aws
+
+from aws_wrapper.cloudformation import CloudFormation
+from aws_wrapper.stack_index import StackResourceIndex
+
+
+def queue_template(*names):
+    return json.dumps({"Resources": {name: {"Type": "AWS::SQS::Queue"} for name in names}})
+
+
+class FakeDriftClient:
+    """
+    Answers drift detection calls; "app" has drifted and its drifts come in pages of one,
+    and polling "flaky" fails.
+    """
+
+    def __init__(self):
+        self.status_polls = 0
+
+    def can_paginate(self, operation):
+        return False
+
+    def detect_stack_drift(self, StackName):
+        if StackName == "broken":
+            raise ValueError("Stack broken does not exist")
+        return {"StackDriftDetectionId": f"detection-{StackName}"}
+
+    def describe_stack_drift_detection_status(self, StackDriftDetectionId):
+        if StackDriftDetectionId == "detection-flaky":
+            raise ConnectionError("Connection reset")
+        self.status_polls += 1
+        if self.status_polls <= 2:
+            return {"DetectionStatus": "DETECTION_IN_PROGRESS"}
+        drifted = StackDriftDetectionId == "detection-app"
+        return {"DetectionStatus": "DETECTION_COMPLETE", "StackDriftStatus": "DRIFTED" if drifted else "IN_SYNC"}
+
+    def describe_stack_resource_drifts(self, StackName, StackResourceDriftStatusFilters, NextToken=None):
+        drifts = [
+            {"LogicalResourceId": "Queue", "StackResourceDriftStatus": "MODIFIED"},
+            {"LogicalResourceId": "Topic", "StackResourceDriftStatus": "DELETED"},
+        ]
+        start = int(NextToken or 0)
+        response = {"StackResourceDrifts": drifts[start:start + 1]}
+        if start + 1 < len(drifts):
+            response["NextToken"] = str(start + 1)
+        return response
+
+
+class TestStackResourceIndex(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+
+    @mock_aws
+    def test_index_and_incremental_refresh(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", queue_template("Jobs", "Results"))
+        self.cloudformation.create_stack("reports", queue_template("Reports"))
+        self.cloudformation.create_stack("old", queue_template("Old"))
+
+        index = self.cloudformation.build_resource_index(max_workers=2)
+        self.assertEqual(len(index.by_physical_id), 4)
+        jobs = index.stack_resources("app")["Jobs"]
+        owner = index.owner(jobs["PhysicalResourceId"])
+        self.assertEqual((owner["StackName"], owner["LogicalResourceId"], owner["ResourceType"]),
+                         ("app", "Jobs", "AWS::SQS::Queue"))
+        self.assertEqual(len(index.resources_of_type("AWS::SQS::Queue")), 4)
+
+        # Nothing changed: no stack is reloaded.
+        self.assertEqual(index.refresh(), {"loaded": [], "removed": [], "errors": {}})
+        self.assertEqual(index.stats["stacks_skipped"], 3)
+
+        self.cloudformation.update_stack("reports", queue_template("Reports", "Archive"))
+        self.cloudformation.delete_stack("old")
+        report = index.refresh()
+        self.assertEqual(report["loaded"], ["reports"])
+        self.assertEqual(report["removed"], ["old"])
+        self.assertEqual(sorted(index.stack_resources("reports")), ["Archive", "Reports"])
+        self.assertEqual(len(index.by_physical_id), 4)
+
+    @mock_aws
+    def test_list_stacks_reads_every_page(self):
+        client = self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        for i in range(3):
+            self.cloudformation.create_stack(f"stack-{i}", queue_template("Queue"))
+        real_list_stacks = client.list_stacks
+
+        def one_per_page(NextToken=None, **params):
+            # moto returns everything at once; hand the stacks out one page at a time.
+            summaries = real_list_stacks(**params)["StackSummaries"]
+            start = int(NextToken or 0)
+            response = {"StackSummaries": summaries[start:start + 1]}
+            if start + 1 < len(summaries):
+                response["NextToken"] = str(start + 1)
+            return response
+
+        with mock.patch.object(client, "list_stacks", side_effect=one_per_page) as list_stacks:
+            self.assertEqual(sorted(self.cloudformation.list_stacks()), ["stack-0", "stack-1", "stack-2"])
+            self.assertEqual(list_stacks.call_count, 3)
+            index = StackResourceIndex(self.cloudformation)
+            self.assertEqual(sorted(index.refresh()["loaded"]), ["stack-0", "stack-1", "stack-2"])
+        self.assertEqual(len(self.cloudformation.list_stack_resources("stack-0")), 1)
+
+    def test_detect_drift_in_parallel(self):
+        client = FakeDriftClient()
+        index = StackResourceIndex(SimpleNamespace(cloudformation=client), max_workers=4)
+
+        results = index.detect_drift(["app", "web", "broken", "flaky"], poll_interval=0.01)
+        self.assertEqual(results["web"], {"StackDriftStatus": "IN_SYNC", "DriftedResources": []})
+        self.assertEqual(results["app"]["StackDriftStatus"], "DRIFTED")
+        self.assertEqual([drift["LogicalResourceId"] for drift in results["app"]["DriftedResources"]], ["Queue", "Topic"])
+        self.assertIn("does not exist", results["broken"]["error"])
+        self.assertIn("Connection reset", results["flaky"]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
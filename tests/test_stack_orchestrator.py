@@ -0,0 +1,88 @@
+import json
+import unittest
+from unittest import mock
+
+import boto3
+from moto import mock_aws
+
+from aws_wrapper.cloudformation import CloudFormation
+from aws_wrapper.stack_orchestrator import StackOrchestrator, StackOutput
+
+NETWORK = {
+    "Resources": {"Topic": {"Type": "AWS::SNS::Topic"}},
+    "Outputs": {
+        "TopicArn": {"Value": {"Ref": "Topic"}, "Export": {"Name": {"Fn::Sub": "${AWS::StackName}-TopicArn"}}},
+    },
+}
+APP = {
+    "Resources": {
+        "Queue": {
+            "Type": "AWS::SQS::Queue",
+            "Properties": {
+                "QueueName": "app-queue",
+                "Tags": [{"Key": "topic", "Value": {"Fn::ImportValue": "network-TopicArn"}}],
+            },
+        },
+    },
+}
+WORKER = {
+    "Parameters": {"TopicArn": {"Type": "String"}},
+    "Resources": {"Queue": {"Type": "AWS::SQS::Queue", "Properties": {"QueueName": "worker-queue"}}},
+    "Outputs": {"Topic": {"Value": {"Ref": "TopicArn"}}},
+}
+
+
+class TestStackOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+        self.stacks = [
+            {"name": "worker", "template": json.dumps(WORKER), "parameters": {"TopicArn": StackOutput("network", "TopicArn")}},
+            {"name": "app", "template": APP},
+            {"name": "network", "template": NETWORK},
+            {"name": "dashboard", "template": {"Resources": {"Queue": {"Type": "AWS::SQS::Queue"}}}, "depends_on": ["app"]},
+        ]
+
+    def test_dependencies_from_outputs_imports_and_declarations(self):
+        dependencies = StackOrchestrator.dependencies(self.stacks)
+        self.assertEqual(dependencies, {"worker": {"network"}, "app": {"network"}, "network": set(), "dashboard": {"app"}})
+
+        with self.assertRaises(ValueError):
+            StackOrchestrator.dependencies([{"name": "a", "template": {}, "depends_on": ["missing"]}])
+
+    @mock_aws
+    def test_deploy_wires_outputs(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        report = self.cloudformation.deploy_stacks(self.stacks, max_concurrency=4, poll_interval=0.01)
+
+        self.assertEqual({name: entry["status"] for name, entry in report.items()},
+                         {"worker": "succeeded", "app": "succeeded", "network": "succeeded", "dashboard": "succeeded"})
+        topic_arn = report["network"]["Outputs"]["TopicArn"]
+        self.assertEqual(report["worker"]["Outputs"]["Topic"], topic_arn)
+        self.assertEqual(report["worker"]["StackStatus"], "CREATE_COMPLETE")
+
+        # A second run only touches the stack whose template changed.
+        self.stacks[3]["template"] = {"Resources": {"Topic": {"Type": "AWS::SNS::Topic"}}}
+        with mock.patch.object(self.cloudformation, "describe_stack", wraps=self.cloudformation.describe_stack) as describe:
+            report = self.cloudformation.deploy_stacks(self.stacks, poll_interval=0.01)
+        self.assertEqual({name: entry["Action"] for name, entry in report.items()},
+                         {"worker": "skipped", "app": "skipped", "network": "skipped", "dashboard": "updated"})
+        # Skipped stacks answer from their recorded outputs.
+        self.assertEqual(report["network"]["Outputs"]["TopicArn"], topic_arn)
+        self.assertNotIn(mock.call("network"), describe.call_args_list)
+
+    @mock_aws
+    def test_failure_stops_downstream_stacks(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.stacks[0]["parameters"] = {"TopicArn": StackOutput("network", "Missing")}
+        self.stacks.append({"name": "reports", "template": {"Resources": {"Queue": {"Type": "AWS::SQS::Queue"}}}, "depends_on": ["worker"]})
+
+        report = self.cloudformation.deploy_stacks(self.stacks, poll_interval=0.01)
+        self.assertEqual(report["worker"]["status"], "failed")
+        self.assertIn("Missing", report["worker"]["error"])
+        self.assertEqual(report["reports"]["status"], "skipped")
+        self.assertEqual(report["dashboard"]["status"], "succeeded")
+        self.assertNotIn("reports", self.cloudformation.list_stacks())
+
+
+if __name__ == "__main__":
+    unittest.main()
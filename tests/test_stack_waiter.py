@@ -0,0 +1,92 @@
+import json
+import unittest
+from unittest import mock
+
+import boto3
+from botocore.exceptions import ClientError, EndpointConnectionError
+from moto import mock_aws
+
+from aws_wrapper.cloudformation import CloudFormation
+from aws_wrapper.stack_waiter import StackWaiter
+
+
+def queue_template(queue_name):
+    return json.dumps({"Resources": {"Queue": {"Type": "AWS::SQS::Queue", "Properties": {"QueueName": queue_name}}}})
+
+
+class TestStackWaiter(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+
+    @mock_aws
+    def test_wait_for_many_stacks(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        names = [f"stack-{i}" for i in range(20)]
+        for name in names:
+            self.cloudformation.create_stack(name, queue_template(name))
+        self.cloudformation.delete_stack("stack-0")
+
+        events = []
+        results = self.cloudformation.wait_for_stacks(names, timeout=10, on_event=lambda name, event: events.append((name, event)), poll_interval=0.01)
+
+        self.assertEqual(results["stack-0"]["StackStatus"], "DELETE_COMPLETE")
+        self.assertTrue(all(result["Succeeded"] for result in results.values()))
+        self.assertEqual(results["stack-5"]["StackStatus"], "CREATE_COMPLETE")
+        stack_5 = [event["ResourceStatus"] for name, event in events if name == "stack-5"]
+        self.assertEqual(stack_5, ["CREATE_IN_PROGRESS", "CREATE_COMPLETE"])
+
+    @mock_aws
+    def test_streams_only_the_current_operation(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", queue_template("app-queue"))
+        self.cloudformation.wait_for_stacks(["app"], timeout=10, poll_interval=0.01)
+        self.cloudformation.update_stack("app", queue_template("app-queue-v2"))
+
+        events = []
+        self.cloudformation.wait_for_stacks(["app"], timeout=10, on_event=lambda name, event: events.append(event), poll_interval=0.01)
+        self.assertEqual(events[0]["ResourceStatus"], "UPDATE_IN_PROGRESS")
+        self.assertNotIn("CREATE_COMPLETE", [event["ResourceStatus"] for event in events])
+
+    @mock_aws
+    def test_polls_until_terminal_and_backs_off_on_throttling(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", queue_template("app-queue"))
+        stack_id = self.cloudformation.describe_stack("app")["StackId"]
+
+        waiter = StackWaiter(self.cloudformation, poll_interval=0.01)
+        throttled = ClientError({"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, "ListStacks")
+        in_progress = {stack_id: {"StackId": stack_id, "StackStatus": "CREATE_IN_PROGRESS"}}
+        real_list_statuses = waiter._list_statuses
+        with mock.patch.object(waiter, "_list_statuses", side_effect=[throttled, in_progress, in_progress, real_list_statuses()]):
+            result = waiter.watch("app").result(timeout=10)
+
+        self.assertEqual(result["StackStatus"], "CREATE_COMPLETE")
+        self.assertEqual(waiter.stats["throttled"], 1)
+        self.assertEqual(waiter.stats["polls"], 4)
+
+    @mock_aws
+    def test_missing_stack_fails_only_its_future(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", queue_template("app-queue"))
+        waiter = StackWaiter(self.cloudformation, poll_interval=0.01)
+        with self.assertRaises(ClientError):
+            waiter.watch("does-not-exist")
+        self.assertTrue(waiter.watch("app").result(timeout=10)["Succeeded"])
+
+    @mock_aws
+    def test_connection_errors_fail_the_watches(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        self.cloudformation.create_stack("app", queue_template("app-queue"))
+        waiter = StackWaiter(self.cloudformation, poll_interval=0.01)
+
+        unreachable = EndpointConnectionError(endpoint_url="https://cloudformation.us-east-1.amazonaws.com")
+        with mock.patch.object(self.cloudformation.cloudformation, "list_stacks", side_effect=unreachable):
+            with self.assertRaises(EndpointConnectionError):
+                waiter.watch("app").result(timeout=10)
+
+        # The polling thread exited cleanly and a new watch starts another one.
+        self.assertTrue(waiter.watch("app").result(timeout=10)["Succeeded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
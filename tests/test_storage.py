@@ -50,6 +50,18 @@ class TestStorage(unittest.TestCase):
         # Download the file
         downloaded_content = self.storage.s3.get_object(Bucket=bucket_name, Key=file_key)["Body"].read().decode()
         self.assertEqual(downloaded_content, file_content)
+        self.assertEqual(self.storage.download_file(bucket_name, file_key), file_content.encode())
+
+    @mock_aws
+    def test_object_exists(self):
+        # Reinitialize boto3 client within the mock context
+        self.storage.s3 = boto3.client("s3", region_name="us-east-1")
+
+        bucket_name = "test-bucket"
+        self.storage.create_bucket(bucket_name)
+        self.assertFalse(self.storage.object_exists(bucket_name, "test.txt"))
+        self.storage.upload_file(bucket_name, "test.txt", "This is a test file.")
+        self.assertTrue(self.storage.object_exists(bucket_name, "test.txt"))
 
     @mock_aws
     def test_delete_object_and_bucket(self):
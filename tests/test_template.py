@@ -0,0 +1,171 @@
+import json
+import unittest
+
+import boto3
+from moto import mock_aws
+
+from aws_wrapper.cloudformation import CloudFormation
+from aws_wrapper.stack_orchestrator import StackOrchestrator
+from aws_wrapper.template import Template, load_template, parse_template
+
+YAML_TEMPLATE = """
+AWSTemplateFormatVersion: 2010-09-09
+Parameters:
+  Env:
+    Type: String
+    AllowedValues: [dev, prod]
+    Default: dev
+Conditions:
+  IsProd: !Equals [!Ref Env, prod]
+Resources:
+  Topic:
+    Type: AWS::SNS::Topic
+  Queue:
+    Type: AWS::SQS::Queue
+    Properties:
+      QueueName: !Sub "${AWS::StackName}-${Env}"
+      Tags:
+        - Key: topic
+          Value: !GetAtt Topic.TopicName
+  Policy:
+    Type: AWS::SQS::QueuePolicy
+    Condition: IsProd
+    Properties:
+      Queues: [!Ref Queue]
+      PolicyDocument:
+        Statement:
+          - Effect: Allow
+            Principal: "*"
+            Action: sqs:SendMessage
+            Resource: !Sub "${Queue.Arn}"
+            Condition:
+              ArnEquals: {"aws:SourceArn": !Ref Topic}
+  Dashboard:
+    Type: AWS::SQS::Queue
+    Condition: IsProd
+    DependsOn: Policy
+Outputs:
+  QueueUrl:
+    Value: !If [IsProd, !Ref Queue, !ImportValue shared-queue-url]
+"""
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parses_yaml_short_tags(self):
+        document = parse_template(YAML_TEMPLATE)
+        self.assertEqual(document["AWSTemplateFormatVersion"], "2010-09-09")
+        self.assertEqual(document["Conditions"]["IsProd"], {"Fn::Equals": [{"Ref": "Env"}, "prod"]})
+        queue = document["Resources"]["Queue"]["Properties"]
+        self.assertEqual(queue["Tags"][0]["Value"], {"Fn::GetAtt": ["Topic", "TopicName"]})
+        self.assertEqual(document["Outputs"]["QueueUrl"]["Value"]["Fn::If"][2], {"Fn::ImportValue": "shared-queue-url"})
+
+    def test_valid_template_dependency_graph(self):
+        template = load_template(YAML_TEMPLATE)
+        self.assertEqual(template.errors, [])
+        self.assertEqual(template.dependencies, {
+            "Topic": set(), "Queue": {"Topic"}, "Policy": {"Queue", "Topic"}, "Dashboard": {"Policy"},
+        })
+        self.assertEqual(template.creation_order(), [["Topic"], ["Queue"], ["Policy"], ["Dashboard"]])
+
+    def test_parsed_once_per_content(self):
+        first = load_template(YAML_TEMPLATE)
+        self.assertIs(load_template(YAML_TEMPLATE), first)
+        document = {"Resources": {"Queue": {"Type": "AWS::SQS::Queue"}}}
+        self.assertIs(load_template(document), load_template(json.loads(json.dumps(document))))
+
+    def test_reports_static_errors(self):
+        template = Template({
+            "Parameters": {
+                "Size": {"Type": "Number", "Default": "big"},
+                "Env": {"Type": "String", "Default": "qa", "AllowedValues": ["dev", "prod"]},
+                "Bad": {"Type": "Strnig"},
+                "Typed": {"Type": ["String"]},
+                "Port": {"Type": "Number", "Default": 80, "MinValue": "one", "MaxValue": {"Ref": "Size"}},
+                "Name": {"Type": "String", "Default": "app", "MaxLength": "ten"},
+            },
+            "Conditions": {"IsBig": {"Fn::Equals": [{"Ref": "Queue"}, "x"]}},
+            "Resources": {
+                "Queue": {
+                    "Type": "AWS::SQS::Queue",
+                    "Condition": "Missing",
+                    "DependsOn": "Ghost",
+                    "Properties": {
+                        "QueueName": {"Fn::Sub": "${Nope}-${Topic.Arn}-${Local}", },
+                        "DelaySeconds": {"Fn::GetAtt": ["Absent", "Arn"]},
+                    },
+                },
+                "A": {"Type": "AWS::SQS::Queue", "Properties": {"QueueName": {"Ref": "B"}}},
+                "Late": {"Type": "AWS::SQS::Queue", "DependsOn": "Queue"},
+                "B": {"Type": "AWS::SQS::Queue", "Properties": {"QueueName": {"Ref": "A"}}},
+            },
+            "Outputs": {"Url": {"Value": {"Fn::If": ["Unknown", {"Ref": "Queue"}, "none"]}}, "Empty": {}},
+        })
+        errors = "\n".join(template.errors)
+        for expected in (
+            "Parameter 'Size' Default 'big' is not a Number",
+            "Parameter 'Env' Default 'qa' is not in AllowedValues",
+            "Parameter 'Bad' has unsupported Type 'Strnig'",
+            "Parameter 'Typed' Type must be a string",
+            "Parameter 'Port' MinValue 'one' is not a number",
+            "Parameter 'Port' MaxValue '{'Ref': 'Size'}' is not a number",
+            "Parameter 'Name' MaxLength 'ten' is not a number",
+            "Condition 'IsBig' may only reference parameters, not 'Queue'",
+            "Resource 'Queue' uses undefined condition 'Missing'",
+            "Resource 'Queue' DependsOn undefined resource 'Ghost'",
+            "Resource 'Queue' references undefined 'Nope'",
+            "Resource 'Queue' references undefined 'Local'",
+            "Resource 'Queue' gets attribute 'Arn' of undefined resource 'Topic'",
+            "Resource 'Queue' gets attribute 'Arn' of undefined resource 'Absent'",
+            "Output 'Url' uses undefined condition 'Unknown' in Fn::If",
+            "Output 'Empty' must declare a Value",
+            "Resource 'Late' DependsOn 'Queue', which is created only under condition 'Missing'",
+            "cycle involving: A, B",
+        ):
+            self.assertIn(expected, errors)
+        self.assertFalse(template.valid)
+
+    def test_sub_local_variables_are_not_references(self):
+        template = Template({"Resources": {"Queue": {
+            "Type": "AWS::SQS::Queue",
+            "Properties": {"QueueName": {"Fn::Sub": ["${Prefix}-${!Literal}-${AWS::Region}", {"Prefix": "app"}]}},
+        }}})
+        self.assertEqual(template.errors, [])
+
+    def test_orchestrator_reads_yaml_imports(self):
+        stacks = [
+            {"name": "shared", "template": "Resources:\n  Queue:\n    Type: AWS::SQS::Queue\n"
+                                           "Outputs:\n  Url:\n    Value: !Ref Queue\n    Export:\n      Name: shared-queue-url\n"},
+            {"name": "app", "template": YAML_TEMPLATE},
+        ]
+        self.assertEqual(StackOrchestrator.dependencies(stacks), {"shared": set(), "app": {"shared"}})
+
+
+class TestCloudFormationCheckTemplate(unittest.TestCase):
+    def setUp(self):
+        self.cloudformation = CloudFormation(region="us-east-1")
+
+    @mock_aws
+    def test_check_template_offline_then_confirm(self):
+        self.cloudformation.cloudformation = boto3.client("cloudformation", region_name="us-east-1")
+        calls = []
+        self.cloudformation.cloudformation.meta.events.register(
+            "before-call.cloudformation.ValidateTemplate", lambda **kwargs: calls.append(1)
+        )
+
+        broken = self.cloudformation.check_template({"Resources": {"Queue": {"Type": "AWS::SQS::Queue", "DependsOn": "X"}}}, confirm=True)
+        self.assertFalse(broken["Valid"])
+        self.assertEqual(calls, [])
+
+        unparsable = self.cloudformation.check_template("Resources: [unclosed")
+        self.assertFalse(unparsable["Valid"])
+
+        document = {key: value for key, value in parse_template(YAML_TEMPLATE).items() if key != "Outputs"}
+        result = self.cloudformation.check_template(json.dumps(document), confirm=True)
+        self.assertTrue(result["Valid"])
+        self.assertEqual(result["CreationOrder"][0], ["Topic"])
+        self.assertIn("Parameters", result)
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()